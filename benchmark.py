@@ -0,0 +1,237 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+
+# The file that the results of every benchmark run are appended to, one JSON object per line
+HISTORY_FILE = "benchmark_history.jsonl"
+
+# A metric is a regression if it is this much worse than the median of earlier runs
+THRESHOLD = 0.2
+
+# The number of earlier runs on the same host that a run is compared with
+BASELINE_RUNS = 5
+
+# The metrics for which lower is better, all other metrics are throughputs
+LOWER_IS_BETTER = ("seconds", "bytes")
+
+
+def best_time(function: Callable[[], object], repeat: int) -> float:
+    """
+    Returns the shortest wall time of ``repeat`` calls of the function, in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - begin)
+    return min(times)
+
+
+def bench_simulation(replications: int, repeat: int) -> Dict[str, float]:
+    """
+    Measures the simpy engine: machine ticks and replications per second for every output,
+    and the peak memory of one replication with the full log.
+    """
+    from simulation import MACHINE_CONFIGS, RUN_TIME, map_replications, run_sim
+
+    results = {}
+    ticks = len(MACHINE_CONFIGS) * RUN_TIME * replications
+    for output in ("log", "stations", "stats"):
+        seconds = best_time(
+            lambda: list(map_replications(replications, 1, 0, output)), repeat
+        )
+        results[f"simpy_{output}_ticks_per_second"] = ticks / seconds
+        results[f"simpy_{output}_replications_per_second"] = replications / seconds
+    tracemalloc.start()
+    run_sim(0, np.random.SeedSequence(0), "log")
+    results["simpy_log_replication_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return results
+
+
+def bench_vectorized(replications: int, repeat: int) -> Dict[str, float]:
+    """
+    Measures the replications per second of the vectorized engine.
+    """
+    from vectorized import run_vectorized
+
+    seconds = best_time(lambda: run_vectorized(replications, seed=0), repeat)
+    return {"vectorized_replications_per_second": replications / seconds}
+
+
+def bench_kernel(replications: int, repeat: int) -> Dict[str, float]:
+    """
+    Measures the replications per second of the compiled kernel, if numba is installed.
+    """
+    import jitkernel
+
+    if jitkernel.njit is None:
+        return {}
+    # The first run compiles the kernel, or loads it from the cache
+    jitkernel.run_compiled(1, seed=0)
+    seconds = best_time(lambda: jitkernel.run_compiled(replications, seed=0), repeat)
+    return {"kernel_replications_per_second": replications / seconds}
+
+
+def bench_log_writer(replications: int, repeat: int) -> Dict[str, float]:
+    """
+    Measures the rows per second that the Parquet and Arrow log writers write, if pyarrow is installed.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return {}
+    from logwriter import LogWriter
+    from simulation import run_replications
+
+    event_log = run_replications(replications, 1, 0)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for format in ("parquet", "arrow"):
+            path = os.path.join(directory, f"log.{format}")
+
+            def write():
+                with LogWriter(path, format) as sink:
+                    sink.write(event_log)
+
+            seconds = best_time(write, repeat)
+            results[f"{format}_rows_per_second"] = len(event_log) / seconds
+    results["to_frame_rows_per_second"] = len(event_log) / best_time(
+        event_log.to_frame, repeat
+    )
+    return results
+
+
+def bench_lp(horizons: List[int], scenarios: List[int]) -> Dict[str, float]:
+    """
+    Measures the build and solve time of the buffer LP with HiGHS for every horizon and
+    number of scenarios.
+    """
+    from lpmodel import build_buffer_lp, solve
+    from simulation import run_station_speeds
+
+    speeds = run_station_speeds(max(scenarios), workers=1, seed=0)
+    results = {}
+    for horizon in horizons:
+        for n in scenarios:
+            pspeed = speeds[:horizon, :, :n].transpose(2, 1, 0).astype(float)
+            lp = build_buffer_lp(pspeed)
+            solution = solve(lp)
+            results[f"lp_T{horizon}_S{n}_build_seconds"] = lp.build_time
+            results[f"lp_T{horizon}_S{n}_solve_seconds"] = solution.solve_time
+    return results
+
+
+def git_commit() -> Optional[str]:
+    """
+    Returns the hash of the checked out commit, if this is a git repository.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def read_history(path: str) -> List[Dict]:
+    """
+    Returns the earlier runs in the history file, oldest first.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def find_regressions(
+    run: Dict, history: List[Dict], threshold: float = THRESHOLD
+) -> List[str]:
+    """
+    Compares the metrics of a run with the median of the last BASELINE_RUNS runs of the same
+    mode on the same host, and returns a message for every metric that is worse by more than
+    the threshold.
+    """
+    earlier = [
+        entry
+        for entry in history
+        if entry["host"] == run["host"] and entry["quick"] == run["quick"]
+    ][-BASELINE_RUNS:]
+    regressions = []
+    for name, value in run["metrics"].items():
+        values = [entry["metrics"][name] for entry in earlier if name in entry["metrics"]]
+        if not values:
+            continue
+        baseline = float(np.median(values))
+        if any(name.endswith(unit) for unit in LOWER_IS_BETTER):
+            change = value / baseline - 1 if baseline else 0.0
+        else:
+            change = 1 - value / baseline if baseline else 0.0
+        if change > threshold:
+            regressions.append(
+                f"{name}: {value:.4g} against a baseline of {baseline:.4g} ({change:.0%} worse)"
+            )
+    return regressions
+
+
+def run_benchmarks(quick: bool = False) -> Dict[str, float]:
+    """
+    Runs all benchmarks, with smaller sizes if quick.
+    """
+    repeat = 1 if quick else 3
+    metrics = {}
+    metrics.update(bench_simulation(5 if quick else 20, repeat))
+    metrics.update(bench_vectorized(100 if quick else 1000, repeat))
+    metrics.update(bench_kernel(1000 if quick else 10000, repeat))
+    metrics.update(bench_log_writer(5 if quick else 50, repeat))
+    metrics.update(
+        bench_lp([60, 240] if quick else [60, 240, 481], [1, 4] if quick else [1, 4, 16])
+    )
+    return metrics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the simulation and the LP model.")
+    parser.add_argument("--quick", action="store_true", help="run with small sizes")
+    parser.add_argument("--history", default=HISTORY_FILE, help="the JSON lines history file")
+    parser.add_argument(
+        "--threshold", type=float, default=THRESHOLD, help="the allowed relative regression"
+    )
+    parser.add_argument("--no-save", action="store_true", help="do not append to the history")
+    args = parser.parse_args()
+
+    run = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "quick": args.quick,
+        "metrics": run_benchmarks(args.quick),
+    }
+    for name, value in run["metrics"].items():
+        print(f"{name:50s} {value:14.4g}")
+
+    regressions = find_regressions(run, read_history(args.history), args.threshold)
+    if not args.no_save:
+        with open(args.history, "a") as file:
+            file.write(json.dumps(run) + "\n")
+    if regressions:
+        print("\nRegressions:")
+        for message in regressions:
+            print(f"  {message}")
+        sys.exit(1)
@@ -21,6 +21,8 @@ class Buffer(object):
         self.id = id
         self.max_capacity = max_capacity
         self.current_parts = current_parts
+        # The accumulators that are updated on every put and get, see StatsRecorder.track
+        self.stats = None
 
     def get_parts(self, amount: int) -> int:
         """
@@ -33,6 +35,8 @@ class Buffer(object):
         """
         result_out = min([amount, self.current_parts])
         self.current_parts -= result_out
+        if self.stats is not None:
+            self.stats.get(amount, result_out)
         return result_out
 
     def put_parts(self, amount: int) -> int:
@@ -47,4 +51,6 @@ class Buffer(object):
         buffer_space = self.max_capacity - self.current_parts
         result_in = min([amount, buffer_space])
         self.current_parts += result_in
+        if self.stats is not None:
+            self.stats.put(amount, result_in, self.current_parts)
         return result_in
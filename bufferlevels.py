@@ -0,0 +1,181 @@
+import numpy as np
+import pandas as pd
+import simpy
+from typing import List, Sequence
+from simpy.events import NORMAL
+from buffer import Buffer
+from machine import OrderedTimeout
+
+
+class BufferLevels:
+    """
+    This class records the level of buffers at the end of every minute into a preallocated array.
+
+    ``monitor`` starts a simpy process that reads the levels every minute. Its priority must be
+    higher than the priorities of the machines, so that it runs after all machines have acted
+    in the same minute.
+    Without a monitor nothing is recorded and the simulation runs as before.
+
+    It can also be used in place of the EventLog, to only record the buffer levels: machines
+    register their name and their records are ignored.
+    """
+
+    def __init__(self, run_time: int, simulation: int = 1) -> None:
+        """
+        Args:
+            run_time (int): The number of minutes that is recorded.
+            simulation (int): The simulation index of the recorded replication.
+        """
+        self.run_time = run_time
+        self.simulation = simulation
+        self.names: List[str] = []
+        self.max_capacity = np.zeros(0)
+        self.levels = np.zeros((run_time, 0))
+
+    def monitor(
+        self, env: simpy.Environment, buffers: Sequence[Buffer], priority: int = NORMAL
+    ):
+        """
+        Starts recording the levels of the given buffers.
+
+        Args:
+            env (simpy.Environment): The simulation environment.
+            buffers (Sequence[Buffer]): The buffers to record.
+            priority (int): The priority of the monitor among the events of a minute, it must
+                be higher than the priorities of the machines, see Machine.
+
+        Returns:
+            simpy.Process: The monitoring process.
+        """
+        self.names = [buffer.id for buffer in buffers]
+        self.max_capacity = np.array([buffer.max_capacity for buffer in buffers], dtype=float)
+        self.levels = np.zeros((self.run_time, len(buffers)))
+        return env.process(self.record_levels(env, buffers, priority))
+
+    def record_levels(
+        self, env: simpy.Environment, buffers: Sequence[Buffer], priority: int = NORMAL
+    ):
+        """
+        The process that writes the levels of the buffers into the array every minute.
+        """
+        levels = self.levels
+        while env.now < self.run_time:
+            levels[env.now] = [buffer.current_parts for buffer in buffers]
+            yield OrderedTimeout(env, 1, priority)
+
+    def register(self, name: str) -> int:
+        return 0
+
+    def record(
+        self,
+        time: int,
+        machine: int,
+        state: int,
+        set_speed: float,
+        actual_speed: float,
+        count: float,
+        tailback: int,
+        lack: int,
+    ) -> None:
+        """
+        Ignores the events of the machines, see EventLog.record.
+        """
+
+    def record_span(
+        self,
+        start: int,
+        stop: int,
+        machine: int,
+        state: int,
+        set_speed: float,
+        actual_speed: float,
+        count: float,
+        tailback: int,
+        lack: int,
+    ) -> None:
+        """
+        Ignores the events of the machines, see EventLog.record_span.
+        """
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Returns the levels with a row per minute and a column per buffer.
+        """
+        frame = pd.DataFrame(self.levels, columns=self.names)
+        frame.insert(0, "Time", np.arange(self.run_time))
+        frame.insert(1, "Simulation", self.simulation)
+        return frame
+
+
+def occupancy_histogram(
+    levels: np.ndarray, max_capacity: np.ndarray, names: Sequence[str], bins: int = 20
+) -> pd.DataFrame:
+    """
+    Returns the fraction of the minutes that every buffer was filled to each fraction of its
+    maximum capacity.
+
+    Args:
+        levels (np.ndarray): The levels with shape (time, buffer) or (time, buffer, replication).
+        max_capacity (np.ndarray): The maximum capacity of every buffer.
+        names (Sequence[str]): The names of the buffers.
+        bins (int): The number of bins of equal width between empty and full.
+
+    Returns:
+        pd.DataFrame: A column per buffer, indexed by the lower edge of the bins. A full buffer
+            is counted in the last bin.
+    """
+    fill = levels / np.asarray(max_capacity).reshape((1, -1) + (1,) * (levels.ndim - 2))
+    b = np.clip((fill * bins).astype(np.int64), 0, bins - 1)
+    b = np.moveaxis(b, 1, 0).reshape(len(names), -1)
+    counts = np.stack([np.bincount(row, minlength=bins) for row in b], axis=1)
+    return pd.DataFrame(
+        counts / b.shape[1], index=np.arange(bins) / bins, columns=list(names)
+    )
+
+
+def spells(mask: np.ndarray) -> np.ndarray:
+    """
+    Returns the lengths of the runs of True along the first axis of a boolean array, for all
+    other axes together.
+    """
+    mask = mask.reshape(len(mask), -1)
+    padded = np.zeros((len(mask) + 2, mask.shape[1]), dtype=np.int8)
+    padded[1:-1] = mask
+    # Every run starts with a +1 step and ends with a -1 step, column by column
+    steps = np.diff(padded, axis=0).T
+    starts = np.nonzero(steps.ravel() == 1)[0]
+    ends = np.nonzero(steps.ravel() == -1)[0]
+    return ends - starts
+
+
+def full_empty_statistics(
+    levels: np.ndarray, max_capacity: np.ndarray, names: Sequence[str]
+) -> pd.DataFrame:
+    """
+    Returns per buffer how often it was full or empty, and for how long at a time.
+
+    Args:
+        levels (np.ndarray): The levels with shape (time, buffer) or (time, buffer, replication).
+        max_capacity (np.ndarray): The maximum capacity of every buffer.
+        names (Sequence[str]): The names of the buffers.
+
+    Returns:
+        pd.DataFrame: Per buffer the fraction of the minutes it was full and empty, the number
+            of full and empty spells per replication and their mean and longest duration.
+    """
+    replications = levels.shape[2] if levels.ndim == 3 else 1
+    rows = []
+    for b, name in enumerate(names):
+        level = levels[:, b]
+        row = {"Buffer": name}
+        for kind, mask in (
+            ("Full", level >= max_capacity[b] * (1 - 1e-9)),
+            ("Empty", level <= 0),
+        ):
+            lengths = spells(mask)
+            row[kind] = mask.mean()
+            row[f"{kind} spells"] = len(lengths) / replications
+            row[f"Mean {kind.lower()} spell"] = lengths.mean() if len(lengths) else 0.0
+            row[f"Longest {kind.lower()} spell"] = lengths.max() if len(lengths) else 0
+        rows.append(row)
+    return pd.DataFrame(rows)
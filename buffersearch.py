@@ -0,0 +1,289 @@
+import hashlib
+import os
+import pickle
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence
+from machineparams import PARAMS_FILE
+from simulation import RUN_TIME, map_replications
+from topology import DEFAULT_TOPOLOGY, Topology
+
+
+# The directory of the cached replication outputs, relative to the working directory
+CACHE_DIR = "__simcache__"
+
+# Bump this when the simulation changes, so that old cached outputs are not used
+CACHE_VERSION = 4
+
+
+class ResultCache:
+    """
+    This class keeps the output of every evaluated (capacities, seed, replication) on disk.
+
+    The outputs of one buffer design and seed are kept in one pickle, named after the hash of
+    the design, the seed, the run time, the machine parameter file and the layout of the line
+    (see Topology.digest), so a changed parameter file or layout never reuses old outputs.
+    """
+
+    def __init__(
+        self, directory: Optional[str] = CACHE_DIR, topology: Topology = DEFAULT_TOPOLOGY
+    ) -> None:
+        """
+        Args:
+            directory (str): The directory of the cache, None or an empty string disables it.
+            topology (Topology): The layout of the line whose outputs are cached.
+        """
+        self.directory = directory
+        with open(PARAMS_FILE, "rb") as file:
+            self.params_digest = hashlib.sha256(file.read()).hexdigest()
+        self.topology_digest = topology.digest()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def path(self, capacities: Sequence[float], seed: int) -> str:
+        """
+        Returns the file of the outputs of a buffer design and seed.
+        """
+        key = repr(
+            (
+                tuple(float(c) for c in capacities),
+                seed,
+                RUN_TIME,
+                self.params_digest,
+                self.topology_digest,
+            )
+        )
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}-v{CACHE_VERSION}.pkl")
+
+    def get(self, capacities: Sequence[float], seed: int) -> Dict[int, float]:
+        """
+        Returns the cached output per replication index, empty if there is none.
+        """
+        if not self.directory:
+            return {}
+        try:
+            with open(self.path(capacities, seed), "rb") as file:
+                return pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return {}
+
+    def update(self, capacities: Sequence[float], seed: int, outputs: Dict[int, float]) -> None:
+        """
+        Adds the outputs per replication index to the cache.
+        """
+        if not self.directory:
+            return
+        cached = self.get(capacities, seed)
+        cached.update(outputs)
+        path = self.path(capacities, seed)
+        # Write to a temporary file first, so that a reader never sees half a file
+        temporary = f"{path}.{os.getpid()}"
+        with open(temporary, "wb") as file:
+            pickle.dump(cached, file)
+        os.replace(temporary, path)
+
+
+def evaluate_design(
+    capacities: Sequence[float],
+    replications: int,
+    seed: int = 0,
+    workers: Optional[int] = None,
+    cache: Optional[ResultCache] = None,
+    topology: Topology = DEFAULT_TOPOLOGY,
+) -> np.ndarray:
+    """
+    Returns the output (the count of the last station) of the first n replications of the
+    simulation with the given buffer capacities.
+
+    Replication i always uses the streams i of the seed with common random numbers (see
+    simulation.run_sim), so every design sees the same machine histories, and only
+    replications that are not cached are run.
+
+    Args:
+        capacities (Sequence[float]): The maximum capacity of the buffers between two stations.
+        replications (int): The number of replications.
+        seed (int): The seed of the replications.
+        workers (int): The number of worker processes, defaults to the number of CPUs.
+        cache (ResultCache): The cache of outputs of the same line, if any.
+        topology (Topology): The layout of the line, whose last station gives the output.
+
+    Returns:
+        np.ndarray: The output of every replication.
+    """
+    outputs = cache.get(capacities, seed) if cache is not None else {}
+    # The cached replications are always 0..k-1, only the rest is run
+    start = 0
+    while start in outputs and start < replications:
+        start += 1
+    if start < replications:
+        # The stations are recorded in the order of the topology, the last one gives the output
+        new = {
+            i: float(station_speeds.speeds[:, -1].sum(dtype=np.float64))
+            for i, station_speeds in enumerate(
+                map_replications(
+                    replications - start,
+                    workers,
+                    seed,
+                    "stations",
+                    capacities,
+                    start,
+                    crn=True,
+                    topology=topology,
+                ),
+                start=start,
+            )
+        }
+        outputs.update(new)
+        if cache is not None:
+            cache.update(capacities, seed, new)
+    return np.array([outputs[i] for i in range(replications)])
+
+
+def compare_designs(
+    a: Sequence[float],
+    b: Sequence[float],
+    replications: int,
+    seed: int = 0,
+    workers: Optional[int] = None,
+    cache_dir: Optional[str] = CACHE_DIR,
+    topology: Topology = DEFAULT_TOPOLOGY,
+) -> pd.Series:
+    """
+    Compares the output of two buffer designs on the same replications. As both designs see
+    the same machine histories, the paired differences vary a lot less than the outputs.
+
+    Args:
+        a (Sequence[float]): The capacities of the buffers between two stations of the first design.
+        b (Sequence[float]): The capacities of the buffers between two stations of the second design.
+        replications (int): The number of replications.
+        seed (int): The seed of the replications.
+        workers (int): The number of worker processes, defaults to the number of CPUs.
+        cache_dir (str): The directory of the cache of outputs, None disables it.
+        topology (Topology): The layout of the line.
+
+    Returns:
+        pd.Series: The mean output of both designs, the mean difference (a - b) and the
+            standard error of the difference, paired and as if the runs were independent.
+    """
+    cache = ResultCache(cache_dir, topology)
+    output_a = evaluate_design(a, replications, seed, workers, cache, topology)
+    output_b = evaluate_design(b, replications, seed, workers, cache, topology)
+    difference = output_a - output_b
+    return pd.Series(
+        {
+            "Mean output a": output_a.mean(),
+            "Mean output b": output_b.mean(),
+            "Difference": difference.mean(),
+            "SE paired": difference.std(ddof=1) / np.sqrt(replications),
+            "SE independent": np.sqrt(
+                (output_a.var(ddof=1) + output_b.var(ddof=1)) / replications
+            ),
+        }
+    )
+
+
+def round_to_budget(shares: np.ndarray, budget: int) -> np.ndarray:
+    """
+    Rounds the shares of the budget to whole capacities that add up to the budget, by giving
+    the parts that are left over to the largest remainders.
+    """
+    exact = np.asarray(shares, dtype=float) / np.sum(shares) * budget
+    capacities = np.floor(exact).astype(np.int64)
+    remainder = int(budget - capacities.sum())
+    capacities[np.argsort(capacities - exact)[:remainder]] += 1
+    return capacities
+
+
+def sample_designs(
+    budget: int,
+    n: int,
+    center: Sequence[float] = DEFAULT_TOPOLOGY.capacities,
+    concentration: float = 50.0,
+    seed: Optional[int] = None,
+) -> List[np.ndarray]:
+    """
+    Returns n buffer designs that use the whole budget: the center scaled to the budget,
+    followed by designs that are drawn from a Dirichlet distribution around it.
+
+    Args:
+        budget (int): The total capacity of the buffers between two stations.
+        n (int): The number of designs.
+        center (Sequence[float]): The design that the others are drawn around, e.g. the
+            current capacities or the result of the LP model.
+        concentration (float): How close the designs stay to the center, higher is closer.
+        seed (int): The seed of the draws.
+    """
+    shares = np.asarray(center, dtype=float) / np.sum(center)
+    random_state = np.random.default_rng(seed)
+    designs = [round_to_budget(shares, budget)]
+    for _ in range(n - 1):
+        shares_drawn = random_state.dirichlet(concentration * shares + 1)
+        designs.append(round_to_budget(shares_drawn, budget))
+    return designs
+
+
+def search_buffers(
+    budget: int,
+    designs: Optional[Sequence[Sequence[float]]] = None,
+    n_designs: int = 16,
+    initial_replications: int = 8,
+    max_replications: int = 256,
+    seed: int = 0,
+    workers: Optional[int] = None,
+    cache_dir: Optional[str] = CACHE_DIR,
+    topology: Topology = DEFAULT_TOPOLOGY,
+) -> pd.DataFrame:
+    """
+    Searches the buffer capacities with the highest mean output of the simulation within a
+    total capacity, with successive halving: all designs get a few replications, then the
+    better half of the designs gets twice as many, until one design is left or the maximum
+    number of replications is reached. Replications are only spent on promising designs and
+    every design is compared on the same random numbers.
+
+    Args:
+        budget (int): The total capacity of the buffers between two stations.
+        designs (Sequence): The designs to compare, drawn with sample_designs around the
+            capacities of the line if none are given.
+        n_designs (int): The number of designs to draw.
+        initial_replications (int): The number of replications of every design in the first round.
+        max_replications (int): The maximum number of replications of a design.
+        seed (int): The seed of the replications and of the drawn designs.
+        workers (int): The number of worker processes, defaults to the number of CPUs.
+        cache_dir (str): The directory of the cache of outputs, None disables it.
+        topology (Topology): The layout of the line.
+
+    Returns:
+        pd.DataFrame: Per design the capacity of every buffer, the number of replications,
+            the mean output and its standard error and the last round it took part in,
+            with the best design first.
+    """
+    if designs is None:
+        designs = sample_designs(budget, n_designs, topology.capacities, seed=seed)
+    designs = [np.asarray(design) for design in designs]
+    cache = ResultCache(cache_dir, topology)
+    results = [None] * len(designs)
+    alive = list(range(len(designs)))
+    replications = initial_replications
+    rung = 0
+    while True:
+        for d in alive:
+            outputs = evaluate_design(designs[d], replications, seed, workers, cache, topology)
+            results[d] = {
+                **{f"Buffer {j}": c for j, c in enumerate(designs[d], start=1)},
+                "Replications": replications,
+                "Mean output": outputs.mean(),
+                "SE": outputs.std(ddof=1) / np.sqrt(replications) if replications > 1 else np.nan,
+                "Round": rung,
+            }
+        if len(alive) == 1 or replications >= max_replications:
+            break
+        # Keep the better half
+        alive.sort(key=lambda d: results[d]["Mean output"], reverse=True)
+        alive = alive[: max(1, len(alive) // 2)]
+        replications = min(2 * replications, max_replications)
+        rung += 1
+    frame = pd.DataFrame(results)
+    return frame.sort_values(
+        ["Round", "Mean output"], ascending=False, ignore_index=True
+    )
@@ -0,0 +1,470 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List
+
+
+class EventLog:
+    """
+    This class records the events of the simulation in typed NumPy columns.
+
+    The columns are preallocated in chunks of ``chunk_size`` rows and a new chunk is added when
+    the current one is full. Machines are stored as small integer codes, see ``register``.
+    Spans of minutes that a machine skips are recorded at once, see ``record_span``, and the
+    events are put back in the order of time and machine when the columns are read.
+    """
+
+    # The columns of the log and their types
+    COLUMNS: Dict[str, type] = {
+        "Time": np.int32,
+        "Machine": np.uint8,
+        "State": np.uint16,
+        "Set speed": np.float32,
+        "Actual speed": np.float32,
+        "Count": np.float64,
+        "Tailback": np.bool_,
+        "Lack": np.bool_,
+        "Simulation": np.int32,
+    }
+    # The number of rows that is allocated at once
+    CHUNK_SIZE = 65536
+
+    def __init__(self, simulation: int = 1, chunk_size: int = CHUNK_SIZE) -> None:
+        """
+        Args:
+            simulation (int): The simulation index that is written with every event.
+            chunk_size (int): The number of rows that is allocated at once.
+        """
+        self.simulation = simulation
+        self.chunk_size = chunk_size
+        self.machines: List[str] = []
+        self.chunks: List[Dict[str, np.ndarray]] = []
+        self.size = 0
+        # Whether the events are in the order of time and machine, which spans break
+        self.in_order = True
+        self.new_chunk()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def new_chunk(self) -> None:
+        """
+        Allocates a new chunk of columns and makes it the one that is written to.
+        """
+        chunk = {
+            name: np.empty(self.chunk_size, dtype=dtype)
+            for name, dtype in self.COLUMNS.items()
+        }
+        self.chunks.append(chunk)
+        self.bind(chunk, 0)
+
+    def bind(self, chunk: Dict[str, np.ndarray], row: int) -> None:
+        """
+        Makes the given chunk the one that is written to, from the given row on.
+        """
+        self.row = row
+        self.capacity = len(chunk["Time"])
+        (
+            self.time,
+            self.machine,
+            self.state,
+            self.set_speed,
+            self.actual_speed,
+            self.count,
+            self.tailback,
+            self.lack,
+            self.sim,
+        ) = chunk.values()
+
+    def register(self, name: str) -> int:
+        """
+        Returns the code of the machine with the given name, adding it if it is new.
+
+        Args:
+            name (str): The name of the machine.
+        """
+        if name not in self.machines:
+            self.machines.append(name)
+        return self.machines.index(name)
+
+    def record(
+        self,
+        time: int,
+        machine: int,
+        state: int,
+        set_speed: float,
+        actual_speed: float,
+        count: float,
+        tailback: int,
+        lack: int,
+    ) -> None:
+        """
+        Records the event of one machine in one minute.
+
+        Args:
+            time (int): The simulation time.
+            machine (int): The code of the machine, as returned by ``register``.
+            state (int): The id of the state of the machine.
+            set_speed (float): The speed the machine was set to.
+            actual_speed (float): The number of parts the machine produced.
+            count (float): The total number of parts the machine produced.
+            tailback (int): Whether there is a tailback.
+            lack (int): Whether there is a lack of parts.
+        """
+        row = self.row
+        if row == self.capacity:
+            self.new_chunk()
+            row = 0
+        self.time[row] = time
+        self.machine[row] = machine
+        self.state[row] = state
+        self.set_speed[row] = set_speed
+        self.actual_speed[row] = actual_speed
+        self.count[row] = count
+        self.tailback[row] = tailback
+        self.lack[row] = lack
+        self.sim[row] = self.simulation
+        self.row = row + 1
+        self.size += 1
+
+    def record_span(
+        self,
+        start: int,
+        stop: int,
+        machine: int,
+        state: int,
+        set_speed: float,
+        actual_speed: float,
+        count: float,
+        tailback: int,
+        lack: int,
+    ) -> None:
+        """
+        Records the same event of one machine for every minute from start up to stop, see
+        ``record``. Later events of other machines come after these rows until the columns
+        are read.
+        """
+        time = start
+        while time < stop:
+            if self.row == self.capacity:
+                self.new_chunk()
+            n = min(stop - time, self.capacity - self.row)
+            rows = slice(self.row, self.row + n)
+            self.time[rows] = np.arange(time, time + n)
+            self.machine[rows] = machine
+            self.state[rows] = state
+            self.set_speed[rows] = set_speed
+            self.actual_speed[rows] = actual_speed
+            self.count[rows] = count
+            self.tailback[rows] = tailback
+            self.lack[rows] = lack
+            self.sim[rows] = self.simulation
+            self.row += n
+            self.size += n
+            time += n
+        self.in_order = False
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """
+        Returns the recorded columns, trimmed to the number of events.
+
+        Multiple chunks are joined into a single chunk once, after which the columns are views
+        on the arrays of the log. If spans were recorded, the events are sorted by time and
+        machine code, which is the order in which the machines of a line act in a minute.
+        """
+        if len(self.chunks) > 1 or not self.in_order:
+            joined = {
+                name: np.concatenate(
+                    [chunk[name] for chunk in self.chunks[:-1]]
+                    + [self.chunks[-1][name][: self.row]]
+                )
+                for name in self.COLUMNS
+            }
+            if not self.in_order:
+                order = np.lexsort((joined["Machine"], joined["Time"]))
+                joined = {name: column[order] for name, column in joined.items()}
+                self.in_order = True
+            self.chunks = [joined]
+            self.bind(joined, self.size)
+        return {name: column[: self.size] for name, column in self.chunks[0].items()}
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Returns the log as a DataFrame without copying the columns. The machine codes become a
+        categorical column with the machine names.
+        """
+        columns = self.columns()
+        columns["Machine"] = pd.Categorical.from_codes(
+            columns["Machine"], categories=self.machines
+        )
+        return pd.DataFrame(columns, copy=False)
+
+    @classmethod
+    def concat(cls, logs: Iterable["EventLog"]) -> "EventLog":
+        """
+        Returns a single log with the events of the given logs, in the given order. The log
+        is of the type of the given logs, e.g. an AggregateLog for aggregated logs.
+
+        Args:
+            logs (Iterable[EventLog]): The logs to join, e.g. of several replications.
+        """
+        logs = list(logs)
+        if logs:
+            cls = type(logs[0])
+        result = cls()
+        parts = {name: [] for name in cls.COLUMNS}
+        for log in logs:
+            columns = log.columns()
+            codes = np.array(
+                [result.register(name) for name in log.machines], dtype=np.uint8
+            )
+            if len(codes):
+                columns["Machine"] = codes[columns["Machine"]]
+            for name, column in columns.items():
+                parts[name].append(column)
+        joined = {
+            name: np.concatenate(parts[name]) if logs else result.chunks[0][name][:0]
+            for name in cls.COLUMNS
+        }
+        result.chunks = [joined]
+        result.size = len(joined["Time"])
+        result.bind(joined, result.size)
+        return result
+
+
+class ReducedLog(EventLog):
+    """
+    The base of the logs with fewer rows than minutes, see AggregateLog and StateChangeLog.
+
+    Machines record every minute as for the EventLog, but only an open row per machine is
+    updated, which is written when the machine starts its next row. So the memory grows with
+    the number of rows and not with the number of minutes. The open rows are written when the
+    columns are read or the log is sent back from a worker process, i.e. after the run.
+    """
+
+    # Every row sums the minutes of a machine: the first minute, the number of minutes, the
+    # last state, the mean speeds, the last count and the minutes with a tailback or lack
+    COLUMNS: Dict[str, type] = {
+        "Time": np.int32,
+        "Machine": np.uint8,
+        "Minutes": np.int32,
+        "State": np.uint16,
+        "Set speed": np.float32,
+        "Actual speed": np.float32,
+        "Count": np.float64,
+        "Tailback": np.int32,
+        "Lack": np.int32,
+        "Simulation": np.int32,
+    }
+    CHUNK_SIZE = 4096
+
+    def __init__(self, simulation: int = 1, chunk_size: int = CHUNK_SIZE) -> None:
+        # The open row of every machine: its key, then the values of the columns
+        self.open: Dict[int, list] = {}
+        # The time and machine of the last row that was written
+        self.last = (-1, -1)
+        super().__init__(simulation, chunk_size)
+
+    def bind(self, chunk: Dict[str, np.ndarray], row: int) -> None:
+        self.row = row
+        self.capacity = len(chunk["Time"])
+        self.chunk = list(chunk.values())
+
+    def add(
+        self,
+        key: int,
+        start: int,
+        minutes: int,
+        machine: int,
+        state: int,
+        set_speed: float,
+        actual_speed: float,
+        count: float,
+        tailback: int,
+        lack: int,
+    ) -> None:
+        """
+        Adds the same event of a machine for a number of minutes to its open row, after
+        writing the open row and starting a new one at ``start`` if the key changes.
+        """
+        row = self.open.get(machine)
+        if row is None or row[0] != key:
+            if row is not None:
+                self.write(machine, row)
+            row = self.open[machine] = [key, start, 0, state, 0.0, 0.0, count, 0, 0]
+        row[2] += minutes
+        row[3] = state
+        row[4] += minutes * set_speed
+        row[5] += minutes * actual_speed
+        row[6] = count
+        row[7] += minutes * tailback
+        row[8] += minutes * lack
+
+    def write(self, machine: int, row: list) -> None:
+        """
+        Writes an open row of a machine to the columns.
+        """
+        _, start, minutes, state, set_speed, actual_speed, count, tailback, lack = row
+        if self.row == self.capacity:
+            self.new_chunk()
+        values = (
+            start,
+            machine,
+            minutes,
+            state,
+            set_speed / minutes,
+            actual_speed / minutes,
+            count,
+            tailback,
+            lack,
+            self.simulation,
+        )
+        for column, value in zip(self.chunk, values):
+            column[self.row] = value
+        if (start, machine) < self.last:
+            self.in_order = False
+        self.last = (start, machine)
+        self.row += 1
+        self.size += 1
+
+    def close(self) -> None:
+        """
+        Writes the open rows of all machines.
+        """
+        for machine in sorted(self.open):
+            self.write(machine, self.open[machine])
+        self.open = {}
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """
+        Returns the recorded columns after writing the open rows, in the order of time and
+        machine, see EventLog.columns.
+        """
+        self.close()
+        return super().columns()
+
+    def __getstate__(self):
+        # Only the written rows are sent back from worker processes
+        self.close()
+        return self.__dict__
+
+
+class AggregateLog(ReducedLog):
+    """
+    This class records the events of every machine per interval of ``interval`` minutes: a
+    row per machine and interval, with the start of the interval as the time.
+
+    Spans that cross intervals are split at the interval boundaries. The last interval of a
+    run may be shorter, see the column "Minutes".
+    """
+
+    def __init__(
+        self, interval: int = 60, simulation: int = 1, chunk_size: int = ReducedLog.CHUNK_SIZE
+    ) -> None:
+        """
+        Args:
+            interval (int): The number of minutes per row.
+            simulation (int): The simulation index that is written with every row.
+            chunk_size (int): The number of rows that is allocated at once.
+
+        Raises:
+            ValueError: If the interval is not a positive number of minutes.
+        """
+        if interval < 1:
+            raise ValueError(f"The interval must be at least 1 minute, not {interval}")
+        self.interval = interval
+        super().__init__(simulation, chunk_size)
+
+    def record(
+        self,
+        time: int,
+        machine: int,
+        state: int,
+        set_speed: float,
+        actual_speed: float,
+        count: float,
+        tailback: int,
+        lack: int,
+    ) -> None:
+        """
+        Adds the event of one machine in one minute to its interval, see EventLog.record.
+        """
+        start = time - time % self.interval
+        self.add(start, start, 1, machine, state, set_speed, actual_speed, count, tailback, lack)
+
+    def record_span(
+        self,
+        start: int,
+        stop: int,
+        machine: int,
+        state: int,
+        set_speed: float,
+        actual_speed: float,
+        count: float,
+        tailback: int,
+        lack: int,
+    ) -> None:
+        """
+        Adds the same event for every minute from start up to stop to the intervals, see
+        EventLog.record_span.
+        """
+        time = start
+        while time < stop:
+            interval_start = time - time % self.interval
+            end = min(stop, interval_start + self.interval)
+            self.add(
+                interval_start,
+                interval_start,
+                end - time,
+                machine,
+                state,
+                set_speed,
+                actual_speed,
+                count,
+                tailback,
+                lack,
+            )
+            time = end
+
+
+class StateChangeLog(ReducedLog):
+    """
+    This class records the runs of the states of every machine: a row per machine each time its
+    state changes, with the first minute of the state as the time and the minutes in the state.
+    A switch to the state the machine is already in does not start a new row.
+    """
+
+    def record(
+        self,
+        time: int,
+        machine: int,
+        state: int,
+        set_speed: float,
+        actual_speed: float,
+        count: float,
+        tailback: int,
+        lack: int,
+    ) -> None:
+        """
+        Adds the event of one machine in one minute to the run of its state, see EventLog.record.
+        """
+        self.add(state, time, 1, machine, state, set_speed, actual_speed, count, tailback, lack)
+
+    def record_span(
+        self,
+        start: int,
+        stop: int,
+        machine: int,
+        state: int,
+        set_speed: float,
+        actual_speed: float,
+        count: float,
+        tailback: int,
+        lack: int,
+    ) -> None:
+        """
+        Adds the same event for every minute from start up to stop to the run of its state,
+        see EventLog.record_span.
+        """
+        self.add(
+            state, start, stop - start, machine, state, set_speed, actual_speed, count, tailback, lack
+        )
@@ -0,0 +1,433 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from machineconfig import MachineConfig, randomGenerator
+from sampler import AliasSampler, Distribution
+from topology import DEFAULT_TOPOLOGY, Topology
+from vectorized import (
+    DEFAULT_BUFFERS,
+    DEFAULT_MACHINES,
+    RUN_TIME,
+    VectorizedResult,
+    run_vectorized,
+)
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def jit(function):
+    """
+    Compiles the function in nopython mode if numba is installed, and leaves it a Python
+    function otherwise, in which form it runs the same but slowly.
+    """
+    return njit(cache=True)(function) if njit is not None else function
+
+
+# The kinds of generators that the kernel can draw from
+CONSTANT, ALIAS, EXPON, LOGNORM, BETA, T, PARETO, NORM, UNIFORM = range(9)
+
+# The distributions of Distribution that the kernel can draw from, with their parameters in
+# the order of the table: loc and scale first, then the shape parameters
+PARAMETERS = {
+    "expon": (EXPON, ()),
+    "lognorm": (LOGNORM, ("s",)),
+    "beta": (BETA, ("a", "b")),
+    "t": (T, ("df",)),
+    "pareto": (PARETO, ("b",)),
+    "norm": (NORM, ()),
+    "uniform": (UNIFORM, ()),
+}
+
+
+@dataclass
+class CompiledLine:
+    """
+    The line in the form of flat arrays for the kernel. Every speed, duration and transition
+    distribution is a generator g with a kind, up to four parameters and, for alias tables,
+    the slice offset[g]:offset[g] + length[g] of the alias arrays. States are state indices
+    as in CompiledMachineConfig, padded with -1 up to the largest number of states.
+    """
+
+    machine_names: List[str]
+    buffer_names: List[str]
+    initial_state: np.ndarray
+    in_buffer: np.ndarray
+    out_buffer: np.ndarray
+    max_capacity: np.ndarray
+    initial_levels: np.ndarray
+    # The state ID and the speed, duration and transition generator per (machine, state)
+    state_ids: np.ndarray
+    speed: np.ndarray
+    duration: np.ndarray
+    transition: np.ndarray
+    # The generators
+    kind: np.ndarray
+    params: np.ndarray
+    offset: np.ndarray
+    length: np.ndarray
+    prob: np.ndarray
+    alias: np.ndarray
+    values: np.ndarray
+
+
+def compile_generator(
+    generator,
+) -> Optional[Tuple[int, List[float], Optional[AliasSampler]]]:
+    """
+    Returns the kind, the parameters and the alias table of a speed or duration generator or
+    of a transition sampler, or None if the kernel cannot draw from it.
+    """
+    if isinstance(generator, AliasSampler):
+        return ALIAS, [], generator
+    if not isinstance(generator, randomGenerator):
+        return None
+    if generator.constant:
+        return CONSTANT, [float(generator.value)], None
+    if generator.sampler is not None:
+        return ALIAS, [], generator.sampler
+    function = generator.function
+    if not isinstance(function, Distribution) or function.name not in PARAMETERS:
+        return None
+    kind, shapes = PARAMETERS[function.name]
+    kwargs = generator.kwargs
+    if any(shape not in kwargs for shape in shapes):
+        return None
+    params = [kwargs.get("loc", 0.0), kwargs.get("scale", 1.0)]
+    params += [kwargs[shape] for shape in shapes]
+    return kind, [float(param) for param in params], None
+
+
+def compile_line(
+    machines: List[Tuple[str, MachineConfig, int, int, int]] = DEFAULT_MACHINES,
+    buffers: List[Tuple[str, float, float]] = DEFAULT_BUFFERS,
+) -> Optional[CompiledLine]:
+    """
+    Returns the line in the form of the kernel, or None if a distribution is not supported.
+
+    Args:
+        machines (list): The machines as (name, configuration, initial state, buffer before, buffer after).
+        buffers (list): The buffers as (name, maximum capacity, current parts).
+    """
+    compiled = [machine[1].compiled for machine in machines]
+    n_states = max(len(config.ids) for config in compiled)
+    shape = (len(machines), n_states)
+    state_ids = np.full(shape, -1, dtype=np.int64)
+    tables = {"speed": np.full(shape, -1), "duration": np.full(shape, -1)}
+    tables["transition"] = np.full(shape, -1)
+    kind, params, offset, length = [], [], [], []
+    prob, alias, values = [], [], []
+
+    def add(generator, as_index: Optional[MachineConfig] = None) -> Optional[int]:
+        spec = compile_generator(generator)
+        if spec is None:
+            return None
+        kind.append(spec[0])
+        params.append(spec[1] + [0.0] * (4 - len(spec[1])))
+        offset.append(sum(len(table) for table in prob))
+        sampler = spec[2]
+        if sampler is None:
+            length.append(0)
+        else:
+            length.append(len(sampler.prob))
+            prob.append(sampler.prob)
+            alias.append(sampler.alias)
+            # Transitions draw the state index of the drawn state ID
+            drawn = np.asarray(sampler.population)
+            values.append(
+                as_index.index_of(drawn) if as_index is not None else drawn.astype(float)
+            )
+        return len(kind) - 1
+
+    for m, config in enumerate(compiled):
+        state_ids[m, : len(config.ids)] = config.ids
+        for s in range(len(config.ids)):
+            for name, generator, as_index in (
+                ("speed", config.speeds[s], None),
+                ("duration", config.durations[s], None),
+                ("transition", config.transition_samplers[s], config),
+            ):
+                g = add(generator, as_index)
+                if g is None:
+                    return None
+                tables[name][m, s] = g
+
+    return CompiledLine(
+        machine_names=[machine[0] for machine in machines],
+        buffer_names=[buffer[0] for buffer in buffers],
+        initial_state=np.array(
+            [
+                config.index_of(np.array([machine[2]]))[0]
+                for machine, config in zip(machines, compiled)
+            ]
+        ),
+        in_buffer=np.array([machine[3] for machine in machines]),
+        out_buffer=np.array([machine[4] for machine in machines]),
+        max_capacity=np.array([buffer[1] for buffer in buffers], dtype=float),
+        initial_levels=np.array([buffer[2] for buffer in buffers], dtype=float),
+        state_ids=state_ids,
+        speed=tables["speed"],
+        duration=tables["duration"],
+        transition=tables["transition"],
+        kind=np.array(kind, dtype=np.int64),
+        params=np.array(params, dtype=float),
+        offset=np.array(offset, dtype=np.int64),
+        length=np.array(length, dtype=np.int64),
+        prob=np.concatenate(prob) if prob else np.zeros(0),
+        alias=np.concatenate(alias).astype(np.int64) if alias else np.zeros(0, dtype=np.int64),
+        values=np.concatenate(values).astype(float) if values else np.zeros(0),
+    )
+
+
+@jit
+def simulate(
+    seed,
+    run_time,
+    initial_state,
+    in_buffer,
+    out_buffer,
+    max_capacity,
+    initial_levels,
+    speed,
+    duration,
+    transition,
+    kind,
+    params,
+    offset,
+    length,
+    prob,
+    alias,
+    values,
+    count,
+    idle_parts,
+    levels,
+    record,
+    history_state,
+    history_speed,
+    history_actual,
+    history_tailback,
+    history_lack,
+    state_ids,
+):
+    """
+    Runs every replication of the line until the given time, one after the other, with the
+    same rules as Machine.produce, Buffer.get_parts and Buffer.put_parts. The counts, idle
+    parts and final levels are written into the given arrays of shape (replications, machines)
+    and (replications, buffers), and the history into the arrays of shape
+    (time, replications, machines) if record is set.
+    """
+
+    def draw(g):
+        # Draws a value from generator g, in the same way as the NumPy draws of sampler.py.
+        # As a closure it is inlined without passing the arrays of the generators.
+        k = kind[g]
+        loc = params[g, 0]
+        scale = params[g, 1]
+        if k == CONSTANT:
+            return loc
+        if k == ALIAS:
+            n = length[g]
+            x = np.random.random() * n
+            column = min(int(x), n - 1)
+            if x - column < prob[offset[g] + column]:
+                return values[offset[g] + column]
+            return values[offset[g] + alias[offset[g] + column]]
+        if k == EXPON:
+            return loc + np.random.exponential(scale)
+        if k == LOGNORM:
+            return loc + np.random.lognormal(np.log(scale), params[g, 2])
+        if k == BETA:
+            return loc + scale * np.random.beta(params[g, 2], params[g, 3])
+        if k == T:
+            return loc + scale * np.random.standard_t(params[g, 2])
+        if k == PARETO:
+            return loc + scale * (np.random.pareto(params[g, 2]) + 1.0)
+        if k == NORM:
+            return np.random.normal(loc, scale)
+        return loc + scale * np.random.random()
+
+    np.random.seed(seed)
+    replications, n_machines = count.shape
+    state = np.empty(n_machines, dtype=np.int64)
+    switch_time = np.empty(n_machines, dtype=np.int64)
+    tailback = np.zeros(n_machines, dtype=np.bool_)
+    lack = np.zeros(n_machines, dtype=np.bool_)
+    for r in range(replications):
+        level = levels[r]
+        level[:] = initial_levels
+        for m in range(n_machines):
+            state[m] = initial_state[m]
+            tailback[m] = False
+            lack[m] = False
+            switch_time[m] = int(draw(duration[m, state[m]]))
+        for t in range(run_time):
+            for m in range(n_machines):
+                # Machine.get_speed: no new speed is drawn after a tailback or lack
+                pspeed = 0.0
+                if not (tailback[m] or lack[m]):
+                    pspeed = draw(speed[m, state[m]])
+                # Buffer.get_parts on the buffer before
+                in_q = in_buffer[m]
+                start_producing = min(pspeed, level[in_q])
+                level[in_q] -= start_producing
+                lack[m] = start_producing < pspeed and pspeed != 0
+                # Buffer.put_parts on the buffer after
+                out_q = out_buffer[m]
+                success_produced = min(start_producing, max_capacity[out_q] - level[out_q])
+                level[out_q] += success_produced
+                tailback[m] = success_produced < pspeed and not lack[m]
+                if tailback[m]:
+                    pspeed = 0.0
+                    idle_parts[r, m] += start_producing - success_produced
+                count[r, m] += success_produced
+                # Switch state when the machine has been in its state for the given time
+                if t == switch_time[m]:
+                    state[m] = int(draw(transition[m, state[m]]))
+                    switch_time[m] = t + int(draw(duration[m, state[m]]))
+                if record:
+                    history_state[t, r, m] = state_ids[m, state[m]]
+                    history_speed[t, r, m] = pspeed
+                    history_actual[t, r, m] = success_produced
+                    history_tailback[t, r, m] = tailback[m]
+                    history_lack[t, r, m] = lack[m]
+
+
+def run_compiled(
+    replications: int,
+    run_time: int = RUN_TIME,
+    record: bool = False,
+    seed: Optional[int] = None,
+    topology: Topology = DEFAULT_TOPOLOGY,
+    fallback: bool = True,
+) -> VectorizedResult:
+    """
+    Runs the given number of replications of a line with the compiled kernel, or with the
+    NumPy engine of vectorized.py if numba is not installed or a distribution of the line
+    is not supported by the kernel.
+
+    Args:
+        replications (int): The number of replications.
+        run_time (int): The time until which the simulation runs.
+        record (bool): Whether to keep the per-minute history of every machine.
+        seed (int): The seed of the run, fresh entropy is used if none is given.
+        topology (Topology): The layout of the line, see topology.py.
+        fallback (bool): Whether to fall back to the NumPy engine. If not, the kernel runs as
+            Python code without numba, which is only useful to check it on a few replications.
+
+    Returns:
+        VectorizedResult: The outcome of the run, as of run_vectorized.
+
+    Raises:
+        ValueError: If the kernel cannot draw from a distribution of the line and fallback
+            is not set.
+    """
+    machines = topology.compiled.machines()
+    buffers = topology.compiled.buffers()
+    line = compile_line(machines, buffers)
+    if fallback and (njit is None or line is None):
+        return run_vectorized(replications, run_time, record, seed, topology)
+    if line is None:
+        raise ValueError("The line has a distribution that the compiled kernel cannot draw from")
+    if seed is None:
+        seed = int(np.random.SeedSequence().generate_state(1)[0])
+    shape = (replications, len(line.machine_names))
+    count = np.zeros(shape)
+    idle_parts = np.zeros(shape)
+    levels = np.zeros((replications, len(line.buffer_names)))
+    history_shape = (run_time, replications, len(line.machine_names)) if record else (0, 0, 0)
+    history = {
+        "state": np.zeros(history_shape, dtype=np.int32),
+        "set_speed": np.zeros(history_shape, dtype=np.float32),
+        "actual_speed": np.zeros(history_shape, dtype=np.float32),
+        "tailback": np.zeros(history_shape, dtype=bool),
+        "lack": np.zeros(history_shape, dtype=bool),
+    }
+    simulate(
+        seed % 2**32,
+        run_time,
+        line.initial_state,
+        line.in_buffer,
+        line.out_buffer,
+        line.max_capacity,
+        line.initial_levels,
+        line.speed,
+        line.duration,
+        line.transition,
+        line.kind,
+        line.params,
+        line.offset,
+        line.length,
+        line.prob,
+        line.alias,
+        line.values,
+        count,
+        idle_parts,
+        levels,
+        record,
+        history["state"],
+        history["set_speed"],
+        history["actual_speed"],
+        history["tailback"],
+        history["lack"],
+        line.state_ids,
+    )
+    return VectorizedResult(
+        line.machine_names,
+        line.buffer_names,
+        count,
+        idle_parts,
+        levels,
+        history if record else {},
+    )
+
+
+def crosscheck(
+    replications: int = 400,
+    seed: int = 0,
+    workers: Optional[int] = None,
+    fallback: bool = True,
+    topology: Topology = DEFAULT_TOPOLOGY,
+) -> pd.DataFrame:
+    """
+    Compares the mean count of every machine of the kernel with that of the simpy engine over
+    independent replications. The engines draw different random values, so the means only
+    agree within their standard errors.
+
+    Args:
+        replications (int): The number of replications of each engine.
+        seed (int): The seed of both engines.
+        workers (int): The number of worker processes of the simpy engine.
+        fallback (bool): Whether the kernel may fall back to the NumPy engine, see run_compiled.
+        topology (Topology): The layout of the line, see topology.py.
+
+    Returns:
+        pd.DataFrame: Per machine the mean count and its standard error of both engines, and
+            the difference in standard errors ("z"), which is rarely above 3 in absolute value.
+    """
+    from simulation import map_replications
+
+    recorders = list(
+        map_replications(replications, workers, seed, "stats", topology=topology)
+    )
+    simpy_counts = np.array(
+        [[machine.count for machine in recorder.machines] for recorder in recorders]
+    )
+    kernel_counts = run_compiled(
+        replications, seed=seed, topology=topology, fallback=fallback
+    ).count
+    frame = pd.DataFrame(
+        {
+            "Machine": [machine.name for machine in recorders[0].machines],
+            "Mean simpy": simpy_counts.mean(axis=0),
+            "SE simpy": simpy_counts.std(axis=0, ddof=1) / np.sqrt(replications),
+            "Mean kernel": kernel_counts.mean(axis=0),
+            "SE kernel": kernel_counts.std(axis=0, ddof=1) / np.sqrt(replications),
+        }
+    )
+    frame["z"] = (frame["Mean kernel"] - frame["Mean simpy"]) / np.sqrt(
+        frame["SE simpy"] ** 2 + frame["SE kernel"] ** 2
+    )
+    return frame
@@ -0,0 +1,221 @@
+import os
+import numpy as np
+import pandas as pd
+from typing import List, Optional, Sequence, Type
+from eventlog import EventLog
+
+
+def import_pyarrow():
+    """
+    Imports pyarrow, which is only needed to write and read streamed logs.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+    """
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as error:
+        raise ImportError(
+            "Writing Parquet or Arrow logs requires pyarrow, install it with: pip install pyarrow"
+        ) from error
+    return pyarrow
+
+
+class LogWriter:
+    """
+    This class streams the event logs of finished replications to disk while the run continues.
+
+    Logs are collected until ``flush_every`` replications are written and then flushed as one
+    Parquet row group or Arrow IPC record batch, so memory stays flat for any number of
+    replications. With ``partition_by_replication`` every replication is written to its own file
+    in a ``Simulation=<index>`` directory, so readers can load a subset of the replications.
+    """
+
+    FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+    def __init__(
+        self,
+        path: str,
+        format: str = "parquet",
+        flush_every: int = 1,
+        partition_by_replication: bool = False,
+        log_type: Type[EventLog] = EventLog,
+    ) -> None:
+        """
+        Args:
+            path (str): The file to write to, or the directory if partitioned by replication.
+            format (str): Either "parquet" or "arrow" (Arrow IPC file).
+            flush_every (int): The number of replications that is collected before flushing.
+            partition_by_replication (bool): Whether to write each replication to its own file.
+            log_type (type): The type of the logs that are written, which defines the columns,
+                e.g. eventlog.AggregateLog for aggregated logs.
+        """
+        if format not in self.FORMATS:
+            raise ValueError(f"Unknown log format {format}, use one of {list(self.FORMATS)}")
+        self.pa = import_pyarrow()
+        self.path = path
+        self.format = format
+        self.flush_every = flush_every
+        self.partition_by_replication = partition_by_replication
+        self.log_type = log_type
+        self.machines: List[str] = []
+        self.pending: List[EventLog] = []
+        self.writer = None
+        self.schema = self.pa.schema(
+            [
+                (name, self.pa.dictionary(self.pa.uint8(), self.pa.string()))
+                if name == "Machine"
+                else (name, self.pa.from_numpy_dtype(np.dtype(dtype)))
+                for name, dtype in log_type.COLUMNS.items()
+            ]
+        )
+        if partition_by_replication:
+            os.makedirs(path, exist_ok=True)
+
+    def __enter__(self) -> "LogWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write(self, event_log: EventLog) -> None:
+        """
+        Adds the log of a finished replication, flushing when ``flush_every`` logs are collected.
+
+        Args:
+            event_log (EventLog): The log to write.
+
+        Raises:
+            ValueError: If the log is not of the log type of the writer, whose columns differ.
+        """
+        if type(event_log) is not self.log_type:
+            raise ValueError(
+                f"Cannot write a {type(event_log).__name__} with a writer of {self.log_type.__name__}, pass log_type={type(event_log).__name__}"
+            )
+        self.pending.append(event_log)
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes the collected logs to disk.
+        """
+        if not self.pending:
+            return
+        if self.partition_by_replication:
+            for event_log in self.pending:
+                self.write_file(self.partition_path(event_log.simulation), [event_log])
+        else:
+            if self.writer is None:
+                self.writer = self.open(self.path)
+            self.write_batch(self.writer, self.pending)
+        self.pending = []
+
+    def close(self) -> None:
+        """
+        Flushes the remaining logs and closes the file.
+        """
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def partition_path(self, simulation: int) -> str:
+        """
+        Returns the file that the replication with the given simulation index is written to.
+        """
+        directory = os.path.join(self.path, f"Simulation={simulation}")
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, "part-0" + self.FORMATS[self.format])
+
+    def open(self, path: str):
+        """
+        Opens a Parquet or Arrow IPC writer on the given file.
+        """
+        if self.format == "parquet":
+            return self.pa.parquet.ParquetWriter(path, self.schema)
+        options = self.pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+        return self.pa.ipc.new_file(path, self.schema, options=options)
+
+    def write_file(self, path: str, event_logs: Sequence[EventLog]) -> None:
+        """
+        Writes the given logs to a file of their own.
+        """
+        writer = self.open(path)
+        self.write_batch(writer, event_logs)
+        writer.close()
+
+    def write_batch(self, writer, event_logs: Sequence[EventLog]) -> None:
+        """
+        Writes the given logs as one row group or record batch.
+        """
+        joined = self.log_type.concat(event_logs)
+        columns = joined.columns()
+        # Map the machine codes onto the names known to this writer, so the dictionary only grows
+        codes = np.array(
+            [self.register(name) for name in joined.machines], dtype=np.uint8
+        )
+        if len(codes):
+            columns["Machine"] = codes[columns["Machine"]]
+        arrays = [
+            self.pa.DictionaryArray.from_arrays(
+                columns["Machine"], self.pa.array(self.machines, self.pa.string())
+            )
+            if name == "Machine"
+            else self.pa.array(columns[name])
+            for name in self.log_type.COLUMNS
+        ]
+        batch = self.pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+        if self.format == "parquet":
+            writer.write_batch(batch)
+        else:
+            writer.write(batch)
+
+    def register(self, name: str) -> int:
+        """
+        Returns the dictionary code of the machine with the given name, adding it if it is new.
+        """
+        if name not in self.machines:
+            self.machines.append(name)
+        return self.machines.index(name)
+
+
+def read_log(
+    path: str,
+    format: str = "parquet",
+    simulations: Optional[Sequence[int]] = None,
+    log_type: Type[EventLog] = EventLog,
+) -> pd.DataFrame:
+    """
+    Reads a log that was written by a LogWriter.
+
+    Args:
+        path (str): The file, or the directory of a log that is partitioned by replication.
+        format (str): Either "parquet" or "arrow".
+        simulations (Sequence[int]): The simulation indices to load, all if none are given.
+            For partitioned logs only the files of these replications are read.
+        log_type (type): The type of the logs that were written, see LogWriter.
+
+    Returns:
+        pd.DataFrame: The log with the same columns as the to_frame of the log type.
+    """
+    pa = import_pyarrow()
+    import pyarrow.dataset as ds
+
+    if os.path.isdir(path):
+        dataset = ds.dataset(
+            path,
+            format="ipc" if format == "arrow" else format,
+            partitioning=ds.partitioning(
+                pa.schema([("Simulation", pa.int32())]), flavor="hive"
+            ),
+        )
+    else:
+        dataset = ds.dataset(path, format="ipc" if format == "arrow" else format)
+    filter = None
+    if simulations is not None:
+        filter = ds.field("Simulation").isin(list(simulations))
+    table = dataset.to_table(filter=filter)
+    return table.select(list(log_type.COLUMNS)).to_pandas()
@@ -0,0 +1,837 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+# The maximum capacity of all buffers combined
+MAXIMUM_CAPACITY_ALL_BUFFERS = 50000
+
+# The value of a product that is left in a buffer at the end of a window of a rolling horizon,
+# relative to a product of the output. Below 1, so that the output still comes first
+TERMINAL_VALUE = 0.9
+
+
+class ConstraintRows:
+    """
+    This class collects constraint rows as COO triplets. A block of rows is added at once,
+    as columns with a coefficient that are aligned with the rows of the block.
+    """
+
+    def __init__(self) -> None:
+        self.rows: List[np.ndarray] = []
+        self.cols: List[np.ndarray] = []
+        self.vals: List[np.ndarray] = []
+        self.rhs: List[np.ndarray] = []
+        self.size = 0
+
+    def add(self, terms: List[Tuple[np.ndarray, float]], rhs) -> slice:
+        """
+        Adds a block of rows: row r of the block is sum(coef * x[cols[r]]) (<= or =) rhs[r].
+
+        Args:
+            terms (list): The (column indices, coefficient) pairs. Every index array has the
+                length of the block, or has shape (length of the block, k) to add k columns
+                with the same coefficient to every row.
+            rhs: The right-hand side of every row, or a single value for all rows.
+
+        Returns:
+            slice: The rows of the block.
+        """
+        m = len(terms[0][0])
+        rows = np.arange(self.size, self.size + m)
+        for cols, coef in terms:
+            cols = np.asarray(cols)
+            row_of = rows if cols.ndim == 1 else np.repeat(rows, cols.shape[1])
+            self.rows.append(row_of)
+            self.cols.append(cols.ravel())
+            self.vals.append(np.broadcast_to(np.asarray(coef, dtype=float), cols.shape).ravel())
+        self.rhs.append(np.broadcast_to(np.asarray(rhs, dtype=float), (m,)))
+        self.size += m
+        return slice(self.size - m, self.size)
+
+    def matrix(self, n_vars: int) -> Tuple[sp.csr_matrix, np.ndarray]:
+        """
+        Returns the constraint matrix in CSR format and the right-hand side.
+        """
+        if not self.size:
+            return sp.csr_matrix((0, n_vars)), np.zeros(0)
+        matrix = sp.coo_matrix(
+            (np.concatenate(self.vals), (np.concatenate(self.rows), np.concatenate(self.cols))),
+            shape=(self.size, n_vars),
+        ).tocsr()
+        return matrix, np.concatenate(self.rhs)
+
+
+@dataclass
+class BufferLP:
+    """
+    The buffer sizing LP of LP_model.ipynb in matrix form: minimize c @ x subject to
+    A_ub @ x <= b_ub, A_eq @ x == b_eq and x >= 0.
+
+    Machines are numbered 1..7 (the stations of the line) and buffers 0..7, buffer j lies
+    between machine j and machine j+1. With several scenarios (simulations) the throughput and
+    buffer variables are indexed per scenario, while the maximum capacities are shared.
+    The variables are laid out per scenario block, followed by the capacities and the
+    objective variable of every scenario.
+    """
+
+    times: int
+    machines: int
+    buffers: int
+    scenarios: int
+    c: np.ndarray
+    A_ub: sp.csr_matrix
+    b_ub: np.ndarray
+    A_eq: sp.csr_matrix
+    b_eq: np.ndarray
+    ub_blocks: Dict[str, slice]
+    eq_blocks: Dict[str, slice]
+    build_time: float = 0.0
+
+    @property
+    def n_vars(self) -> int:
+        return len(self.c)
+
+    @property
+    def block(self) -> int:
+        """
+        The number of variables of one scenario.
+        """
+        return (self.machines + self.buffers) * self.times
+
+    def th(self, i, t, s=0):
+        """
+        Returns the column of the throughput of machine i (1..machines) at time t in scenario s.
+        """
+        return np.asarray(s) * self.block + (np.asarray(i) - 1) * self.times + np.asarray(t)
+
+    def buffer(self, j, t, s=0):
+        """
+        Returns the column of the amount of products in buffer j (0..buffers-1) at time t in scenario s.
+        """
+        return (
+            np.asarray(s) * self.block
+            + self.machines * self.times
+            + np.asarray(j) * self.times
+            + np.asarray(t)
+        )
+
+    def max_cap_buffer(self, j):
+        """
+        Returns the column of the maximum capacity of buffer j.
+        """
+        return self.scenarios * self.block + np.asarray(j)
+
+    def obj(self, s=0):
+        """
+        Returns the column of the objective variable of scenario s.
+        """
+        return self.scenarios * self.block + self.buffers + np.asarray(s)
+
+
+@dataclass
+class LPSolution:
+    """
+    The solution of a BufferLP.
+    """
+
+    status: str
+    objective: float
+    x: np.ndarray
+    # The duals of the inequality and equality rows, if the backend provides them
+    ineq_duals: Optional[np.ndarray] = None
+    eq_duals: Optional[np.ndarray] = None
+    solve_time: float = 0.0
+    info: Dict = field(default_factory=dict)
+
+    @property
+    def optimal(self) -> bool:
+        return self.status == "optimal"
+
+
+def build_buffer_lp(
+    pspeed: np.ndarray,
+    maximum_capacity_all_buffers: float = MAXIMUM_CAPACITY_ALL_BUFFERS,
+    capacities: Optional[np.ndarray] = None,
+    initial_levels: Optional[np.ndarray] = None,
+    block: int = 1,
+    terminal_value: float = 0.0,
+) -> BufferLP:
+    """
+    Builds the buffer sizing LP of LP_model.ipynb with vectorized index arithmetic instead of
+    one addConstr call per constraint.
+
+    For a single simulation this is the model of the notebook. For several simulations it is
+    one two-stage model: the maximum capacities are shared by all scenarios and the objective
+    is the mean over the scenarios of the products in the last buffer.
+
+    The constraints are those of the notebook, with one difference: the throughput of
+    machine i is balanced with the buffer after it (j = i) only, as in the formulation
+    th_i(t) = b_i(t) - b_i(t-1) + th_{i+1}(t). The notebook loops this constraint over all
+    buffers j, which ties every buffer to every machine.
+
+    Args:
+        pspeed (np.ndarray): The actual speed of every machine per minute, shape (machines, times),
+            or (scenarios, machines, times) for several simulations.
+        maximum_capacity_all_buffers (float): The maximum capacity of all buffers combined.
+        capacities (np.ndarray): Fixes the maximum capacity of the buffers between the machines
+            to these values, to evaluate a buffer design instead of optimizing it.
+        initial_levels (np.ndarray): Fixes the amount of products in the buffers between the
+            machines at time 0, shape (buffers between the machines,) or (scenarios, buffers
+            between the machines). Free if None, as in the notebook.
+        block (int): The number of minutes per time step, for speeds that are added up per
+            block of minutes (see aggregate_speeds). A machine can take the level of the buffer
+            before it once every minute, so this level is multiplied by the block.
+        terminal_value (float): The value of a product that is left in a buffer between the
+            machines at the last time, relative to a product of the output. Without it the
+            model runs the buffers down towards its end, see evaluate_capacities.
+
+    Returns:
+        BufferLP: The model.
+    """
+    begin = datetime.now()
+    if pspeed.ndim == 2:
+        pspeed = pspeed[None]
+    scenarios, machines, times = pspeed.shape
+    buffers = machines + 1
+    n_vars = scenarios * (machines + buffers) * times + buffers + scenarios
+    lp = BufferLP(
+        times, machines, buffers, scenarios, np.zeros(n_vars), None, None, None, None, {}, {}
+    )
+    last = machines
+    scenario = np.arange(scenarios)
+    ub = ConstraintRows()
+    eq = ConstraintRows()
+
+    def grid(first, t):
+        """
+        Returns flat arrays of scenarios, machines or buffers, and times for all combinations.
+        """
+        s, first, t = np.meshgrid(scenario, first, t, indexing="ij")
+        return s.ravel(), first.ravel(), t.ravel()
+
+    # THROUGHPUT LAST MACHINE 1: th_7(t) <= v_7(t)
+    s, i, t = grid([last], np.arange(times))
+    lp.ub_blocks["Throughput1_Machine"] = ub.add(
+        [(lp.th(i, t, s), 1.0)], pspeed[s, i - 1, t]
+    )
+    # THROUGHPUT LAST MACHINE 2: th_7(t) <= b_7(t)
+    lp.ub_blocks["Throughput2_Machine"] = ub.add(
+        [(lp.th(i, t, s), 1.0), (lp.buffer(i, t, s), -1.0)], 0.0
+    )
+    # AMOUNT LAST BUFFER: th_7(t) = b_7(t)
+    lp.eq_blocks["AmountBuffer_Machine"] = eq.add(
+        [(lp.th(i, t, s), 1.0), (lp.buffer(i, t, s), -1.0)], 0.0
+    )
+    # BUFFER MAX: b_j(t) <= k_j for the buffers between machines
+    s, j, t = grid(np.arange(1, last), np.arange(times))
+    lp.ub_blocks["Max_Single_Buffer"] = ub.add(
+        [(lp.buffer(j, t, s), 1.0), (lp.max_cap_buffer(j), -1.0)], 0.0
+    )
+    # AMOUNT BUFFERS 1: b_j(t) <= b_j(t-1) - th_{j+1}(t) + v_j(t)
+    s, j, t = grid(np.arange(1, last), np.arange(1, times))
+    lp.ub_blocks["Amount_Buffer_1"] = ub.add(
+        [
+            (lp.buffer(j, t, s), 1.0),
+            (lp.buffer(j, t - 1, s), -1.0),
+            (lp.th(j + 1, t, s), 1.0),
+        ],
+        pspeed[s, j - 1, t],
+    )
+    # AMOUNT BUFFERS 2: b_j(t) <= b_j(t-1) - th_{j+1}(t) + block * b_{j-1}(t-1)
+    lp.ub_blocks["Amount_Buffer_2"] = ub.add(
+        [
+            (lp.buffer(j, t, s), 1.0),
+            (lp.buffer(j, t - 1, s), -1.0),
+            (lp.th(j + 1, t, s), 1.0),
+            (lp.buffer(j - 1, t - 1, s), -float(block)),
+        ],
+        0.0,
+    )
+    # THROUGHPUT MACHINES: th_i(t) = b_i(t) - b_i(t-1) + th_{i+1}(t)
+    s, i, t = grid(np.arange(1, last), np.arange(1, times))
+    lp.eq_blocks["Throughput_Machine"] = eq.add(
+        [
+            (lp.th(i, t, s), 1.0),
+            (lp.buffer(i, t, s), -1.0),
+            (lp.buffer(i, t - 1, s), 1.0),
+            (lp.th(i + 1, t, s), -1.0),
+        ],
+        0.0,
+    )
+    # MAX TOTAL BUFFER
+    lp.ub_blocks["Max_Total_Buffer"] = ub.add(
+        [(lp.max_cap_buffer(np.arange(1, last))[None, :], 1.0)],
+        maximum_capacity_all_buffers,
+    )
+    # FIXED CAPACITY: k_j = capacity_j
+    if capacities is not None:
+        lp.eq_blocks["Fixed_Capacity"] = eq.add(
+            [(lp.max_cap_buffer(np.arange(1, last)), 1.0)], capacities
+        )
+    # INITIAL LEVEL: b_j(0) = level_j, per scenario
+    if initial_levels is not None:
+        s, j, t = grid(np.arange(1, last), [0])
+        levels = np.broadcast_to(initial_levels, (scenarios, last - 1))
+        lp.eq_blocks["Initial_Level"] = eq.add([(lp.buffer(j, t, s), 1.0)], levels[s, j - 1])
+    # OBJECTIVE FUNCTION CONSTRAINT: obj <= sum_t b_7(t), per scenario
+    lp.ub_blocks["obj_func_constraint"] = ub.add(
+        [
+            (lp.obj(scenario), 1.0),
+            (lp.buffer(last, np.arange(times)[None, :], scenario[:, None]), -1.0),
+        ],
+        0.0,
+    )
+    # OBJECTIVE FUNCTION: maximize the mean of obj over the scenarios
+    lp.c[lp.obj(scenario)] = -1.0 / scenarios
+    # TERMINAL VALUE: plus the mean value of the products left in the buffers at the end
+    if terminal_value:
+        lp.c[
+            lp.buffer(np.arange(1, last)[None, :], times - 1, scenario[:, None])
+        ] = -terminal_value / scenarios
+
+    lp.A_ub, lp.b_ub = ub.matrix(n_vars)
+    lp.A_eq, lp.b_eq = eq.matrix(n_vars)
+    lp.build_time = (datetime.now() - begin).total_seconds()
+    return lp
+
+
+def sample_scenarios(
+    replications: int, n: Optional[int] = None, seed: Optional[int] = None
+) -> np.ndarray:
+    """
+    Returns the sorted indices of n replications drawn without replacement, or all replications
+    if n is None or not smaller than the number of replications.
+    """
+    if n is None or n >= replications:
+        return np.arange(replications)
+    return np.sort(np.random.default_rng(seed).choice(replications, n, replace=False))
+
+
+def optimize_buffers_stochastic(
+    speeds: np.ndarray,
+    maximum_capacity_all_buffers: float = MAXIMUM_CAPACITY_ALL_BUFFERS,
+    scenarios: Optional[int] = None,
+    seed: Optional[int] = None,
+    backend: str = "highs",
+) -> pd.Series:
+    """
+    Solves a single buffer sizing LP over the simulations, with capacities that are shared by
+    all of them. Unlike the mean of the per-simulation optima of optimize_buffers, this gives a
+    buffer design that is feasible for every simulation and optimal on average.
+
+    Args:
+        speeds (np.ndarray): The actual speed per station, shape (time, station, replication),
+            as returned by simulation.run_station_speeds.
+        maximum_capacity_all_buffers (float): The maximum capacity of all buffers combined.
+        scenarios (int): The number of replications to sample as scenarios, all if None.
+        seed (int): The seed of the scenario sample.
+        backend (str): "highs" or "gurobi".
+
+    Returns:
+        pd.Series: The maximum capacity of the buffers between the machines, the objective,
+            the sampled simulations and the build and solve times.
+    """
+    chosen = sample_scenarios(speeds.shape[2], scenarios, seed)
+    lp = build_buffer_lp(
+        speeds[:, :, chosen].transpose(2, 1, 0).astype(float), maximum_capacity_all_buffers
+    )
+    solution = solve(lp, backend)
+    values = {
+        f"Buffer {j}": solution.x[lp.max_cap_buffer(j)] for j in range(1, lp.buffers - 1)
+    }
+    values["Objective"] = solution.objective
+    values["Simulations"] = list(chosen + 1)
+    values["Build time"] = lp.build_time
+    values["Solve time"] = solution.solve_time
+    return pd.Series(values)
+
+
+def solve(lp: BufferLP, backend: str = "highs") -> LPSolution:
+    """
+    Solves a BufferLP with HiGHS through scipy, or with Gurobi if it is installed and licensed.
+
+    Args:
+        lp (BufferLP): The model.
+        backend (str): "highs" or "gurobi".
+
+    Returns:
+        LPSolution: The solution, with the objective in the maximization sense of the model.
+    """
+    if backend == "highs":
+        return solve_highs(lp)
+    if backend == "gurobi":
+        return solve_gurobi(lp)
+    raise ValueError(f"Unknown LP backend {backend}, use 'highs' or 'gurobi'")
+
+
+def solve_highs(lp: BufferLP) -> LPSolution:
+    """
+    Solves a BufferLP with scipy.optimize.linprog(method="highs").
+    """
+    from scipy.optimize import linprog
+
+    begin = datetime.now()
+    result = linprog(
+        lp.c,
+        A_ub=lp.A_ub,
+        b_ub=lp.b_ub,
+        A_eq=lp.A_eq,
+        b_eq=lp.b_eq,
+        bounds=(0, None),
+        method="highs",
+    )
+    solve_time = (datetime.now() - begin).total_seconds()
+    status = {0: "optimal", 2: "infeasible", 3: "unbounded"}.get(result.status, "error")
+    if not result.success:
+        return LPSolution(
+            status,
+            np.nan,
+            np.full(lp.n_vars, np.nan),
+            solve_time=solve_time,
+            info={"message": result.message},
+        )
+    return LPSolution(
+        status,
+        -result.fun,
+        result.x,
+        # Duals of the maximization problem
+        ineq_duals=-result.ineqlin.marginals,
+        eq_duals=-result.eqlin.marginals,
+        solve_time=solve_time,
+        info={"message": result.message},
+    )
+
+
+def solve_gurobi(lp: BufferLP) -> LPSolution:
+    """
+    Solves a BufferLP with Gurobi, which needs gurobipy and a valid license.
+    """
+    try:
+        import gurobipy as grb
+    except ImportError as error:
+        raise ImportError(
+            "The gurobi backend requires gurobipy, install it with: pip install gurobipy"
+        ) from error
+
+    begin = datetime.now()
+    model = grb.Model()
+    model.Params.OutputFlag = 0
+    x = model.addMVar(lp.n_vars, lb=0.0)
+    model.setObjective(lp.c @ x, grb.GRB.MINIMIZE)
+    ineq = model.addMConstr(lp.A_ub, x, grb.GRB.LESS_EQUAL, lp.b_ub)
+    eq = model.addMConstr(lp.A_eq, x, grb.GRB.EQUAL, lp.b_eq)
+    model.optimize()
+    solve_time = (datetime.now() - begin).total_seconds()
+    if model.Status != grb.GRB.OPTIMAL:
+        status = "infeasible" if model.Status == grb.GRB.INFEASIBLE else "error"
+        return LPSolution(status, np.nan, np.full(lp.n_vars, np.nan), solve_time=solve_time)
+    return LPSolution(
+        "optimal",
+        -model.ObjVal,
+        x.X,
+        ineq_duals=-np.asarray(ineq.Pi),
+        eq_duals=-np.asarray(eq.Pi),
+        solve_time=solve_time,
+    )
+
+
+def optimize_buffers(
+    speeds: np.ndarray,
+    maximum_capacity_all_buffers: float = MAXIMUM_CAPACITY_ALL_BUFFERS,
+    backend: str = "highs",
+) -> pd.DataFrame:
+    """
+    Solves the buffer sizing LP for every simulation, like the loop in LP_model.ipynb.
+
+    Args:
+        speeds (np.ndarray): The actual speed per station, shape (time, station, replication),
+            as returned by simulation.run_station_speeds.
+        maximum_capacity_all_buffers (float): The maximum capacity of all buffers combined.
+        backend (str): "highs" or "gurobi".
+
+    Returns:
+        pd.DataFrame: Per simulation the optimal maximum capacity of the buffers between the
+            machines, the objective and the build and solve times.
+    """
+    opt_values = []
+    for sim in range(speeds.shape[2]):
+        lp = build_buffer_lp(speeds[:, :, sim].T.astype(float), maximum_capacity_all_buffers)
+        solution = solve(lp, backend)
+        values = {"Sim": sim + 1}
+        for j in range(1, lp.buffers - 1):
+            values[f"Buffer {j}"] = solution.x[lp.max_cap_buffer(j)]
+        values["Objective"] = solution.objective
+        values["Build time"] = lp.build_time
+        values["Solve time"] = solution.solve_time
+        opt_values.append(values)
+    return pd.DataFrame(opt_values)
+
+
+class WarmSolver:
+    """
+    This class keeps a BufferLP loaded in a solver, so that it can be re-solved after changing
+    the right-hand side of inequality rows, starting from the previous optimal basis.
+
+    The "highs" backend uses highspy when it is installed. Without highspy the model is
+    re-solved from scratch with scipy's HiGHS, which still skips rebuilding the matrices.
+    """
+
+    def __init__(self, lp: BufferLP, backend: str = "highs") -> None:
+        """
+        Args:
+            lp (BufferLP): The model, its b_ub is copied.
+            backend (str): "highs" or "gurobi".
+        """
+        self.lp = lp
+        self.b_ub = lp.b_ub.copy()
+        self.backend = backend
+        self.model = None
+        if backend == "gurobi":
+            self.load_gurobi()
+        elif backend == "highs":
+            try:
+                import highspy
+            except ImportError:
+                highspy = None
+            if highspy is not None:
+                self.load_highspy(highspy)
+        else:
+            raise ValueError(f"Unknown LP backend {backend}, use 'highs' or 'gurobi'")
+
+    def load_highspy(self, highspy) -> None:
+        """
+        Loads the model into a highspy.Highs instance, with the equality rows after the inequality rows.
+        """
+        lp = self.lp
+        matrix = sp.vstack([lp.A_ub, lp.A_eq]).tocsc()
+        model = highspy.HighsLp()
+        model.num_col_ = lp.n_vars
+        model.num_row_ = matrix.shape[0]
+        model.col_cost_ = lp.c
+        model.col_lower_ = np.zeros(lp.n_vars)
+        model.col_upper_ = np.full(lp.n_vars, highspy.kHighsInf)
+        model.row_lower_ = np.concatenate([np.full(len(lp.b_ub), -highspy.kHighsInf), lp.b_eq])
+        model.row_upper_ = np.concatenate([self.b_ub, lp.b_eq])
+        model.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+        model.a_matrix_.start_ = matrix.indptr
+        model.a_matrix_.index_ = matrix.indices
+        model.a_matrix_.value_ = matrix.data
+        self.highspy = highspy
+        self.model = highspy.Highs()
+        self.model.setOptionValue("output_flag", False)
+        self.model.passModel(model)
+
+    def load_gurobi(self) -> None:
+        """
+        Loads the model into a Gurobi model.
+        """
+        try:
+            import gurobipy as grb
+        except ImportError as error:
+            raise ImportError(
+                "The gurobi backend requires gurobipy, install it with: pip install gurobipy"
+            ) from error
+        lp = self.lp
+        self.grb = grb
+        self.model = grb.Model()
+        self.model.Params.OutputFlag = 0
+        self.x = self.model.addMVar(lp.n_vars, lb=0.0)
+        self.model.setObjective(lp.c @ self.x, grb.GRB.MINIMIZE)
+        self.ineq = self.model.addMConstr(lp.A_ub, self.x, grb.GRB.LESS_EQUAL, self.b_ub)
+        self.eq = self.model.addMConstr(lp.A_eq, self.x, grb.GRB.EQUAL, lp.b_eq)
+
+    def set_rhs(self, row: int, value: float) -> None:
+        """
+        Changes the right-hand side of inequality row ``row`` to ``value``.
+        """
+        self.b_ub[row] = value
+        if self.backend == "gurobi":
+            self.ineq[row].RHS = value
+        elif self.model is not None:
+            self.model.changeRowBounds(row, -self.highspy.kHighsInf, value)
+
+    def solve(self) -> LPSolution:
+        """
+        Solves the model with the current right-hand sides, from the last basis if possible.
+        """
+        if self.backend == "gurobi":
+            return self.solve_gurobi()
+        if self.model is not None:
+            return self.solve_highspy()
+        self.lp.b_ub, b_ub = self.b_ub, self.lp.b_ub
+        try:
+            return solve_highs(self.lp)
+        finally:
+            self.lp.b_ub = b_ub
+
+    def solve_highspy(self) -> LPSolution:
+        begin = datetime.now()
+        self.model.run()
+        solve_time = (datetime.now() - begin).total_seconds()
+        info = {"iterations": self.model.getInfo().simplex_iteration_count}
+        if self.model.getModelStatus() != self.highspy.HighsModelStatus.kOptimal:
+            status = self.model.modelStatusToString(self.model.getModelStatus())
+            return LPSolution(
+                status.lower(), np.nan, np.full(self.lp.n_vars, np.nan), solve_time=solve_time, info=info
+            )
+        solution = self.model.getSolution()
+        row_dual = -np.asarray(solution.row_dual)
+        rows = len(self.b_ub)
+        return LPSolution(
+            "optimal",
+            -self.model.getInfo().objective_function_value,
+            np.asarray(solution.col_value),
+            ineq_duals=row_dual[:rows],
+            eq_duals=row_dual[rows:],
+            solve_time=solve_time,
+            info=info,
+        )
+
+    def solve_gurobi(self) -> LPSolution:
+        grb = self.grb
+        begin = datetime.now()
+        self.model.optimize()
+        solve_time = (datetime.now() - begin).total_seconds()
+        info = {"iterations": self.model.IterCount}
+        if self.model.Status != grb.GRB.OPTIMAL:
+            return LPSolution("error", np.nan, np.full(self.lp.n_vars, np.nan), solve_time=solve_time, info=info)
+        return LPSolution(
+            "optimal",
+            -self.model.ObjVal,
+            self.x.X,
+            ineq_duals=-np.asarray(self.ineq.Pi),
+            eq_duals=-np.asarray(self.eq.Pi),
+            solve_time=solve_time,
+            info=info,
+        )
+
+
+def budget_frontier(
+    speeds: np.ndarray,
+    budgets,
+    scenarios: Optional[int] = None,
+    seed: Optional[int] = None,
+    backend: str = "highs",
+) -> pd.DataFrame:
+    """
+    Sweeps the maximum capacity of all buffers combined and re-solves the (stochastic) buffer LP
+    for every budget. The model is built once, only the right-hand side of the total buffer
+    constraint changes, and every solve starts from the basis of the previous one.
+
+    Args:
+        speeds (np.ndarray): The actual speed per station, shape (time, station, replication).
+        budgets: The total buffer capacities, in the order in which they are solved. An
+            increasing grid keeps the successive bases close.
+        scenarios (int): The number of replications to sample as scenarios, all if None.
+        seed (int): The seed of the scenario sample.
+        backend (str): "highs" or "gurobi".
+
+    Returns:
+        pd.DataFrame: Per budget the objective (mean output), the capacity of every buffer,
+            the dual of the budget (the gain per extra unit of total buffer space) and the dual
+            of every buffer's capacity (the gain per extra unit of that buffer alone).
+    """
+    budgets = list(budgets)
+    chosen = sample_scenarios(speeds.shape[2], scenarios, seed)
+    lp = build_buffer_lp(speeds[:, :, chosen].transpose(2, 1, 0).astype(float), budgets[0])
+    budget_row = lp.ub_blocks["Max_Total_Buffer"].start
+    max_single = lp.ub_blocks["Max_Single_Buffer"]
+    solver = WarmSolver(lp, backend)
+    frontier = []
+    for budget in budgets:
+        solver.set_rhs(budget_row, budget)
+        solution = solver.solve()
+        values = {"Budget": budget, "Objective": solution.objective}
+        for j in range(1, lp.buffers - 1):
+            values[f"Buffer {j}"] = solution.x[lp.max_cap_buffer(j)]
+        values["Dual budget"] = (
+            solution.ineq_duals[budget_row] if solution.ineq_duals is not None else np.nan
+        )
+        if solution.ineq_duals is not None:
+            # The rows of Max_Single_Buffer are ordered by scenario, buffer and time
+            duals = solution.ineq_duals[max_single].reshape(lp.scenarios, lp.buffers - 2, lp.times)
+            for j, dual in enumerate(duals.sum(axis=(0, 2)), start=1):
+                values[f"Dual buffer {j}"] = dual
+        values["Iterations"] = solution.info.get("iterations", np.nan)
+        values["Solve time"] = solution.solve_time
+        frontier.append(values)
+    return pd.DataFrame(frontier)
+
+
+def aggregate_speeds(pspeed: np.ndarray, block: int) -> np.ndarray:
+    """
+    Adds up the speeds of every ``block`` consecutive minutes, the last block may be shorter.
+
+    Args:
+        pspeed (np.ndarray): The speeds with time along the last axis, e.g. (machines, times)
+            or (scenarios, machines, times) as for build_buffer_lp.
+        block (int): The number of minutes per block.
+
+    Returns:
+        np.ndarray: The speeds per block, with ceil(times / block) along the last axis.
+    """
+    if block < 1:
+        raise ValueError(f"The block must be at least 1 minute, got {block}")
+    starts = np.arange(0, pspeed.shape[-1], block)
+    return np.add.reduceat(pspeed, starts, axis=-1)
+
+
+def evaluate_capacities(
+    pspeed: np.ndarray,
+    capacities: np.ndarray,
+    window: Optional[int] = None,
+    lookahead: Optional[int] = None,
+    backend: str = "highs",
+    terminal_value: float = TERMINAL_VALUE,
+) -> float:
+    """
+    Returns the mean output over the scenarios of the buffer LP with fixed capacities at the
+    resolution of the given speeds.
+
+    With a window the horizon is solved as a rolling horizon: one LP per window of ``window``
+    minutes, which starts with the buffer levels at the end of the previous window. Every
+    window is solved together with the ``lookahead`` minutes after it, and the products that
+    are left in the buffers at the end of the lookahead are valued with ``terminal_value``,
+    so that it does not empty the buffers at its end. Without that value every window is
+    free to leave the buffers empty for the next one, which lowered the output by over 20%
+    for windows of an hour. The model never holds more than one window and its lookahead.
+
+    Args:
+        pspeed (np.ndarray): The speeds, shape (machines, times) or (scenarios, machines, times).
+        capacities (np.ndarray): The capacity of every buffer between the machines.
+        window (int): The number of minutes per window, at least 2. The whole horizon if None.
+        lookahead (int): The number of minutes after every window that are solved with it,
+            defaults to the window.
+        backend (str): "highs" or "gurobi".
+        terminal_value (float): The value of a product left in a buffer at the end of every
+            window but the last, see build_buffer_lp.
+
+    Raises:
+        RuntimeError: If a window cannot be solved to optimality.
+    """
+    if pspeed.ndim == 2:
+        pspeed = pspeed[None]
+    scenarios, machines, times = pspeed.shape
+    capacities = np.asarray(capacities, dtype=float)
+    window = times if window is None else max(2, window)
+    lookahead = window if lookahead is None else lookahead
+    output = np.zeros(scenarios)
+    levels = None
+    start = 0
+    while True:
+        # Every window after the first repeats the last minute of the previous window at t = 0
+        stop = min(start + window, times)
+        last = min(stop + lookahead, times)
+        lp = build_buffer_lp(
+            pspeed[:, :, start:last],
+            capacities.sum(),
+            capacities,
+            levels,
+            terminal_value=terminal_value if last < times else 0.0,
+        )
+        solution = solve(lp, backend)
+        if not solution.optimal:
+            raise RuntimeError(
+                f"The window from minute {start} to {stop} is {solution.status}"
+            )
+        first = 0 if levels is None else 1
+        scenario = np.arange(scenarios)[:, None]
+        end = stop - start
+        output += solution.x[
+            lp.buffer(machines, np.arange(first, end)[None, :], scenario)
+        ].sum(axis=1)
+        if stop == times:
+            return output.mean()
+        levels = solution.x[lp.buffer(np.arange(1, machines)[None, :], end - 1, scenario)]
+        start = stop - 1
+
+
+def optimize_buffers_coarse(
+    speeds: np.ndarray,
+    block: int = 15,
+    maximum_capacity_all_buffers: float = MAXIMUM_CAPACITY_ALL_BUFFERS,
+    window: Optional[int] = None,
+    lookahead: Optional[int] = None,
+    exact: bool = False,
+    scenarios: Optional[int] = None,
+    seed: Optional[int] = None,
+    backend: str = "highs",
+) -> pd.Series:
+    """
+    Sizes the buffers on speeds that are aggregated into blocks of minutes, for horizons that
+    are too long for the per-minute LP, and checks the design at the resolution of the minutes.
+
+    The coarse LP has ``block`` times fewer variables. Its capacities are then fixed in the
+    per-minute LP, solved as a rolling horizon if a window is given, which gives the output
+    that the design reaches at the resolution of the minutes. With ``exact`` the per-minute LP
+    is also optimized as a whole, to report the gap of the coarse design. With a window the gap
+    is split into the gap of coarsening (the design over the whole horizon against the exact
+    LP) and the gap of the rolling horizon (the windows against the whole horizon).
+
+    Args:
+        speeds (np.ndarray): The actual speed per station, shape (time, station, replication),
+            as returned by simulation.run_station_speeds.
+        block (int): The number of minutes per block of the coarse LP.
+        maximum_capacity_all_buffers (float): The maximum capacity of all buffers combined.
+        window (int): The number of minutes per window of the refinement, see evaluate_capacities.
+        lookahead (int): The number of minutes after every window of the refinement.
+        exact (bool): Whether to solve the per-minute LP to compute the gap.
+        scenarios (int): The number of replications to sample as scenarios, all if None.
+        seed (int): The seed of the scenario sample.
+        backend (str): "highs" or "gurobi".
+
+    Returns:
+        pd.Series: The capacity of the buffers between the machines, the objective of the coarse
+            LP, the refined objective of its design, the exact objective, the relative gap and
+            its parts "Coarsening gap" and "Rolling gap" (NaN without ``exact``), and the solve
+            times.
+    """
+    chosen = sample_scenarios(speeds.shape[2], scenarios, seed)
+    pspeed = speeds[:, :, chosen].transpose(2, 1, 0).astype(float)
+
+    # COARSE LP
+    begin = datetime.now()
+    lp = build_buffer_lp(
+        aggregate_speeds(pspeed, block), maximum_capacity_all_buffers, block=block
+    )
+    solution = solve(lp, backend)
+    if not solution.optimal:
+        raise RuntimeError(f"The coarse LP is {solution.status}")
+    capacities = solution.x[lp.max_cap_buffer(np.arange(1, lp.buffers - 1))]
+    values = {f"Buffer {j}": capacity for j, capacity in enumerate(capacities, start=1)}
+    values["Coarse objective"] = solution.objective
+    values["Coarse time"] = (datetime.now() - begin).total_seconds()
+
+    # REFINEMENT: the coarse design at the resolution of the minutes
+    begin = datetime.now()
+    values["Refined objective"] = evaluate_capacities(
+        pspeed, capacities, window, lookahead, backend
+    )
+    values["Refine time"] = (datetime.now() - begin).total_seconds()
+
+    # EXACT: the per-minute LP, only to report the gap
+    values["Exact objective"] = np.nan
+    values["Gap"] = np.nan
+    values["Coarsening gap"] = np.nan
+    values["Rolling gap"] = np.nan
+    if exact:
+        begin = datetime.now()
+        solution = solve(build_buffer_lp(pspeed, maximum_capacity_all_buffers), backend)
+        values["Exact objective"] = solution.objective
+        values["Gap"] = 1 - values["Refined objective"] / solution.objective
+        # The design over the whole horizon, which the windows are compared with
+        whole = values["Refined objective"]
+        if window is not None:
+            whole = evaluate_capacities(pspeed, capacities, backend=backend)
+        values["Coarsening gap"] = 1 - whole / solution.objective
+        values["Rolling gap"] = 1 - values["Refined objective"] / whole
+        values["Exact time"] = (datetime.now() - begin).total_seconds()
+    values["Block"] = block
+    values["Window"] = window
+    values["Lookahead"] = lookahead
+    values["Simulations"] = list(chosen + 1)
+    return pd.Series(values)
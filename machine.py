@@ -1,10 +1,49 @@
 import numpy as np
 from dataclasses import dataclass
 import simpy
-from typing import Tuple
+from simpy.events import NORMAL, Timeout
+from typing import Optional, Tuple
 from buffer import Buffer
 from state import State
 from machineconfig import MachineConfig
+from eventlog import EventLog
+
+
+@dataclass
+class MachineSnapshot:
+    """
+    The state of a machine between two minutes, from which it can continue in another run.
+    """
+
+    name: str
+    state_id: int
+    # The minute of the last state switch and the time in the state, None to draw a new one
+    last_state_switch: int
+    time_in_state: Optional[int]
+    tailback: int
+    lack: int
+    count: float
+    idle_parts: float
+
+
+class OrderedTimeout(Timeout):
+    """
+    A timeout that is processed in the order of its priority among the events at the same time,
+    instead of in the order in which the events were scheduled. Lower priorities go first.
+    """
+
+    def __init__(self, env: simpy.Environment, delay: int, priority: int = NORMAL) -> None:
+        if delay < 0:
+            raise ValueError(f"Negative delay {delay}")
+        # Mirrors Timeout.__init__ of simpy 4.1, which schedules with NORMAL priority and has no
+        # argument for it. This is the only place that sets the private attributes of simpy
+        # events, check it when simpy is upgraded.
+        self.env = env
+        self.callbacks = []
+        self._value = None
+        self._delay = delay
+        self._ok = True
+        env.schedule(self, priority, delay)
 
 
 @dataclass
@@ -22,7 +61,10 @@ class Machine:
         initial_state: int,
         in_q: Buffer,
         out_q: Buffer,
-        event_list: list,
+        event_log: EventLog,
+        draw_every_minute: bool = False,
+        priority: int = NORMAL,
+        until: Optional[int] = None,
     ):
         """
         Initializes the Machine instance.
@@ -33,7 +75,15 @@ class Machine:
         :param initial_state: The initial state of the machine.
         :param in_q: The buffer from which the machine takes parts.
         :param out_q: The buffer to which the machine puts parts.
-        :param event_list: The list of events in the simulation.
+        :param event_log: The log that records the events in the simulation.
+        :param draw_every_minute: Whether to draw a speed during tailbacks and lacks as well,
+            so that the speeds stay aligned with runs in which the machine is not blocked.
+        :param priority: The order of the machine among the machines that act in the same minute,
+            lower goes first. Machines of the same priority act in the order they were created.
+        :param until: The minute at which the simulation stops. If given, the machine skips the
+            minutes in a state with a constant speed of 0 and records them as one span, see
+            idle_minutes. All machines of a line must then have distinct priorities, so that
+            they keep acting in the same order after a span.
         """
         self.env = env
         self.name = name
@@ -46,7 +96,14 @@ class Machine:
         self.idle_parts = 0
         self.tailback = 0
         self.lack = 0
-        self.event_list = event_list
+        # The state switch times, set when the process starts unless restored from a snapshot
+        self.last_state_switch = None
+        self.time_in_state = None
+        self.event_log = event_log
+        self.draw_every_minute = draw_every_minute
+        self.priority = priority
+        self.until = until
+        self.code = event_log.register(name)
         # Start the producing process
         self.process = env.process(self.produce())
 
@@ -54,8 +111,9 @@ class Machine:
         """
         The machine produces parts as long as the simulation runs. It is prone to breaking down and being repaired.
         """
-        last_state_switch = self.env.now
-        time_in_state = self.state.new_duration()
+        if self.time_in_state is None:
+            self.last_state_switch = self.env.now
+            self.time_in_state = self.state.new_duration()
         while True:
             pspeed = self.get_speed()
             # Update count and what goes out and in buffers
@@ -76,23 +134,86 @@ class Machine:
             self.produced = success_produced
             self.count += self.produced
             # While machine has not been in state for given time
-            if self.env.now == last_state_switch + time_in_state:
-                self.state, time_in_state = self.get_next_state()
-                last_state_switch = self.env.now
-            self.event_list.append(
-                {
-                    "Time": self.env.now,
-                    "Machine": self.name,
-                    "State": self.state.id,
-                    "Set speed": pspeed,
-                    "Actual speed": self.produced,
-                    "Count": self.count,
-                    "Tailback": self.tailback,
-                    "Lack": self.lack,
-                    "Simulation": None,
-                }
+            if self.env.now == self.last_state_switch + self.time_in_state:
+                self.state, self.time_in_state = self.get_next_state()
+                self.last_state_switch = self.env.now
+            self.event_log.record(
+                self.env.now,
+                self.code,
+                self.state.id,
+                pspeed,
+                self.produced,
+                self.count,
+                self.tailback,
+                self.lack,
             )
-            yield self.env.timeout(1)
+            minutes = self.idle_minutes()
+            if minutes > 1:
+                self.record_idle(minutes)
+            yield OrderedTimeout(self.env, minutes, self.priority)
+
+    def idle_minutes(self) -> int:
+        """
+        Returns the number of minutes until the machine has to act again.
+
+        In a state with a constant speed of 0 every minute until the next state switch is the
+        same: the machine takes and puts no parts, draws no random values and records the same
+        event. These minutes are skipped, unless the simulation has no known end or a buffer
+        of the machine keeps statistics of every put and get.
+        """
+        if (
+            self.until is None
+            or not self.state.zero_speed
+            or self.in_q.stats is not None
+            or self.out_q.stats is not None
+        ):
+            return 1
+        return max(1, self.last_state_switch + self.time_in_state - self.env.now)
+
+    def record_idle(self, minutes: int) -> None:
+        """
+        Records the minutes after the current one that the machine skips, up to the end of the
+        simulation, as one span of events with a speed of 0.
+        """
+        self.produced = 0
+        self.tailback = 0
+        self.lack = 0
+        start = self.env.now + 1
+        stop = min(self.env.now + minutes, self.until)
+        if start < stop:
+            self.event_log.record_span(
+                start, stop, self.code, self.state.id, 0, 0, self.count, 0, 0
+            )
+
+    def snapshot(self) -> MachineSnapshot:
+        """
+        Returns the state of the machine. Taken between two minutes, the machine can continue
+        from it in another run, see restore.
+        """
+        return MachineSnapshot(
+            self.name,
+            self.state.id,
+            self.last_state_switch,
+            self.time_in_state,
+            self.tailback,
+            self.lack,
+            self.count,
+            self.idle_parts,
+        )
+
+    def restore(self, snapshot: MachineSnapshot) -> None:
+        """
+        Sets the state of the machine to the given snapshot, before its process has started.
+
+        :param snapshot: The state of the machine, e.g. of another run.
+        """
+        self.state = self.machine_config.state(snapshot.state_id)
+        self.last_state_switch = snapshot.last_state_switch
+        self.time_in_state = snapshot.time_in_state
+        self.tailback = snapshot.tailback
+        self.lack = snapshot.lack
+        self.count = snapshot.count
+        self.idle_parts = snapshot.idle_parts
 
     def get_speed(self):
         """
@@ -104,6 +225,8 @@ class Machine:
         speed = 0
         if not (self.tailback or self.lack):
             speed = self.state.new_speed()
+        elif self.draw_every_minute:
+            self.state.new_speed()
         return speed
 
     def get_next_state(self) -> Tuple[int, int]:
@@ -1,6 +1,9 @@
-from dataclasses import dataclass
+import random
+import numpy as np
+from dataclasses import dataclass, field
 from typing import List, Dict, Callable, Union, Any, Tuple
 from state import State
+from sampler import AliasSampler, Constant
 
 
 class MachineConfigError(Exception):
@@ -20,6 +23,68 @@ class MachineConfig:
     name: str
     states: List[State]
 
+    def __post_init__(self) -> None:
+        self.index = {state.id: i for i, state in enumerate(self.states)}
+        self.compiled = self.compile()
+
+    def compile(self) -> "CompiledMachineConfig":
+        """
+        Returns the indexed form of the configuration, in which the states are numbered in the
+        order of the list of states.
+
+        Raises:
+            MachineConfigError: If the machine has no states, a state ID occurs more than once,
+                or a transition leads to a state that is not found in the list of states.
+        """
+        if not self.states:
+            raise MachineConfigError(f"Config error in machines, since machine {self.name} has no states")
+        if len(self.index) != len(self.states):
+            raise MachineConfigError(
+                f"Config error in machines, since machine {self.name} has duplicate state IDs"
+            )
+        transitions = np.zeros((len(self.states), len(self.states)))
+        for i, state in enumerate(self.states):
+            for next_state_id, probability in state.transitions.items():
+                if next_state_id not in self.index:
+                    raise MachineConfigError(
+                        f"Config error in machines, since state {next_state_id} is not found in machine {self.name}"
+                    )
+                transitions[i, self.index[next_state_id]] = probability
+        transitions /= transitions.sum(axis=1, keepdims=True)
+        return CompiledMachineConfig(
+            name=self.name,
+            ids=np.array([state.id for state in self.states]),
+            index=self.index,
+            transitions=transitions,
+            speeds=[state.speed for state in self.states],
+            durations=[state.duration for state in self.states],
+            transition_samplers=[state.transition_sampler for state in self.states],
+        )
+
+    def seed(self, random_state: np.random.Generator) -> None:
+        """
+        Makes every state of the machine draw its random values from the given generator.
+
+        Args:
+            random_state (np.random.Generator): The random number generator to use.
+        """
+        for state in self.states:
+            state.seed(random_state)
+
+    def seed_streams(self, seed: np.random.SeedSequence) -> None:
+        """
+        Gives every state its own generators for transitions, speeds and durations, spawned
+        from the given SeedSequence with the index of the state as key. With the same seed,
+        a state draws the same values in any run, however often the other states are used.
+
+        Args:
+            seed (np.random.SeedSequence): The seed of the streams of this machine.
+        """
+        for i, state in enumerate(self.states):
+            state.seed_streams(
+                np.random.SeedSequence(seed.entropy, spawn_key=tuple(seed.spawn_key) + (i,))
+            )
+
     def state(self, state_id: int) -> State:
         """
         Returns the state with the specified ID from the list of states.
@@ -31,10 +96,8 @@ class MachineConfig:
             MachineConfigError: If the specified state ID is not found in the list of states.
         """
         try:
-            return next(
-                (state for state in self.states if state.id == state_id),
-            )
-        except StopIteration:
+            return self.states[self.index[state_id]]
+        except KeyError:
             raise MachineConfigError(
                 f"Config error in machines, since state {state_id} is not found in machine {self.name}"
             )
@@ -67,18 +130,190 @@ class MachineConfig:
         return max([1, self.state(current_state).new_duration()])
 
 
+@dataclass
+class CompiledMachineConfig:
+    """
+    The indexed form of a MachineConfig, for engines that work with state indices instead of IDs.
+    State i is the i-th state in the list of states of the configuration.
+    """
+
+    name: str
+    # The state ID of every state index
+    ids: np.ndarray
+    # The state index of every state ID
+    index: Dict[int, int]
+    # The probability of going from state index i to state index j
+    transitions: np.ndarray
+    # The speed, duration and transition samplers of every state index
+    speeds: List[Callable]
+    durations: List[Callable]
+    transition_samplers: List[AliasSampler]
+    sorted_ids: np.ndarray = field(init=False, repr=False)
+    sorted_index: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        order = np.argsort(self.ids)
+        self.sorted_ids = self.ids[order]
+        self.sorted_index = order
+
+    def index_of(self, state_ids: np.ndarray) -> np.ndarray:
+        """
+        Returns the state indices of an array of state IDs.
+
+        Raises:
+            MachineConfigError: If a state ID is not found in the configuration.
+        """
+        state_ids = np.asarray(state_ids)
+        position = np.minimum(
+            np.searchsorted(self.sorted_ids, state_ids), len(self.sorted_ids) - 1
+        )
+        if not np.all(self.sorted_ids[position] == state_ids):
+            missing = np.setdiff1d(state_ids, self.sorted_ids)
+            raise MachineConfigError(
+                f"Config error in machines, since state {missing[0]} is not found in machine {self.name}"
+            )
+        return self.sorted_index[position]
+
+    def next_index(self, current: np.ndarray) -> np.ndarray:
+        """
+        Draws the next state index for every state index in the given array.
+        """
+        next_ids = np.empty(len(current), dtype=self.ids.dtype)
+        for i, sampler in enumerate(self.transition_samplers):
+            in_state = current == i
+            n = np.count_nonzero(in_state)
+            if n:
+                next_ids[in_state] = sampler.sample(n)
+        return self.index_of(next_ids)
+
+    def new_durations(self, current: np.ndarray) -> np.ndarray:
+        """
+        Draws a duration, truncated towards zero as in State.new_duration, for every state index
+        in the given array.
+        """
+        durations = np.empty(len(current), dtype=np.int64)
+        for i, duration in enumerate(self.durations):
+            in_state = current == i
+            n = np.count_nonzero(in_state)
+            if n:
+                durations[in_state] = np.trunc(np.asarray(duration.draw(n), dtype=float))
+        return durations
+
+
 @dataclass
 class randomGenerator:
     """
     This class generates a random value using a specified function and arguments.
+
+    If the function is vectorized, i.e. it is called with a ``size`` (scipy/numpy) or ``k``
+    (random.choices) argument, the values are drawn in blocks of ``block_size`` in one call and
+    served one by one from a cursor. The block is refilled lazily when it runs out, starting
+    small and doubling up to ``block_size``, so reseeding for a new replication stays cheap.
+    Generators that use random.choices are compiled once into an alias table, and functions
+    that take no arguments and reference no names (such as ``lambda: [0]``) are constant.
     """
 
-    def __init__(self, function, **kwargs) -> None:
+    # The maximum and the first number of values that is drawn at once in buffered mode
+    BLOCK_SIZE = 4096
+    FIRST_BLOCK_SIZE = 64
+
+    def __init__(self, function, block_size: int = BLOCK_SIZE, **kwargs) -> None:
+        """
+        Args:
+            function (Callable): The function that returns a sequence of random values.
+            block_size (int): The number of values drawn per call in buffered mode, a block size
+                of 1 disables buffering.
+            **kwargs: The arguments that are passed to the function.
+        """
         self.function = function
         self.kwargs = kwargs
+        self.block_size = block_size
+        self.sampler = (
+            AliasSampler(kwargs["population"], kwargs["weights"])
+            if function is random.choices
+            else None
+        )
+        self.size_key = next((key for key in ("size", "k") if key in kwargs), None)
+        self.buffered = self.block_size > 1 and self.size_key is not None
+        code = getattr(function, "__code__", None)
+        self.constant = isinstance(function, Constant) or (
+            not kwargs
+            and code is not None
+            and code.co_argcount == 0
+            and not code.co_names
+            and not code.co_freevars
+        )
+        self.value = self.function()[0] if self.constant else None
+        self.block = []
+        self.cursor = 0
+        self.next_block_size = min(self.FIRST_BLOCK_SIZE, self.block_size)
+        self.random_state = None
 
     def new(self) -> Union[float, int]:
         """
         Returns a new random value based on the specified function and arguments.
         """
-        return self.function(**self.kwargs)[0]
+        if self.constant:
+            return self.value
+        if not self.buffered:
+            return self.draw(1)[0] if self.size_key else self.function(**self.kwargs)[0]
+        if self.cursor >= len(self.block):
+            self.refill()
+        value = self.block[self.cursor]
+        self.cursor += 1
+        return value
+
+    def refill(self) -> None:
+        """
+        Draws a new block of values in one call of the function and resets the cursor.
+        """
+        block = self.draw(self.next_block_size)
+        self.next_block_size = min(2 * self.next_block_size, self.block_size)
+        # Indexing a list is a lot cheaper than indexing a numpy array
+        self.block = block.tolist() if hasattr(block, "tolist") else list(block)
+        self.cursor = 0
+
+    def draw(self, size: int):
+        """
+        Returns a sequence of ``size`` new random values in one call, bypassing the block.
+
+        Args:
+            size (int): The number of values to draw.
+        """
+        if self.constant:
+            return np.full(size, self.value)
+        if self.sampler is not None:
+            return self.sampler.sample(size)
+        if self.size_key is None:
+            return [self.function(**self.kwargs)[0] for _ in range(size)]
+        kwargs = dict(self.kwargs)
+        kwargs[self.size_key] = size
+        if self.random_state is not None:
+            kwargs["random_state"] = self.random_state
+        return self.function(**kwargs)
+
+    def seed(self, random_state: np.random.Generator) -> None:
+        """
+        Makes the generator draw from the given random number generator and discards the current block.
+
+        Only alias tables, Distributions and scipy distributions (functions of an object with a
+        ``random_state``) can be seeded, other functions keep using their own source of randomness.
+
+        Args:
+            random_state (np.random.Generator): The random number generator to use.
+        """
+        self.reset()
+        if self.sampler is not None:
+            self.sampler.random_state = random_state
+        elif getattr(self.function, "accepts_random_state", False) or hasattr(
+            getattr(self.function, "__self__", None), "random_state"
+        ):
+            self.random_state = random_state
+
+    def reset(self) -> None:
+        """
+        Discards the values that are left in the current block.
+        """
+        self.block = []
+        self.cursor = 0
+        self.next_block_size = min(self.FIRST_BLOCK_SIZE, self.block_size)
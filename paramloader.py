@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import numpy as np
+import pickle
+import random
+import sys
+from typing import Any, Dict, Optional
+from machineconfig import MachineConfig, MachineConfigError, randomGenerator
+from sampler import AliasSampler, Constant, Distribution
+from state import State
+
+
+# Bump this when the compiled form changes, so that old cache files are not used
+CACHE_VERSION = 3
+# The classes that are pickled in the cache, the source of their modules is part of the cache key
+CACHED_CLASSES = (AliasSampler, State, MachineConfig)
+
+
+def read_params(path: str) -> Dict[str, Any]:
+    """
+    Reads a parameter file in TOML (.toml) or JSON (any other extension) format.
+
+    The file has a list ``machine`` of machines with a ``name`` and a list ``state`` of states.
+    Every state has an ``id``, its ``transitions`` (next state id: probability) and the
+    ``speed`` and ``duration`` distributions, see machineparams.toml.
+    """
+    with open(path, "rb") as file:
+        content = file.read()
+    if path.endswith(".toml"):
+        try:
+            import tomllib
+        except ModuleNotFoundError:
+            # tomllib is only in the standard library from Python 3.11
+            import tomli as tomllib
+
+        return tomllib.loads(content.decode())
+    return json.loads(content)
+
+
+def build_generator(spec: Dict[str, Any], where: str) -> randomGenerator:
+    """
+    Builds the randomGenerator of a distribution in the parameter file.
+
+    Args:
+        spec (dict): The distribution: ``dist`` and its parameters.
+        where (str): The place of the distribution in the file, for error messages.
+
+    Raises:
+        MachineConfigError: If the distribution is not valid.
+    """
+    spec = dict(spec)
+    try:
+        dist = spec.pop("dist")
+        if dist == "constant":
+            return randomGenerator(Constant(spec["value"]))
+        if dist == "discrete":
+            return randomGenerator(
+                random.choices,
+                **{"population": spec["values"], "weights": spec["weights"], "k": 1},
+            )
+    except (KeyError, ValueError) as error:
+        raise MachineConfigError(f"Config error in the {where}: {error!r}") from None
+    return randomGenerator(Distribution(dist), **spec, size=1)
+
+
+def build_configs(params: Dict[str, Any]) -> Dict[str, MachineConfig]:
+    """
+    Builds the machine configurations of the parameters that were read from a file.
+
+    Returns:
+        dict: The MachineConfig of every machine, by name and in the order of the file.
+    """
+    configs = {}
+    for machine in params.get("machine", []):
+        states = []
+        for state in machine.get("state", []):
+            where = f"state {state.get('id')} of machine {machine.get('name')}"
+            try:
+                states.append(
+                    State(
+                        int(state["id"]),
+                        {int(k): v for k, v in state["transitions"].items()},
+                        build_generator(state["speed"], f"speed of {where}"),
+                        build_generator(state["duration"], f"duration of {where}"),
+                    )
+                )
+            except KeyError as error:
+                raise MachineConfigError(f"Config error in {where}: missing {error}") from None
+        configs[machine["name"]] = MachineConfig(machine["name"], states=states)
+    return configs
+
+
+def code_fingerprint() -> str:
+    """
+    Returns the hash of the source of the modules whose classes are pickled in the cache,
+    so that a change of their layout never loads an old cache file.
+    """
+    fingerprint = hashlib.sha256()
+    for cls in CACHED_CLASSES:
+        with open(sys.modules[cls.__module__].__file__, "rb") as file:
+            fingerprint.update(file.read())
+    return fingerprint.hexdigest()
+
+
+def check_configs(configs: Dict[str, MachineConfig]) -> None:
+    """
+    Draws a transition, speed and duration of every state of the configurations as they are
+    used unseeded, then discards the drawn blocks and restores numpy's global random state.
+
+    Raises:
+        Exception: Whatever a draw raises, e.g. AttributeError for an outdated pickle.
+    """
+    global_state = np.random.get_state()
+    try:
+        for config in configs.values():
+            for state in config.states:
+                state.next_state_id()
+                state.new_speed()
+                state.new_duration()
+            config.seed(None)
+    finally:
+        np.random.set_state(global_state)
+
+
+def load_machine_configs(
+    path: str, cache_dir: Optional[str] = None
+) -> Dict[str, MachineConfig]:
+    """
+    Loads the machine configurations of a parameter file.
+
+    The compiled configurations, including their alias tables, are cached as a pickle keyed
+    by the hash of the file and of the code, so later loads of the same file skip parsing and building.
+    scipy is not imported here: distributions are only resolved when they are first drawn from.
+
+    Args:
+        path (str): The TOML or JSON parameter file.
+        cache_dir (str): The directory of the cache, defaults to __paramcache__ next to the file.
+            Use an empty string to disable the cache.
+
+    Returns:
+        dict: The MachineConfig of every machine, by name and in the order of the file.
+    """
+    with open(path, "rb") as file:
+        digest = hashlib.sha256(file.read() + code_fingerprint().encode()).hexdigest()
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), "__paramcache__")
+    cache_file = (
+        os.path.join(cache_dir, f"{digest}-v{CACHE_VERSION}.pkl") if cache_dir else None
+    )
+    if cache_file and os.path.exists(cache_file):
+        try:
+            with open(cache_file, "rb") as file:
+                configs = pickle.load(file)
+            check_configs(configs)
+            return configs
+        except Exception:
+            # A broken or outdated cache file is rebuilt below
+            pass
+    configs = build_configs(read_params(path))
+    if cache_file:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Write to a temporary file first, so that parallel workers never read half a file
+            temporary = f"{cache_file}.{os.getpid()}"
+            with open(temporary, "wb") as file:
+                pickle.dump(configs, file)
+            os.replace(temporary, cache_file)
+        except OSError:
+            pass
+    return configs
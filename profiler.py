@@ -0,0 +1,211 @@
+import time
+from collections import defaultdict
+from functools import wraps
+from typing import Callable, Dict, List, Tuple
+import pandas as pd
+from buffer import Buffer
+from bufferlevels import BufferLevels
+from eventlog import AggregateLog, EventLog, StateChangeLog
+from machine import Machine
+from machineconfig import MachineConfig, randomGenerator
+from sampler import AliasSampler
+from stations import StationSpeeds
+from statsrecorder import StatsRecorder
+
+
+def distribution_name(generator: randomGenerator) -> str:
+    """
+    Returns the name of the distribution that a randomGenerator draws from.
+    """
+    if generator.constant:
+        return "constant"
+    if generator.sampler is not None:
+        return "choices"
+    function = generator.function
+    return getattr(function, "name", None) or getattr(
+        function, "__name__", type(function).__name__
+    )
+
+
+# The recorders whose record and record_span are instrumented, each defines its own
+RECORDERS = (EventLog, AggregateLog, StateChangeLog, StationSpeeds, StatsRecorder, BufferLevels)
+
+# The instrumented call sites: the name, the class and method that is wrapped, the key that a
+# call is counted under and whether the site is called from Machine.produce directly. The
+# time of the other sites is part of the time of a direct site.
+SITES: List[Tuple[str, type, str, Callable, bool]] = [
+    ("Machine.get_speed", Machine, "get_speed", lambda self, *args: self.name, True),
+    ("Machine.get_next_state", Machine, "get_next_state", lambda self, *args: self.name, True),
+    ("Buffer.get_parts", Buffer, "get_parts", lambda self, *args: self.id, True),
+    ("Buffer.put_parts", Buffer, "put_parts", lambda self, *args: self.id, True),
+    ("MachineConfig.state", MachineConfig, "state", lambda self, *args: self.name, False),
+    ("randomGenerator.new", randomGenerator, "new", lambda self: distribution_name(self), False),
+    (
+        "randomGenerator.refill",
+        randomGenerator,
+        "refill",
+        lambda self: distribution_name(self),
+        False,
+    ),
+    ("AliasSampler.draw", AliasSampler, "draw", lambda self: "transition", False),
+] + [
+    # Recorders are keyed by the code that the machine registered with
+    (
+        f"{recorder.__name__}.record",
+        recorder,
+        "record",
+        lambda self, time, code, *args: code,
+        True,
+    )
+    for recorder in RECORDERS
+] + [
+    (
+        f"{recorder.__name__}.record_span",
+        recorder,
+        "record_span",
+        lambda self, start, stop, code, *args: code,
+        True,
+    )
+    for recorder in RECORDERS
+]
+
+
+class Profiler:
+    """
+    This class counts the calls and the cumulative time of the hot call sites of the simulation,
+    per machine, buffer or distribution. See ``profile``.
+
+    The sites are only wrapped while the profiler is enabled, so the simulation runs its
+    original code otherwise. Only runs in this process are measured, i.e. replications must
+    be run with 1 worker. The timers add a little time to every call, so the times are an
+    upper bound, most of all for the cheap sites.
+    """
+
+    # The profiler that is enabled, as the wrapped methods are shared by all instances
+    active = None
+
+    def __init__(self) -> None:
+        # Per (site, key) the number of calls and the cumulative time in seconds
+        self.calls: Dict[Tuple[str, object], int] = defaultdict(int)
+        self.seconds: Dict[Tuple[str, object], float] = defaultdict(float)
+        self.total = 0.0
+        self.originals: List[Tuple[type, str, Callable]] = []
+        self.begin = None
+
+    def wrap(self, site: str, function: Callable, key: Callable) -> Callable:
+        """
+        Returns the function with a counter and a timer, under the key of every call.
+        """
+        calls = self.calls
+        seconds = self.seconds
+        perf_counter = time.perf_counter
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            begin = perf_counter()
+            result = function(*args, **kwargs)
+            entry = (site, key(*args))
+            seconds[entry] += perf_counter() - begin
+            calls[entry] += 1
+            return result
+
+        return wrapper
+
+    def enable(self) -> None:
+        """
+        Wraps all call sites and starts the total timer.
+
+        Raises:
+            RuntimeError: If another profiler is enabled.
+        """
+        if Profiler.active is not None:
+            raise RuntimeError("Another profiler is already enabled")
+        Profiler.active = self
+        for site, cls, method, key, _ in SITES:
+            original = cls.__dict__[method]
+            self.originals.append((cls, method, original))
+            setattr(cls, method, self.wrap(site, original, key))
+        self.begin = time.perf_counter()
+
+    def disable(self) -> None:
+        """
+        Stops the total timer and restores the original call sites.
+        """
+        self.total += time.perf_counter() - self.begin
+        for cls, method, original in reversed(self.originals):
+            setattr(cls, method, original)
+        self.originals = []
+        Profiler.active = None
+
+    def __enter__(self) -> "Profiler":
+        self.enable()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.disable()
+
+    def report(self) -> pd.DataFrame:
+        """
+        Returns the calls and time per call site and key, the most expensive sites first.
+
+        Returns:
+            pd.DataFrame: Per site and key the number of calls, the cumulative time in seconds,
+                the time per call in microseconds and the share of the total time. The row
+                "Other" is the total time outside the direct sites of Machine.produce, i.e.
+                the loop of the machines, simpy scheduling and building the line.
+        """
+        direct = {site for site, _, _, _, is_direct in SITES if is_direct}
+        rows = [
+            {
+                "Site": site,
+                "Key": key,
+                "Calls": self.calls[site, key],
+                "Seconds": seconds,
+                "Direct": site in direct,
+            }
+            for (site, key), seconds in self.seconds.items()
+        ]
+        measured = sum(row["Seconds"] for row in rows if row["Direct"])
+        rows.append(
+            {
+                "Site": "Other",
+                "Key": "",
+                "Calls": 0,
+                "Seconds": max(0.0, self.total - measured),
+                "Direct": True,
+            }
+        )
+        frame = pd.DataFrame(rows, columns=["Site", "Key", "Calls", "Seconds", "Direct"])
+        frame["Key"] = frame["Key"].astype(str)
+        frame["Microseconds per call"] = 1e6 * frame["Seconds"] / frame["Calls"].where(
+            frame["Calls"] > 0
+        )
+        frame["Share"] = frame["Seconds"] / self.total if self.total else 0.0
+        return frame.sort_values("Seconds", ascending=False, ignore_index=True)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Returns the report summed over the keys of every call site.
+        """
+        report = self.report()
+        frame = report.groupby(["Site", "Direct"], as_index=False, sort=False)[
+            ["Calls", "Seconds", "Share"]
+        ].sum()
+        frame["Microseconds per call"] = 1e6 * frame["Seconds"] / frame["Calls"].where(
+            frame["Calls"] > 0
+        )
+        return frame.sort_values("Seconds", ascending=False, ignore_index=True)
+
+
+def profile() -> Profiler:
+    """
+    Returns a profiler to use as a context manager around runs of the simulation, e.g.
+
+        with profile() as profiler:
+            run_sim(0, np.random.SeedSequence(0))
+        print(profiler.summary())
+
+    Returns:
+        Profiler: The profiler, which is enabled in the with block.
+    """
+    return Profiler()
@@ -0,0 +1,177 @@
+import numpy as np
+from typing import Any, Iterable, List, Union
+
+
+class AliasSampler:
+    """
+    This class samples from a discrete distribution with Walker's alias method.
+
+    The alias table is built once from the population and its weights, after which every
+    draw costs a single uniform random number, regardless of the size of the population.
+    Single draws are served from a block of indices that is drawn at once, as in
+    randomGenerator, which starts small and doubles up to ``BLOCK_SIZE``.
+    """
+
+    # The maximum and the first number of indices that is drawn at once for single draws
+    BLOCK_SIZE = 4096
+    FIRST_BLOCK_SIZE = 16
+
+    def __init__(self, population: Iterable[Any], weights: Iterable[float]) -> None:
+        """
+        Args:
+            population (Iterable): The values that can be drawn.
+            weights (Iterable[float]): The relative weights of the values, they do not need to sum to 1.
+        """
+        self.population: List[Any] = list(population)
+        self.values = np.asarray(self.population)
+        weights = np.asarray(list(weights), dtype=float)
+        if len(self.population) == 0 or len(self.population) != len(weights):
+            raise ValueError("The population and weights must be non-empty and of equal length")
+        if np.any(weights < 0) or weights.sum() <= 0:
+            raise ValueError("The weights must be non-negative and sum to a positive value")
+        self.prob, self.alias = self.build_table(weights / weights.sum())
+        self.block: List[int] = []
+        self.cursor = 0
+        self.next_block_size = self.FIRST_BLOCK_SIZE
+        self._random_state = None
+
+    @staticmethod
+    def build_table(probabilities: np.ndarray):
+        """
+        Builds the alias table with Vose's algorithm.
+
+        Args:
+            probabilities (np.ndarray): The normalized probabilities of the population.
+
+        Returns:
+            prob (np.ndarray): The probability of keeping the drawn column.
+            alias (np.ndarray): The index that is used when the drawn column is not kept.
+        """
+        n = len(probabilities)
+        scaled = probabilities * n
+        prob = np.ones(n)
+        alias = np.arange(n)
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] = scaled[l] + scaled[s] - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+        # Whatever is left over only differs from 1 by rounding errors
+        return prob, alias
+
+    @property
+    def random_state(self):
+        """
+        The random number generator of the sampler. Setting it discards the current block.
+        """
+        return self._random_state
+
+    @random_state.setter
+    def random_state(self, random_state) -> None:
+        self._random_state = random_state
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Discards the indices that are left in the current block.
+        """
+        self.block = []
+        self.cursor = 0
+        self.next_block_size = self.FIRST_BLOCK_SIZE
+
+    @property
+    def rng(self):
+        """
+        The random number generator that is used, numpy's global state if none is set.
+        """
+        return np.random if self._random_state is None else self._random_state
+
+    def sample_index(self, size: int) -> np.ndarray:
+        """
+        Returns an array with the indices of ``size`` values drawn from the population.
+        """
+        n = len(self.prob)
+        x = self.rng.random(size) * n
+        column = np.minimum(x.astype(np.intp), n - 1)
+        keep = (x - column) < self.prob[column]
+        return np.where(keep, column, self.alias[column])
+
+    def sample(self, size: int) -> np.ndarray:
+        """
+        Returns an array of ``size`` values drawn from the population.
+        """
+        return self.values[self.sample_index(size)]
+
+    def draw(self) -> Union[float, int]:
+        """
+        Returns a single value drawn from the population, from the current block of indices.
+        """
+        if self.cursor >= len(self.block):
+            # Indexing a list is a lot cheaper than indexing a numpy array
+            self.block = self.sample_index(self.next_block_size).tolist()
+            self.next_block_size = min(2 * self.next_block_size, self.BLOCK_SIZE)
+            self.cursor = 0
+        index = self.block[self.cursor]
+        self.cursor += 1
+        return self.population[index]
+
+
+class Constant:
+    """
+    This class is a random function that always returns the same value, in the form that
+    randomGenerator expects. Unlike a lambda it can be pickled.
+    """
+
+    def __init__(self, value: Union[float, int]) -> None:
+        self.value = value
+
+    def __call__(self) -> List[Union[float, int]]:
+        return [self.value]
+
+
+class Distribution:
+    """
+    This class is a picklable random function for a distribution of scipy.stats, given by name,
+    with the same parameters (e.g. ``s``, ``loc`` and ``scale``) and ``size``.
+
+    The distributions in NUMPY_DISTRIBUTIONS are drawn with numpy directly. scipy.stats is
+    only imported when another distribution is drawn from for the first time.
+    """
+
+    # Draws of scipy.stats distributions with numpy: (generator, size, **parameters)
+    NUMPY_DISTRIBUTIONS = {
+        "expon": lambda rng, size, loc=0.0, scale=1.0: loc + rng.exponential(scale, size),
+        "lognorm": lambda rng, size, s, loc=0.0, scale=1.0: loc
+        + rng.lognormal(np.log(scale), s, size),
+        "beta": lambda rng, size, a, b, loc=0.0, scale=1.0: loc + scale * rng.beta(a, b, size),
+        "t": lambda rng, size, df, loc=0.0, scale=1.0: loc + scale * rng.standard_t(df, size),
+        "pareto": lambda rng, size, b, loc=0.0, scale=1.0: loc
+        + scale * (rng.pareto(b, size) + 1.0),
+        "norm": lambda rng, size, loc=0.0, scale=1.0: rng.normal(loc, scale, size),
+        "uniform": lambda rng, size, loc=0.0, scale=1.0: loc + scale * rng.random(size),
+    }
+    # randomGenerator.seed passes its generator as random_state
+    accepts_random_state = True
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.rvs = None
+
+    def __getstate__(self):
+        return {"name": self.name, "rvs": None}
+
+    def __call__(self, size: int = 1, random_state=None, **parameters) -> np.ndarray:
+        if self.name in self.NUMPY_DISTRIBUTIONS:
+            rng = np.random if random_state is None else random_state
+            return self.NUMPY_DISTRIBUTIONS[self.name](rng, size, **parameters)
+        if self.rvs is None:
+            from scipy import stats
+
+            try:
+                self.rvs = getattr(stats, self.name).rvs
+            except AttributeError:
+                raise ValueError(f"Unknown distribution {self.name} in scipy.stats") from None
+        return self.rvs(size=size, random_state=random_state, **parameters)
@@ -1,94 +1,602 @@
+import os
+import zlib
+from collections import deque
 import numpy as np
 import pandas as pd
 import simpy
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 from buffer import Buffer
+from bufferlevels import BufferLevels
 from machine import Machine
-from machineparams import *
+from simpy.events import NORMAL
+from machineconfig import MachineConfig
+from eventlog import AggregateLog, EventLog, StateChangeLog
+from logwriter import LogWriter
+from stations import StationSpeeds
+from statsrecorder import StatsRecorder, speed_bins
+from topology import DEFAULT_TOPOLOGY, Topology
 from datetime import datetime
 
 
-# Time for the simulation to run
+# Time for the simulation to run, one shift. Longer horizons are passed as run_time
 RUN_TIME = 481
 
+# The number of replications per worker process that run ahead of the consumer of the results
+WINDOW_PER_WORKER = 2
 
-def run_sim(i: int) -> list:
+# The resolutions of the log, besides a number of minutes per aggregated row
+RESOLUTIONS = ("full", "changes")
+
+# The configurations of all machines of the default line, these are seeded at the start of
+# every replication
+MACHINE_CONFIGS = DEFAULT_TOPOLOGY.configs
+
+# The maximum capacity of the buffers between the machines of the default line, Buffer_1 to Buffer_6
+BUFFER_CAPACITIES = DEFAULT_TOPOLOGY.capacities
+
+
+def machine_seed(seed: np.random.SeedSequence, name: str) -> np.random.SeedSequence:
+    """
+    Returns the seed of the streams of a machine in a replication, keyed by the name of the
+    machine so that it does not depend on the other machines of the line.
+    """
+    return np.random.SeedSequence(
+        seed.entropy, spawn_key=tuple(seed.spawn_key) + (zlib.crc32(name.encode()),)
+    )
+
+
+def seed_configs(
+    configs: Sequence[MachineConfig],
+    seed: Optional[np.random.SeedSequence] = None,
+    crn: bool = False,
+    names: Optional[Sequence[str]] = None,
+) -> None:
+    """
+    Seeds the machine configurations for a replication, see run_sim.
+
+    With common random numbers the streams are keyed by the names of the machines, which are
+    distinct also when machines share a configuration. They are the names of the
+    configurations if none are given.
+    """
+    if crn:
+        if seed is None:
+            raise ValueError("Common random numbers need the seed of the replication")
+        if names is None:
+            names = [machine_config.name for machine_config in configs]
+        for name, machine_config in zip(names, configs):
+            machine_config.seed_streams(machine_seed(seed, name))
+    elif seed is not None:
+        random_state = np.random.default_rng(seed)
+        for machine_config in configs:
+            machine_config.seed(random_state)
+
+
+def new_recorder(
+    output: str,
+    i: int,
+    run_time: int,
+    topology: Topology = DEFAULT_TOPOLOGY,
+    resolution: Union[str, int] = "full",
+) -> Union[EventLog, StationSpeeds, StatsRecorder, BufferLevels]:
+    """
+    Returns the recorder of the given output for the simulation with index i of a line,
+    see run_sim.
+    """
+    if output == "log":
+        if resolution == "full":
+            return EventLog(
+                simulation=i + 1, chunk_size=len(topology.compiled.machine_names) * run_time
+            )
+        if resolution == "changes":
+            return StateChangeLog(simulation=i + 1)
+        if isinstance(resolution, (int, np.integer)) and resolution >= 1:
+            return AggregateLog(int(resolution), simulation=i + 1)
+        raise ValueError(
+            f"Unknown log resolution {resolution}, use one of {list(RESOLUTIONS)} or a number of minutes"
+        )
+    if output == "stations":
+        return StationSpeeds(run_time, simulation=i + 1, stations=topology.compiled.stations())
+    if output == "stats":
+        return StatsRecorder(simulation=i + 1, speed_bins=speed_bins(topology.configs))
+    if output == "levels":
+        return BufferLevels(run_time, simulation=i + 1)
+    raise ValueError(f"Unknown output {output}, use 'log', 'stations', 'stats' or 'levels'")
+
+
+def build_line(
+    env: simpy.Environment,
+    event_log: Union[EventLog, StationSpeeds, StatsRecorder, BufferLevels],
+    capacities: Optional[Sequence[float]] = None,
+    crn: bool = False,
+    configs: Optional[Sequence[MachineConfig]] = None,
+    until: Optional[int] = None,
+    topology: Topology = DEFAULT_TOPOLOGY,
+) -> Tuple[List[Buffer], List[Machine]]:
+    """
+    Creates the buffers and machines of a line in the given environment.
+
+    Args:
+        env (simpy.Environment): The simulation environment.
+        event_log: The recorder that the machines record to, see new_recorder.
+        capacities (Sequence[float]): The maximum capacity of the buffers between two stations,
+            those of the topology if none are given.
+        crn (bool): Whether the machines draw a speed every minute, see run_sim.
+        configs (Sequence[MachineConfig]): The configurations of the machines, in the order
+            of the topology, those of the topology if none are given.
+        until (int): The minute at which the simulation stops. If given, machines skip the
+            minutes in which they are down with a speed of 0, see Machine.idle_minutes.
+        topology (Topology): The layout of the line.
+
+    Returns:
+        buffers (List[Buffer]): The buffers, in the order of the topology (Buffer_0 to Buffer_7).
+        machines (List[Machine]): The machines, in the order of the topology.
+    """
+    if capacities is not None:
+        topology = topology.with_capacities(capacities)
+    if configs is not None:
+        topology = topology.with_configs(configs)
+    compiled = topology.compiled
+
+    # The buffers
+    buffers = [
+        Buffer(buffer.name, max_capacity=buffer.max_capacity, current_parts=buffer.initial_parts)
+        for buffer in topology.buffers
+    ]
+    inner = [buffers[b] for b in compiled.inner]
+    if isinstance(event_log, StatsRecorder):
+        for buffer in inner:
+            event_log.track(buffer)
+
+    # The machines, which act in the order of the line in every minute, also after skipping minutes
+    machines = [
+        Machine(
+            env,
+            name,
+            config,
+            initial_state,
+            buffers[in_q],
+            buffers[out_q],
+            event_log,
+            crn,
+            priority=NORMAL + k,
+            until=until,
+        )
+        for k, (name, config, initial_state, in_q, out_q) in enumerate(compiled.machines())
+    ]
+
+    # The levels are read after all machines have acted in a minute
+    if isinstance(event_log, BufferLevels):
+        event_log.monitor(env, inner, priority=NORMAL + len(machines))
+    return buffers, machines
+
+
+def run_sim(
+    i: int,
+    seed: Optional[np.random.SeedSequence] = None,
+    output: str = "log",
+    capacities: Optional[Sequence[float]] = None,
+    crn: bool = False,
+    topology: Topology = DEFAULT_TOPOLOGY,
+    run_time: int = RUN_TIME,
+    resolution: Union[str, int] = "full",
+) -> Union[EventLog, StationSpeeds, StatsRecorder, BufferLevels]:
     """
     Runs the simulation for one iteration with the given simulation index and returns the event log.
 
     Args:
         i (int): The simulation index.
+        seed (np.random.SeedSequence): The seed of the replication. If given, all random values
+            of the replication are drawn from a generator with this seed.
+        output (str): "log" for the full event log, "stations" for only the actual speed
+            per station per minute, "stats" for only streaming statistics of the machines
+            and of Buffer_1 to Buffer_6, "levels" for only the level of Buffer_1 to Buffer_6
+            at the end of every minute.
+        capacities (Sequence[float]): The maximum capacity of the buffers between two stations
+            (Buffer_1 to Buffer_6), those of the topology if none are given.
+        crn (bool): Whether to use common random numbers: every machine draws its transitions,
+            speeds and durations from streams of its own, keyed by the seed and the machine,
+            and draws a speed every minute. Runs of other line configurations with the same
+            seed then see the same machine histories.
+        topology (Topology): The layout of the line, see topology.py.
+        run_time (int): The number of minutes to simulate, one shift by default.
+        resolution (str or int): The resolution of the "log" output: "full" for an event per
+            machine and minute, a number of minutes for an AggregateLog with a row per machine
+            and interval of that many minutes, or "changes" for a StateChangeLog with a row per
+            state of a machine. Only the reduced logs keep their memory small for long runs.
 
     Returns:
-        list: The event log for the simulation.
+        EventLog: The event log for the simulation, StationSpeeds for the "stations" output
+            StatsRecorder for the "stats" output or BufferLevels for the "levels" output.
     """
+    seed_configs(topology.configs, seed, crn, topology.compiled.machine_names)
 
-    # The buffers
-    buffer_0 = Buffer("Buffer_0", current_parts=np.inf)
-    buffer_1 = Buffer("Buffer_1", max_capacity=3256)  #
-    buffer_2 = Buffer("Buffer_2", max_capacity=3400)  #
-    buffer_3 = Buffer("Buffer_3", max_capacity=3366)  #
-    buffer_4 = Buffer("Buffer_4", max_capacity=3420)  #
-    buffer_5 = Buffer("Buffer_5", max_capacity=3530)  #
-    buffer_6 = Buffer("Buffer_6", max_capacity=35612)  #
-    buffer_7 = Buffer("Buffer_7")
-
-    # The machines
-    depalletizer = Machine(
-        env, "Depalletizer", Depalletizer, 128, buffer_0, buffer_1, event_list
-    )
-    filler = Machine(env, "Filler", Filler, 128, buffer_1, buffer_2, event_list)
-    pasteurizer = Machine(
-        env, "Pasteurizer", Pasteurizer, 128, buffer_2, buffer_3, event_list
+    # Create environment and the event log of this simulation
+    env = simpy.Environment()
+    event_log = new_recorder(output, i, run_time, topology, resolution)
+    build_line(env, event_log, capacities, crn, until=run_time, topology=topology)
+
+    # Execute
+    env.run(until=run_time)
+    return event_log
+
+
+def map_in_order(
+    function: Callable,
+    workers: int,
+    *iterables: Iterable,
+    executor: Optional[Executor] = None,
+) -> Iterator:
+    """
+    Yields the results of the function for the arguments of the iterables in order, computed
+    over a pool of worker processes, or in this process with 1 worker.
+
+    At most ``WINDOW_PER_WORKER`` calls per worker are submitted ahead of the result that is
+    yielded next, so results do not pile up in memory when the consumer, e.g. a LogWriter,
+    is slower than the workers.
+
+    A pool that is given as ``executor`` is used instead of a new one and is left running,
+    so that callers that map several times skip starting the worker processes again.
+    """
+    if executor is None and workers == 1:
+        yield from map(function, *iterables)
+        return
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    window = WINDOW_PER_WORKER * workers
+    futures = deque()
+    try:
+        for args in zip(*iterables):
+            if len(futures) >= window:
+                yield futures.popleft().result()
+            futures.append(executor.submit(function, *args))
+        while futures:
+            yield futures.popleft().result()
+    finally:
+        # A consumer that stops early leaves no calls behind, also on a pool that keeps running
+        for future in futures:
+            future.cancel()
+        if own_executor:
+            executor.shutdown()
+
+
+def map_replications(
+    n: int,
+    workers: Optional[int] = None,
+    seed: Optional[int] = None,
+    output: str = "log",
+    capacities: Optional[Sequence[float]] = None,
+    start: int = 0,
+    crn: bool = False,
+    topology: Topology = DEFAULT_TOPOLOGY,
+    run_time: int = RUN_TIME,
+    resolution: Union[str, int] = "full",
+    executor: Optional[Executor] = None,
+) -> Iterator[Union[EventLog, StationSpeeds, StatsRecorder, BufferLevels]]:
+    """
+    Runs n replications of the simulation over a pool of worker processes and yields their
+    results in replication order.
+
+    Every replication draws from its own stream, spawned from one SeedSequence, so the results
+    are identical for any number of workers.
+
+    Args:
+        n (int): The number of replications.
+        workers (int): The number of worker processes, defaults to the number of CPUs.
+            With 1 worker the replications run in this process.
+        seed (int): The seed of the whole run, fresh entropy is used if none is given.
+        output (str): The output of every replication, see run_sim.
+        capacities (Sequence[float]): The maximum capacity of the buffers between two stations
+            (Buffer_1 to Buffer_6), those of the topology if none are given.
+        start (int): The index of the first replication. With the same seed, replication i
+            gets the same stream for any start, so a run can be extended later.
+        crn (bool): Whether to use common random numbers, see run_sim.
+        topology (Topology): The layout of the line, see topology.py.
+        run_time (int): The number of minutes to simulate, see run_sim.
+        resolution (str or int): The resolution of the "log" output, see run_sim.
+        executor (Executor): A running pool of ``workers`` worker processes to use instead
+            of a new one, see map_in_order.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(start + n)[start:]
+    workers = workers or os.cpu_count()
+    run = partial(
+        run_sim,
+        output=output,
+        capacities=capacities,
+        crn=crn,
+        topology=topology,
+        run_time=run_time,
+        resolution=resolution,
     )
-    labeler_1 = Machine(env, "Labeler_1", Labeler1, 128, buffer_3, buffer_4, event_list)
-    labeler_2 = Machine(env, "Labeler_2", Labeler2, 128, buffer_3, buffer_4, event_list)
-    capper = Machine(env, "Capper", Capper, 128, buffer_4, buffer_5, event_list)
-    packer = Machine(env, "Packer", Packer, 128, buffer_5, buffer_6, event_list)
-    palletizer_1 = Machine(
-        env, "Palletizer_1", Palletizer1, 128, buffer_6, buffer_7, event_list
+    yield from map_in_order(run, workers, range(start, start + n), seeds, executor=executor)
+
+
+def run_replications(
+    n: int,
+    workers: Optional[int] = None,
+    seed: Optional[int] = None,
+    sink: Optional[LogWriter] = None,
+    run_time: int = RUN_TIME,
+    resolution: Union[str, int] = "full",
+) -> Optional[EventLog]:
+    """
+    Runs n replications of the simulation over a pool of worker processes, see map_replications.
+
+    If a sink is given, the log of every replication is written to it as soon as it is finished
+    instead of being kept in memory.
+
+    Args:
+        n (int): The number of replications.
+        workers (int): The number of worker processes, defaults to the number of CPUs.
+        seed (int): The seed of the whole run, fresh entropy is used if none is given.
+        sink (LogWriter): The writer that the logs are streamed to, if any. Its log type must
+            match the resolution.
+        run_time (int): The number of minutes to simulate, see run_sim.
+        resolution (str or int): The resolution of the logs, see run_sim.
+
+    Returns:
+        EventLog: The event logs of all replications, merged in replication order,
+            or None if the logs were written to the sink.
+    """
+    return collect_logs(
+        map_replications(n, workers, seed, run_time=run_time, resolution=resolution), sink
     )
-    palletizer_2 = Machine(
-        env, "Palletizer_2", Palletizer2, 128, buffer_6, buffer_7, event_list
+
+
+def run_statistics(
+    n: int,
+    workers: Optional[int] = None,
+    seed: Optional[int] = None,
+    capacities: Optional[Sequence[float]] = None,
+    topology: Topology = DEFAULT_TOPOLOGY,
+    run_time: int = RUN_TIME,
+) -> StatsRecorder:
+    """
+    Runs n replications without a log and returns the streaming statistics of the machines
+    and buffers, merged over the replications. Every worker only sends back its accumulators.
+
+    Args:
+        n (int): The number of replications.
+        workers (int): The number of worker processes, defaults to the number of CPUs.
+        seed (int): The seed of the whole run, fresh entropy is used if none is given.
+        capacities (Sequence[float]): The maximum capacity of the buffers between two stations
+            (Buffer_1 to Buffer_6), those of the topology if none are given.
+        topology (Topology): The layout of the line, see topology.py.
+        run_time (int): The number of minutes to simulate. The memory of the statistics does
+            not grow with it.
+
+    Returns:
+        StatsRecorder: The merged statistics, see StatsRecorder.to_frame and buffers_frame.
+    """
+    return StatsRecorder.merge(
+        map_replications(
+            n, workers, seed, "stats", capacities, topology=topology, run_time=run_time
+        )
     )
 
-    # Execute
-    env.run(until=RUN_TIME)
-    return event_list
-
-
-event_list = []
-begin_time = datetime.now()
-# Number of simulations
-num_sim = 10
-for i in range(num_sim):
-    print(f"---------- STARTING SIMULATION {i+1} ----------")
-    sim_start = datetime.now()  # To see how long each simulation takes
-    event_list.append(
+
+def run_buffer_levels(
+    n: int,
+    workers: Optional[int] = None,
+    seed: Optional[int] = None,
+    capacities: Optional[Sequence[float]] = None,
+    path: Optional[str] = None,
+    topology: Topology = DEFAULT_TOPOLOGY,
+    run_time: int = RUN_TIME,
+) -> np.ndarray:
+    """
+    Runs n replications and returns the level of the buffers between two stations (Buffer_1
+    to Buffer_6) at the end of every minute, see bufferlevels.occupancy_histogram and full_empty_statistics for summaries.
+
+    Args:
+        n (int): The number of replications.
+        workers (int): The number of worker processes, defaults to the number of CPUs.
+        seed (int): The seed of the whole run, fresh entropy is used if none is given.
+        capacities (Sequence[float]): The maximum capacity of the buffers between two stations
+            (Buffer_1 to Buffer_6), those of the topology if none are given.
+        path (str): A .npy file to write the levels to as a memory map, kept in memory if none is given.
+        topology (Topology): The layout of the line, see topology.py.
+        run_time (int): The number of minutes to simulate.
+
+    Returns:
+        np.ndarray: The levels with shape (time, buffer, replication).
+    """
+    shape = (run_time, len(topology.compiled.inner), n)
+    if path is None:
+        levels = np.zeros(shape, dtype=np.float32)
+    else:
+        levels = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=shape)
+    for i, buffer_levels in enumerate(
+        map_replications(
+            n, workers, seed, "levels", capacities, topology=topology, run_time=run_time
+        )
+    ):
+        levels[:, :, i] = buffer_levels.levels
+    if path is not None:
+        levels.flush()
+    return levels
+
+
+def run_station_speeds(
+    n: int,
+    workers: Optional[int] = None,
+    seed: Optional[int] = None,
+    path: Optional[str] = None,
+    topology: Topology = DEFAULT_TOPOLOGY,
+    run_time: int = RUN_TIME,
+) -> np.ndarray:
+    """
+    Runs n replications and returns the actual speed of every station per minute, with parallel
+    machines added up, as the input of the LP model.
+
+    Args:
+        n (int): The number of replications.
+        workers (int): The number of worker processes, defaults to the number of CPUs.
+        seed (int): The seed of the whole run, fresh entropy is used if none is given.
+        path (str): A .npy file to write the speeds to as a memory map, kept in memory if none is given.
+        topology (Topology): The layout of the line, see topology.py.
+        run_time (int): The number of minutes to simulate.
+
+    Returns:
+        np.ndarray: The actual speeds with shape (time, station, replication).
+    """
+    shape = (run_time, len(topology.stations), n)
+    if path is None:
+        speeds = np.zeros(shape, dtype=np.float32)
+    else:
+        speeds = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=shape)
+    for i, station_speeds in enumerate(map_replications(
+        n, workers, seed, "stations", topology=topology, run_time=run_time
+    )):
+        speeds[:, :, i] = station_speeds.speeds
+    if path is not None:
+        speeds.flush()
+    return speeds
+
+
+# The KPIs of run_until_precision, computed from the actual speeds per station and minute.
+# The output is that of the last station, the palletizers of the default line.
+KPIS = {
+    "output": lambda speeds: speeds[:, -1].sum(dtype=np.float64),
+    "throughput": lambda speeds: speeds[:, -1].mean(dtype=np.float64),
+}
+
+
+def run_until_precision(
+    kpi: Union[str, Callable[[np.ndarray], float]] = "output",
+    relative_precision: float = 0.01,
+    confidence: float = 0.95,
+    batch: Optional[int] = None,
+    min_replications: int = 10,
+    max_replications: int = 10000,
+    workers: Optional[int] = None,
+    seed: Optional[int] = None,
+    capacities: Optional[Sequence[float]] = None,
+    crn: bool = False,
+    topology: Topology = DEFAULT_TOPOLOGY,
+    run_time: int = RUN_TIME,
+) -> pd.Series:
+    """
+    Runs batches of replications until the confidence interval of the mean of a KPI is
+    narrow enough: its half-width is at most ``relative_precision`` times the mean.
+
+    Every batch is spread over the workers and replication i always gets stream i of the seed,
+    so the result does not depend on the batch size or the number of workers.
+
+    Args:
+        kpi (str or Callable): "output" (the count of the last station, the palletizers),
+            "throughput" (its mean speed), the name of a station for its count, or a function of the actual
+            speeds of one replication, shape (time, station).
+        relative_precision (float): The target half-width relative to the mean.
+        confidence (float): The confidence level of the interval.
+        batch (int): The number of replications per batch, defaults to 4 per worker.
+        min_replications (int): The number of replications before the first check.
+        max_replications (int): The number of replications after which the run stops anyway.
+        workers (int): The number of worker processes, defaults to the number of CPUs.
+        seed (int): The seed of the whole run, fresh entropy is used if none is given.
+        capacities (Sequence[float]): The maximum capacity of the buffers between two stations
+            (Buffer_1 to Buffer_6), those of the topology if none are given.
+        crn (bool): Whether to use common random numbers, see run_sim.
+        topology (Topology): The layout of the line, see topology.py.
+        run_time (int): The number of minutes of every replication.
+
+    Returns:
+        pd.Series: The mean, the half-width and relative half-width of the interval, the
+            number of replications, whether the target was met and the KPI per replication.
+    """
+    from scipy import stats
+
+    if isinstance(kpi, str):
+        if kpi in KPIS:
+            kpi_function = KPIS[kpi]
+        elif kpi in topology.compiled.station_names:
+            station = topology.compiled.station_names.index(kpi)
+            kpi_function = lambda speeds: speeds[:, station].sum(dtype=np.float64)
+        else:
+            raise ValueError(f"Unknown KPI {kpi}, use one of {list(KPIS)} or a station")
+    else:
+        kpi_function = kpi
+    workers = workers or os.cpu_count()
+    batch = batch or 4 * workers
+    # Fix the entropy, so that every batch continues the same run
+    seed = np.random.SeedSequence(seed).entropy
+    values: List[float] = []
+    # One pool for all batches, so that the worker processes are only started once
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while True:
+            n = max(min_replications - len(values), batch)
+            n = min(n, max_replications - len(values))
+            for station_speeds in map_replications(
+                n,
+                workers,
+                seed,
+                "stations",
+                capacities,
+                len(values),
+                crn,
+                topology,
+                run_time,
+                executor=executor,
+            ):
+                values.append(kpi_function(station_speeds.speeds))
+            mean = np.mean(values)
+            half_width = (
+                stats.t.ppf((1 + confidence) / 2, len(values) - 1)
+                * np.std(values, ddof=1)
+                / np.sqrt(len(values))
+            )
+            converged = half_width <= relative_precision * abs(mean)
+            if converged or len(values) >= max_replications:
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return pd.Series(
         {
-            "Time": 0.00,
-            "Machine": "All",
-            "State": "Simulation start",
-            "Set speed": 0,
-            "Actual speed": 0,
-            "Count": 0,
-            "Tailback": 0,
-            "Lack": 0,
-            "Simulation": int(i + 1),
+            "KPI": kpi if isinstance(kpi, str) else getattr(kpi, "__name__", "kpi"),
+            "Mean": mean,
+            "Half-width": half_width,
+            "Relative half-width": half_width / abs(mean) if mean else np.inf,
+            "Confidence": confidence,
+            "Replications": len(values),
+            "Converged": converged,
+            "Values": np.array(values),
         }
     )
-    # Create environment and start the setup process
-    env = simpy.Environment()
-    run_sim(i)
-    print(datetime.now() - sim_start)
 
-# Show total time of all simulations
-print(f"The total runtime for {num_sim} is {datetime.now() - begin_time}")
 
-# Create a Pandas DataFrame from the event list
-log = pd.DataFrame(event_list)
+def collect_logs(
+    event_logs: Iterable[EventLog], sink: Optional[LogWriter] = None
+) -> Optional[EventLog]:
+    """
+    Merges the logs of the replications, or writes them to the sink one by one.
+
+    Args:
+        event_logs (Iterable[EventLog]): The logs in replication order.
+        sink (LogWriter): The writer that the logs are streamed to, if any.
+    """
+    if sink is None:
+        return EventLog.concat(event_logs)
+    for event_log in event_logs:
+        sink.write(event_log)
+    sink.flush()
+    return None
+
+
+if __name__ == "__main__":
+    begin_time = datetime.now()
+    # Number of simulations
+    num_sim = 10
+    event_log = run_replications(num_sim)
+
+    # Show total time of all simulations
+    print(f"The total runtime for {num_sim} is {datetime.now() - begin_time}")
 
-# Fill in the missing values in the "Simulation" column using forward filling
-log["Simulation"].ffill(inplace=True)
+    # Create a Pandas DataFrame from the event log
+    log = event_log.to_frame()
 
-# Save the log DataFrame to a CSV file
-log.to_csv("data/sim_log.csv")
+    # Save the log DataFrame to a CSV file
+    log.to_csv("data/sim_log.csv")
@@ -0,0 +1,187 @@
+import copy
+import os
+import numpy as np
+import simpy
+from dataclasses import dataclass, replace
+from functools import partial
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+from machine import MachineSnapshot
+from machineconfig import MachineConfig
+from simulation import build_line, map_in_order, new_recorder, seed_configs
+from topology import DEFAULT_TOPOLOGY, Topology
+
+
+@dataclass
+class LineSnapshot:
+    """
+    The state of the whole line between two minutes: the machines, the levels of all buffers
+    (Buffer_0 to Buffer_7) and the machine configurations with the state of their random number
+    generators. Runs that are forked from a snapshot continue at its time as if they had run
+    up to it.
+    """
+
+    time: int
+    machines: List[MachineSnapshot]
+    levels: List[float]
+    capacities: List[float]
+    configs: List[MachineConfig]
+    topology: Topology
+
+    def with_state(
+        self, machine: str, state_id: int, duration: Optional[int] = None
+    ) -> "LineSnapshot":
+        """
+        Returns a copy of the snapshot in which a machine has just switched to another state,
+        e.g. to see what happens after the filler goes down.
+
+        Args:
+            machine (str): The name of the machine.
+            state_id (int): The ID of the new state.
+            duration (int): The time in the new state, drawn when the run starts if None.
+
+        Raises:
+            KeyError: If the line has no machine with the given name.
+        """
+        names = [snapshot.name for snapshot in self.machines]
+        if machine not in names:
+            raise KeyError(f"Machine {machine} is not part of the line")
+        machines = list(self.machines)
+        i = names.index(machine)
+        # Check that the state exists, before any run is started
+        self.configs[i].state(state_id)
+        machines[i] = replace(
+            machines[i], state_id=state_id, last_state_switch=self.time, time_in_state=duration
+        )
+        return replace(self, machines=machines)
+
+
+def take_snapshot(
+    env: simpy.Environment, buffers, machines, configs, topology: Topology = DEFAULT_TOPOLOGY
+) -> LineSnapshot:
+    """
+    Returns the state of a line whose environment has run until the current minute, so that
+    the machines have not yet acted in this minute.
+
+    Args:
+        env (simpy.Environment): The simulation environment.
+        buffers (List[Buffer]): The buffers, as returned by build_line.
+        machines (List[Machine]): The machines, as returned by build_line.
+        configs (Sequence[MachineConfig]): The configurations of the machines. They are copied
+            with the state of their random number generators.
+        topology (Topology): The layout of the line.
+    """
+    return LineSnapshot(
+        env.now,
+        [machine.snapshot() for machine in machines],
+        [buffer.current_parts for buffer in buffers],
+        [buffers[b].max_capacity for b in topology.compiled.inner],
+        copy.deepcopy(list(configs)),
+        topology,
+    )
+
+
+def warm_up(
+    until: int,
+    seed: Optional[int] = None,
+    capacities: Optional[Sequence[float]] = None,
+    output: str = "stats",
+    topology: Topology = DEFAULT_TOPOLOGY,
+    resolution: Union[str, int] = "full",
+):
+    """
+    Runs the line from empty until the given minute and returns its snapshot.
+
+    Args:
+        until (int): The minute of the snapshot.
+        seed (int): The seed of the run, fresh entropy is used if none is given.
+        capacities (Sequence[float]): The maximum capacity of the buffers between two stations,
+            those of the topology if none are given.
+        output (str): The output of the warm-up, see simulation.run_sim.
+        topology (Topology): The layout of the line.
+        resolution (str or int): The resolution of the "log" output, see simulation.run_sim.
+
+    Returns:
+        snapshot (LineSnapshot): The state of the line at the given minute.
+        event_log: The recorder of the warm-up.
+    """
+    configs = copy.deepcopy(topology.configs)
+    seed_configs(configs, np.random.SeedSequence(seed))
+    env = simpy.Environment()
+    event_log = new_recorder(output, 0, until, topology, resolution)
+    buffers, machines = build_line(
+        env, event_log, capacities, configs=configs, until=until, topology=topology
+    )
+    env.run(until=until)
+    return take_snapshot(env, buffers, machines, configs, topology), event_log
+
+
+def run_fork(
+    i: int,
+    seed: Optional[np.random.SeedSequence],
+    snapshot: LineSnapshot,
+    until: int,
+    output: str = "log",
+    crn: bool = False,
+    resolution: Union[str, int] = "full",
+):
+    """
+    Continues the line from a snapshot until the given minute.
+
+    Args:
+        i (int): The simulation index of the continuation.
+        seed (np.random.SeedSequence): The seed of the continuation. If None, the continuation
+            draws exactly the random values that the run of the snapshot would have drawn.
+        snapshot (LineSnapshot): The state of the line to continue from.
+        until (int): The minute until which the continuation runs.
+        output (str): The output of the continuation, see simulation.run_sim. The times of the
+            output start at the time of the snapshot.
+        crn (bool): Whether to use common random numbers, see simulation.run_sim.
+        resolution (str or int): The resolution of the "log" output, see simulation.run_sim.
+            Aggregated intervals start at multiples of the interval, as in a run from minute 0.
+    """
+    configs = copy.deepcopy(snapshot.configs)
+    seed_configs(configs, seed, crn, snapshot.topology.compiled.machine_names)
+    env = simpy.Environment(initial_time=snapshot.time)
+    event_log = new_recorder(output, i, until, snapshot.topology, resolution)
+    buffers, machines = build_line(
+        env, event_log, snapshot.capacities, crn, configs, until, snapshot.topology
+    )
+    for buffer, level in zip(buffers, snapshot.levels):
+        buffer.current_parts = level
+    for machine, machine_snapshot in zip(machines, snapshot.machines):
+        machine.restore(machine_snapshot)
+    env.run(until=until)
+    return event_log
+
+
+def fork(
+    snapshot: LineSnapshot,
+    n: int,
+    until: int,
+    workers: Optional[int] = None,
+    seed: Optional[int] = None,
+    output: str = "log",
+    crn: bool = False,
+    resolution: Union[str, int] = "full",
+) -> Iterator:
+    """
+    Runs n independent continuations of a snapshot over a pool of worker processes and yields
+    their results in order. Every continuation draws from its own stream, spawned from the seed.
+
+    Args:
+        snapshot (LineSnapshot): The state of the line to continue from.
+        n (int): The number of continuations.
+        until (int): The minute until which the continuations run.
+        workers (int): The number of worker processes, defaults to the number of CPUs.
+            With 1 worker the continuations run in this process.
+        seed (int): The seed of the continuations, fresh entropy is used if none is given.
+        output (str): The output of every continuation, see simulation.run_sim.
+        crn (bool): Whether to use common random numbers, see simulation.run_sim.
+        resolution (str or int): The resolution of the "log" output, see simulation.run_sim.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(n)
+    workers = workers or os.cpu_count()
+    run = partial(
+        run_fork, snapshot=snapshot, until=until, output=output, crn=crn, resolution=resolution
+    )
+    yield from map_in_order(run, workers, range(n), seeds)
@@ -1,6 +1,7 @@
-import random
+import numpy as np
 from dataclasses import dataclass
 from typing import List, Dict, Callable, Union, Any, Tuple
+from sampler import AliasSampler
 
 
 @dataclass
@@ -19,13 +20,35 @@ class State:
 
     def __post_init__(self) -> None:
         self.state_population = list(self.transitions.keys())
-        self.weights = self.transitions.values()
+        self.weights = list(self.transitions.values())
+        self.transition_sampler = AliasSampler(self.state_population, self.weights)
+        # Whether the speed is always 0, as for randomGenerator(lambda: [0]), so that a machine
+        # in this state repeats the same minute until it switches state
+        self.zero_speed = getattr(self.speed, "constant", False) and self.speed.value == 0
+
+    def seed(self, random_state) -> None:
+        """
+        Makes the transitions, speeds and durations of the state draw from the given generator.
+        """
+        self.transition_sampler.random_state = random_state
+        self.speed.seed(random_state)
+        self.duration.seed(random_state)
+
+    def seed_streams(self, seed) -> None:
+        """
+        Gives the transitions, speeds and durations of the state separate generators, spawned
+        from the given SeedSequence in that order.
+        """
+        transition, speed, duration = (np.random.default_rng(child) for child in seed.spawn(3))
+        self.transition_sampler.random_state = transition
+        self.speed.seed(speed)
+        self.duration.seed(duration)
 
     def next_state_id(self) -> int:
         """
         Calls the next state the machine will be in
         """
-        return random.choices(self.state_population, self.weights, k=1)[0]
+        return self.transition_sampler.draw()
 
     def new_speed(self) -> Union[float, int]:
         """
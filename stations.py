@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+
+
+# The stations of the line in the order of the LP model, with the machines that work in parallel
+STATIONS: Dict[str, List[str]] = {
+    "Depalletizer": ["Depalletizer"],
+    "Filler": ["Filler"],
+    "Pasteurizer": ["Pasteurizer"],
+    "Labeler": ["Labeler_1", "Labeler_2"],
+    "Capper": ["Capper"],
+    "Packer": ["Packer"],
+    "Palletizer": ["Palletizer_1", "Palletizer_2"],
+}
+
+
+class StationSpeeds:
+    """
+    This class records the actual speed of every station per minute, which is the input of the LP model.
+
+    It is used in place of the EventLog: machines register their name and record every minute,
+    and the actual speeds of parallel machines are added up for their station.
+    """
+
+    def __init__(
+        self,
+        run_time: int,
+        simulation: int = 1,
+        stations: Dict[str, List[str]] = STATIONS,
+    ) -> None:
+        """
+        Args:
+            run_time (int): The number of minutes that is recorded.
+            simulation (int): The simulation index of the recorded replication.
+            stations (dict): The stations with the names of their machines.
+        """
+        self.simulation = simulation
+        self.stations = list(stations)
+        self.station_of = {
+            machine: s for s, machines in enumerate(stations.values()) for machine in machines
+        }
+        self.speeds = np.zeros((run_time, len(self.stations)), dtype=np.float32)
+
+    def register(self, name: str) -> int:
+        """
+        Returns the index of the station of the machine with the given name.
+
+        Raises:
+            KeyError: If the machine is not part of any station.
+        """
+        try:
+            return self.station_of[name]
+        except KeyError:
+            raise KeyError(f"Machine {name} is not part of any station") from None
+
+    def record(
+        self,
+        time: int,
+        machine: int,
+        state: int,
+        set_speed: float,
+        actual_speed: float,
+        count: float,
+        tailback: int,
+        lack: int,
+    ) -> None:
+        """
+        Adds the actual speed of a machine in one minute to its station, see EventLog.record.
+        """
+        self.speeds[time, machine] += actual_speed
+
+    def record_span(
+        self,
+        start: int,
+        stop: int,
+        machine: int,
+        state: int,
+        set_speed: float,
+        actual_speed: float,
+        count: float,
+        tailback: int,
+        lack: int,
+    ) -> None:
+        """
+        Adds the same actual speed for every minute from start up to stop, see EventLog.record_span.
+        """
+        self.speeds[start:stop, machine] += actual_speed
+
+
+def to_linprog_frame(
+    speeds: np.ndarray, stations: Dict[str, List[str]] = STATIONS
+) -> pd.DataFrame:
+    """
+    Returns a speed matrix in the layout of data/linprog_df.csv: a row per time and simulation
+    with the actual speed of every station.
+
+    Args:
+        speeds (np.ndarray): The actual speeds with shape (time, station, replication).
+        stations (dict): The stations along the second axis.
+    """
+    run_time, _, replications = speeds.shape
+    frame = pd.DataFrame(
+        {
+            "Time": np.tile(np.arange(run_time), replications),
+            "Simulation": np.repeat(np.arange(1, replications + 1), run_time),
+        }
+    )
+    for s, station in enumerate(stations):
+        frame[station] = speeds[:, s, :].T.ravel()
+    return frame
@@ -0,0 +1,460 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Tuple
+
+
+# The default bins of the actual speed of a machine: lowest edge, highest edge, number of bins.
+# The fastest machines of the line run at up to 1440 parts per minute, see speed_bins
+SPEED_BINS = (0.0, 1500.0, 60)
+
+# The default bins of the level of a buffer, as a fraction of its maximum capacity
+LEVEL_BINS = (0.0, 1.0, 20)
+
+
+def speed_bins(configs, width: float = 25.0) -> Tuple[float, float, int]:
+    """
+    Returns bins of the actual speed from 0 with the given width, at least as many as in
+    SPEED_BINS and enough that the highest speed of the machine configurations is counted in
+    a bin below the last one, which also counts all speeds above the highest edge. Speeds of
+    a continuous distribution have no highest value and are not taken into account.
+
+    Args:
+        configs (Sequence[MachineConfig]): The configurations of the machines.
+        width (float): The width of every bin.
+    """
+    highest = 0.0
+    for config in configs:
+        for state in config.states:
+            if state.speed.constant:
+                highest = max(highest, state.speed.value)
+            elif state.speed.sampler is not None:
+                highest = max(highest, max(state.speed.sampler.population))
+    n_bins = max(SPEED_BINS[2], int(highest // width) + 2)
+    return (0.0, n_bins * width, n_bins)
+
+
+class Welford:
+    """
+    This class keeps the count, mean and variance of a stream of values with Welford's
+    algorithm, and can be merged with another one with Chan's formula.
+    """
+
+    def __init__(self) -> None:
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value: float) -> None:
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    def add_batch(self, values: np.ndarray) -> None:
+        """
+        Adds an array of values at once.
+        """
+        if len(values):
+            batch = Welford()
+            batch.n = len(values)
+            batch.mean = float(values.mean())
+            batch.m2 = float(((values - batch.mean) ** 2).sum())
+            self.merge(batch)
+
+    def merge(self, other: "Welford") -> None:
+        """
+        Adds the values of another accumulator to this one.
+        """
+        if not other.n:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+
+    @property
+    def variance(self) -> float:
+        """
+        The sample variance, NaN for less than 2 values.
+        """
+        return self.m2 / (self.n - 1) if self.n > 1 else np.nan
+
+    @property
+    def std(self) -> float:
+        return np.sqrt(self.variance)
+
+
+class Histogram:
+    """
+    This class counts values in bins of equal width between a lowest and highest edge. Values
+    below the lowest edge are counted in the first bin and values above the highest edge in
+    the last bin.
+    """
+
+    def __init__(self, bins: Tuple[float, float, int]) -> None:
+        """
+        Args:
+            bins (tuple): The lowest edge, the highest edge and the number of bins.
+        """
+        self.bins = tuple(bins)
+        self.counts = np.zeros(self.bins[2], dtype=np.int64)
+
+    @property
+    def edges(self) -> np.ndarray:
+        return np.linspace(self.bins[0], self.bins[1], self.bins[2] + 1)
+
+    def add_batch(self, values: np.ndarray) -> None:
+        """
+        Adds an array of values at once.
+        """
+        low, high, n_bins = self.bins
+        b = np.clip(((values - low) * (n_bins / (high - low))).astype(np.int64), 0, n_bins - 1)
+        self.counts += np.bincount(b, minlength=n_bins)
+
+    def merge(self, other: "Histogram") -> None:
+        """
+        Adds the counts of another histogram with the same bins to this one.
+        """
+        if other.bins != self.bins:
+            raise ValueError("Only histograms with the same bins can be merged")
+        self.counts += other.counts
+
+
+class MachineStats:
+    """
+    The accumulators of one machine: its count per replication, actual speed, state occupancy
+    and the number of minutes with a tailback or lack.
+
+    Every minute only appends to the pending lists, which are folded into the accumulators
+    with NumPy once ``FOLD_SIZE`` minutes are pending, and before the statistics are read,
+    merged or pickled.
+    """
+
+    FOLD_SIZE = 4096
+
+    def __init__(self, name: str, speed_bins: Tuple[float, float, int] = SPEED_BINS) -> None:
+        self.name = name
+        self.minutes = 0
+        self.count = 0.0
+        # The count at the end of every replication that was merged into this one
+        self.counts = Welford()
+        self.actual_speed = Welford()
+        self.speed_histogram = Histogram(speed_bins)
+        self.states: Dict[int, int] = {}
+        self.tailback = 0
+        self.lack = 0
+        self.pending_speeds: List[float] = []
+        self.pending_states: List[int] = []
+
+    def fold(self) -> None:
+        """
+        Adds the pending minutes to the accumulators.
+        """
+        if not self.pending_speeds:
+            return
+        speeds = np.array(self.pending_speeds, dtype=float)
+        self.minutes += len(speeds)
+        self.actual_speed.add_batch(speeds)
+        self.speed_histogram.add_batch(speeds)
+        for state, minutes in zip(*np.unique(self.pending_states, return_counts=True)):
+            self.states[int(state)] = self.states.get(int(state), 0) + int(minutes)
+        self.pending_speeds = []
+        self.pending_states = []
+
+    def merge(self, other: "MachineStats") -> None:
+        self.fold()
+        other.fold()
+        self.minutes += other.minutes
+        self.count += other.count
+        self.counts.merge(other.counts)
+        self.actual_speed.merge(other.actual_speed)
+        self.speed_histogram.merge(other.speed_histogram)
+        for state, minutes in other.states.items():
+            self.states[state] = self.states.get(state, 0) + minutes
+        self.tailback += other.tailback
+        self.lack += other.lack
+
+
+class BufferStats:
+    """
+    The accumulators of one buffer, updated by the buffer on every put and get: the level
+    after every put, the parts that went in and out, and how often it was full or empty.
+    The levels are folded like the minutes of MachineStats.
+    """
+
+    FOLD_SIZE = 4096
+
+    def __init__(
+        self, name: str, max_capacity: float, level_bins: Tuple[float, float, int] = LEVEL_BINS
+    ) -> None:
+        self.name = name
+        self.max_capacity = max_capacity
+        self.level = Welford()
+        self.level_histogram = Histogram(level_bins)
+        self.parts_in = 0.0
+        self.parts_out = 0.0
+        self.gets = 0
+        self.full = 0
+        self.empty = 0
+        self.pending_levels: List[float] = []
+
+    @property
+    def puts(self) -> int:
+        return self.level.n + len(self.pending_levels)
+
+    def put(self, amount: float, result_in: float, level: float) -> None:
+        """
+        Adds a put of ``amount`` parts, of which ``result_in`` fitted, after which the buffer
+        holds ``level`` parts.
+        """
+        self.parts_in += result_in
+        if result_in < amount:
+            self.full += 1
+        pending = self.pending_levels
+        pending.append(level)
+        if len(pending) >= self.FOLD_SIZE:
+            self.fold()
+
+    def get(self, amount: float, result_out: float) -> None:
+        """
+        Adds a get of ``amount`` parts, of which ``result_out`` were available.
+        """
+        self.gets += 1
+        self.parts_out += result_out
+        if result_out < amount:
+            self.empty += 1
+
+    def fold(self) -> None:
+        """
+        Adds the pending levels to the accumulators.
+        """
+        if not self.pending_levels:
+            return
+        levels = np.array(self.pending_levels, dtype=float)
+        self.level.add_batch(levels)
+        self.level_histogram.add_batch(levels / self.max_capacity)
+        self.pending_levels = []
+
+    def merge(self, other: "BufferStats") -> None:
+        self.fold()
+        other.fold()
+        self.level.merge(other.level)
+        self.level_histogram.merge(other.level_histogram)
+        self.parts_in += other.parts_in
+        self.parts_out += other.parts_out
+        self.gets += other.gets
+        self.full += other.full
+        self.empty += other.empty
+
+
+class StatsRecorder:
+    """
+    This class keeps streaming statistics of the machines and buffers instead of a log.
+
+    It is used in place of the EventLog: machines register their name and record every minute,
+    which only updates a few accumulators. Buffers that are tracked update their own
+    accumulators. Recorders of several replications, e.g. from worker processes, are merged
+    with ``merge``, and the result does not depend on the order of merging.
+    """
+
+    def __init__(
+        self,
+        simulation: int = 1,
+        speed_bins: Tuple[float, float, int] = SPEED_BINS,
+        level_bins: Tuple[float, float, int] = LEVEL_BINS,
+    ) -> None:
+        """
+        Args:
+            simulation (int): The simulation index of the recorded replication.
+            speed_bins (tuple): The lowest edge, highest edge and number of bins of the
+                histogram of the actual speed.
+            level_bins (tuple): The same for the buffer level, as a fraction of the maximum
+                capacity.
+        """
+        self.simulation = simulation
+        self.speed_bins = speed_bins
+        self.level_bins = level_bins
+        self.replications = 1
+        self.machines: List[MachineStats] = []
+        self.buffers: List[BufferStats] = []
+
+    def register(self, name: str) -> int:
+        """
+        Returns the code of the machine with the given name, adding it if it is new.
+        """
+        for code, machine in enumerate(self.machines):
+            if machine.name == name:
+                return code
+        self.machines.append(MachineStats(name, self.speed_bins))
+        return len(self.machines) - 1
+
+    def track(self, buffer) -> None:
+        """
+        Makes the given buffer update accumulators of its own in this recorder.
+
+        Args:
+            buffer (Buffer): The buffer, with a finite maximum capacity.
+        """
+        buffer.stats = BufferStats(buffer.id, buffer.max_capacity, self.level_bins)
+        self.buffers.append(buffer.stats)
+
+    def record(
+        self,
+        time: int,
+        machine: int,
+        state: int,
+        set_speed: float,
+        actual_speed: float,
+        count: float,
+        tailback: int,
+        lack: int,
+    ) -> None:
+        """
+        Adds the event of one machine in one minute to its accumulators, see EventLog.record.
+        """
+        stats = self.machines[machine]
+        stats.count = count
+        stats.tailback += tailback
+        stats.lack += lack
+        stats.pending_states.append(state)
+        pending = stats.pending_speeds
+        pending.append(actual_speed)
+        if len(pending) >= stats.FOLD_SIZE:
+            stats.fold()
+
+    def record_span(
+        self,
+        start: int,
+        stop: int,
+        machine: int,
+        state: int,
+        set_speed: float,
+        actual_speed: float,
+        count: float,
+        tailback: int,
+        lack: int,
+    ) -> None:
+        """
+        Adds the same event for every minute from start up to stop, see EventLog.record_span.
+        """
+        n = stop - start
+        stats = self.machines[machine]
+        stats.count = count
+        stats.tailback += n * tailback
+        stats.lack += n * lack
+        stats.pending_states.extend([state] * n)
+        stats.pending_speeds.extend([actual_speed] * n)
+        if len(stats.pending_speeds) >= stats.FOLD_SIZE:
+            stats.fold()
+
+    def fold(self) -> None:
+        """
+        Adds the pending minutes and levels of all machines and buffers to their accumulators.
+        """
+        for stats in self.machines + self.buffers:
+            stats.fold()
+
+    def __getstate__(self):
+        # Only the accumulators are sent back from worker processes
+        self.fold()
+        return self.__dict__
+
+    @classmethod
+    def merge(cls, recorders: Iterable["StatsRecorder"]) -> "StatsRecorder":
+        """
+        Returns a single recorder with the statistics of the given recorders.
+
+        Machines and buffers are matched by name. The count of a machine becomes the total
+        over the replications, and its ``counts`` hold the count per replication.
+
+        Args:
+            recorders (Iterable[StatsRecorder]): The recorders, e.g. of several replications.
+        """
+        result = None
+        for recorder in recorders:
+            if result is None:
+                result = cls(recorder.simulation, recorder.speed_bins, recorder.level_bins)
+                result.replications = 0
+            result.replications += recorder.replications
+            for machine in recorder.machines:
+                merged = result.machines[result.register(machine.name)]
+                merged.merge(machine)
+                if recorder.replications == 1:
+                    merged.counts.add(machine.count)
+            for buffer in recorder.buffers:
+                merged = next((b for b in result.buffers if b.name == buffer.name), None)
+                if merged is None:
+                    merged = BufferStats(buffer.name, buffer.max_capacity, result.level_bins)
+                    result.buffers.append(merged)
+                merged.merge(buffer)
+        return result if result is not None else cls()
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Returns the statistics per machine: the mean and standard deviation of the count per
+        replication and of the actual speed per minute, the fraction of the minutes with a
+        tailback or lack and the fraction of the minutes in every state.
+        """
+        self.fold()
+        states = sorted({state for machine in self.machines for state in machine.states})
+        rows = []
+        for machine in self.machines:
+            counts = machine.counts
+            if not counts.n:
+                counts = Welford()
+                counts.add(machine.count)
+            row = {
+                "Machine": machine.name,
+                "Replications": counts.n,
+                "Mean count": counts.mean,
+                "SD count": counts.std,
+                "Mean actual speed": machine.actual_speed.mean,
+                "SD actual speed": machine.actual_speed.std,
+                "Tailback": machine.tailback / machine.minutes if machine.minutes else np.nan,
+                "Lack": machine.lack / machine.minutes if machine.minutes else np.nan,
+            }
+            for state in states:
+                row[f"State {state}"] = (
+                    machine.states.get(state, 0) / machine.minutes if machine.minutes else np.nan
+                )
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def buffers_frame(self) -> pd.DataFrame:
+        """
+        Returns the statistics per tracked buffer: the mean and standard deviation of the level
+        after a put, the mean fill fraction, the parts in and out per replication and the
+        fraction of the puts that found the buffer full and of the gets that found it empty.
+        """
+        self.fold()
+        return pd.DataFrame(
+            [
+                {
+                    "Buffer": buffer.name,
+                    "Mean level": buffer.level.mean,
+                    "SD level": buffer.level.std,
+                    "Mean fill": buffer.level.mean / buffer.max_capacity,
+                    "Parts in": buffer.parts_in / self.replications,
+                    "Parts out": buffer.parts_out / self.replications,
+                    "Full": buffer.full / buffer.puts if buffer.puts else np.nan,
+                    "Empty": buffer.empty / buffer.gets if buffer.gets else np.nan,
+                }
+                for buffer in self.buffers
+            ]
+        )
+
+    def histograms(self) -> Dict[str, pd.Series]:
+        """
+        Returns the histogram of the actual speed of every machine and of the fill fraction
+        of every tracked buffer, indexed by the left edge of the bins.
+        """
+        self.fold()
+        result = {}
+        for machine in self.machines:
+            histogram = machine.speed_histogram
+            result[machine.name] = pd.Series(histogram.counts, index=histogram.edges[:-1])
+        for buffer in self.buffers:
+            histogram = buffer.level_histogram
+            result[buffer.name] = pd.Series(histogram.counts, index=histogram.edges[:-1])
+        return result
@@ -0,0 +1,48 @@
+import numpy as np
+from buffersearch import ResultCache, evaluate_design
+from machineparams import MACHINES
+from simulation import map_replications
+from topology import BufferSpec, MachineSpec, StationSpec, Topology
+
+REPLICATIONS = 3
+CAPACITIES = [200, 300]
+
+# A line of three stations, whose last station is the Packer
+SHORT_LINE = Topology(
+    "Short line",
+    [
+        BufferSpec("Source", initial_parts=np.inf),
+        BufferSpec("B1"),
+        BufferSpec("B2"),
+        BufferSpec("Sink"),
+    ],
+    [
+        StationSpec("Filler", [MachineSpec("Filler", MACHINES["Filler"], 128)], "Source", "B1"),
+        StationSpec("Capper", [MachineSpec("Capper", MACHINES["Capper"], 128)], "B1", "B2"),
+        StationSpec("Packer", [MachineSpec("Packer", MACHINES["Packer"], 128)], "B2", "Sink"),
+    ],
+)
+
+
+def test_cache_is_keyed_on_topology(tmp_path):
+    default = ResultCache(str(tmp_path))
+    short = ResultCache(str(tmp_path), SHORT_LINE)
+    assert default.path(CAPACITIES, 0) != short.path(CAPACITIES, 0)
+    short.update(CAPACITIES, 0, {0: 1.0})
+    assert default.get(CAPACITIES, 0) == {}
+    assert short.get(CAPACITIES, 0) == {0: 1.0}
+
+
+def test_output_of_last_station(tmp_path):
+    cache = ResultCache(str(tmp_path), SHORT_LINE)
+    outputs = evaluate_design(CAPACITIES, REPLICATIONS, 0, 1, cache, SHORT_LINE)
+    runs = map_replications(
+        REPLICATIONS, 1, 0, "stations", CAPACITIES, crn=True, topology=SHORT_LINE
+    )
+    expected = [run.speeds[:, run.stations.index("Packer")].sum(dtype=np.float64) for run in runs]
+    assert np.all(outputs > 0)
+    np.testing.assert_array_equal(outputs, expected)
+    # The second time the outputs come from the cache
+    cached = evaluate_design(CAPACITIES, REPLICATIONS, 0, 1, cache, SHORT_LINE)
+    np.testing.assert_array_equal(cached, outputs)
+    assert cache.get(CAPACITIES, 0).keys() == set(range(REPLICATIONS))
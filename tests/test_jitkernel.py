@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+import jitkernel
+from test_vectorized import RUN_TIME, deterministic_topology
+from vectorized import run_vectorized
+
+# The kernel and the simpy engine draw different random values, so their means only agree
+# within their standard errors
+MAX_Z = 4.0
+
+
+@pytest.mark.skipif(jitkernel.njit is None, reason="numba is not installed")
+def test_crosscheck_kernel():
+    frame = jitkernel.crosscheck(100, seed=0, workers=1, fallback=False)
+    assert len(frame) == 9
+    assert np.all(np.abs(frame["z"]) < MAX_Z), frame
+
+
+def test_crosscheck_fallback(monkeypatch):
+    # Without numba the kernel falls back to the NumPy engine
+    monkeypatch.setattr(jitkernel, "njit", None)
+    frame = jitkernel.crosscheck(100, seed=0, workers=1)
+    assert np.all(np.abs(frame["z"]) < MAX_Z), frame
+
+
+def test_kernel_matches_numpy_engine():
+    # Without randomness the kernel has to follow the NumPy engine minute by minute
+    topology = deterministic_topology()
+    kernel = jitkernel.run_compiled(2, RUN_TIME, record=True, topology=topology, fallback=False)
+    engine = run_vectorized(2, RUN_TIME, record=True, topology=topology)
+    assert np.array_equal(kernel.count, engine.count)
+    assert np.array_equal(kernel.buffer_levels, engine.buffer_levels)
+    for key, values in engine.history.items():
+        assert np.array_equal(kernel.history[key], values), key
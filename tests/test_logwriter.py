@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+from eventlog import AggregateLog, EventLog
+from simulation import run_sim
+
+pytest.importorskip("pyarrow")
+from logwriter import LogWriter, read_log  # noqa: E402
+
+
+def test_write_rejects_other_log_type(tmp_path):
+    log = run_sim(0, np.random.SeedSequence(0), "log", run_time=120, resolution=60)
+    with LogWriter(str(tmp_path / "log.parquet")) as sink:
+        with pytest.raises(ValueError, match="AggregateLog"):
+            sink.write(log)
+    with LogWriter(str(tmp_path / "full.parquet"), log_type=AggregateLog) as sink:
+        with pytest.raises(ValueError, match="EventLog"):
+            sink.write(EventLog())
+
+
+def test_write_aggregate_log(tmp_path):
+    log = run_sim(0, np.random.SeedSequence(0), "log", run_time=120, resolution=60)
+    path = str(tmp_path / "log.parquet")
+    with LogWriter(path, log_type=AggregateLog) as sink:
+        sink.write(log)
+    frame = read_log(path, log_type=AggregateLog)
+    expected = log.to_frame()
+    np.testing.assert_array_equal(frame["Minutes"], expected["Minutes"])
+    np.testing.assert_array_equal(frame["Tailback"], expected["Tailback"])
@@ -0,0 +1,168 @@
+import sys
+import numpy as np
+import pytest
+from scipy.optimize import linprog
+from lpmodel import (
+    aggregate_speeds,
+    budget_frontier,
+    build_buffer_lp,
+    evaluate_capacities,
+    optimize_buffers,
+    optimize_buffers_coarse,
+    optimize_buffers_stochastic,
+    solve_highs,
+)
+from simulation import run_station_speeds
+
+RUN_TIME = 40
+REPLICATIONS = 3
+BUDGET = 5000
+BUDGETS = [100, 300, 1000, 2000, 5000]
+CAPACITIES = np.array([400.0, 800.0, 600.0, 500.0, 700.0, 1000.0])
+
+# The actual speed per station, shape (time, station, replication)
+SPEEDS = run_station_speeds(REPLICATIONS, workers=1, seed=0, run_time=RUN_TIME)
+
+
+def pspeed(sim=0):
+    return SPEEDS[:, :, sim].T.astype(float)
+
+
+def solve_dense(pspeed, maximum_capacity_all_buffers, capacities=None):
+    """
+    Builds the model of LP_model.ipynb one constraint at a time into dense matrices, with the
+    throughput of machine i balanced with buffer i only, and returns its objective.
+    """
+    machines = list(range(1, pspeed.shape[0] + 1))
+    times = list(range(pspeed.shape[1]))
+    buffers = list(range(len(machines) + 1))
+    index = {}
+    for i in machines:
+        for t in times:
+            index["th", i, t] = len(index)
+    for j in buffers:
+        for t in times:
+            index["buffer", j, t] = len(index)
+    for j in buffers:
+        index["max_cap_buffer", j] = len(index)
+    index["obj"] = len(index)
+    ub, b_ub, eq, b_eq = [], [], [], []
+
+    def row(rows, rhs, value, *terms):
+        coefficients = np.zeros(len(index))
+        for coefficient, key in terms:
+            coefficients[index[key]] += coefficient
+        rows.append(coefficients)
+        rhs.append(value)
+
+    last = machines[-1]
+    for t in times:
+        row(ub, b_ub, pspeed[last - 1, t], (1, ("th", last, t)))
+        row(ub, b_ub, 0, (1, ("th", last, t)), (-1, ("buffer", last, t)))
+        row(eq, b_eq, 0, (1, ("th", last, t)), (-1, ("buffer", last, t)))
+    for j in buffers[1:-1]:
+        for t in times:
+            row(ub, b_ub, 0, (1, ("buffer", j, t)), (-1, ("max_cap_buffer", j)))
+    for j in buffers[1:-1]:
+        for t in times[1:]:
+            row(ub, b_ub, pspeed[j - 1, t], (1, ("buffer", j, t)), (-1, ("buffer", j, t - 1)), (1, ("th", j + 1, t)))
+            row(ub, b_ub, 0, (1, ("buffer", j, t)), (-1, ("buffer", j, t - 1)), (1, ("th", j + 1, t)), (-1, ("buffer", j - 1, t - 1)))
+    for i in machines[:-1]:
+        for t in times[1:]:
+            row(eq, b_eq, 0, (1, ("th", i, t)), (-1, ("buffer", i, t)), (1, ("buffer", i, t - 1)), (-1, ("th", i + 1, t)))
+    row(ub, b_ub, maximum_capacity_all_buffers, *((1, ("max_cap_buffer", j)) for j in buffers[1:-1]))
+    if capacities is not None:
+        for j, capacity in zip(buffers[1:-1], capacities):
+            row(eq, b_eq, capacity, (1, ("max_cap_buffer", j)))
+    row(ub, b_ub, 0, (1, "obj"), *((-1, ("buffer", last, t)) for t in times))
+    c = np.zeros(len(index))
+    c[index["obj"]] = -1
+    result = linprog(c, A_ub=np.array(ub), b_ub=b_ub, A_eq=np.array(eq), b_eq=b_eq, method="highs")
+    assert result.success, result.message
+    return -result.fun
+
+
+@pytest.mark.parametrize("sim", range(REPLICATIONS))
+def test_sparse_model_matches_dense_model(sim):
+    solution = solve_highs(build_buffer_lp(pspeed(sim), BUDGET))
+    assert solution.optimal
+    assert solution.objective == pytest.approx(solve_dense(pspeed(sim), BUDGET), rel=1e-9)
+
+
+def test_fixed_capacities_match_dense_model():
+    solution = solve_highs(build_buffer_lp(pspeed(), BUDGET, CAPACITIES))
+    assert solution.optimal
+    assert solution.objective == pytest.approx(
+        solve_dense(pspeed(), BUDGET, CAPACITIES), rel=1e-9
+    )
+
+
+def test_stochastic_model_with_one_scenario():
+    single = optimize_buffers(SPEEDS[:, :, :1], BUDGET)
+    stochastic = optimize_buffers_stochastic(SPEEDS[:, :, :1], BUDGET)
+    assert stochastic["Objective"] == pytest.approx(single["Objective"][0], rel=1e-9)
+
+
+def fixed_objectives(capacities):
+    return [
+        solve_highs(build_buffer_lp(pspeed(sim), BUDGET, capacities)).objective
+        for sim in range(REPLICATIONS)
+    ]
+
+
+def test_stochastic_model_shares_capacities():
+    # With fixed capacities the scenarios are independent, so the objective is their mean
+    stochastic = solve_highs(
+        build_buffer_lp(SPEEDS.transpose(2, 1, 0).astype(float), BUDGET, CAPACITIES)
+    )
+    assert stochastic.objective == pytest.approx(np.mean(fixed_objectives(CAPACITIES)), rel=1e-9)
+    # The shared design reaches its objective in every scenario, which cannot beat the
+    # design of every scenario on its own
+    design = optimize_buffers_stochastic(SPEEDS, BUDGET)
+    capacities = design[[f"Buffer {j}" for j in range(1, 7)]].to_numpy(dtype=float)
+    assert capacities.sum() <= BUDGET * (1 + 1e-9)
+    assert design["Objective"] == pytest.approx(np.mean(fixed_objectives(capacities)), rel=1e-6)
+    assert design["Objective"] <= optimize_buffers(SPEEDS, BUDGET)["Objective"].mean() * (1 + 1e-9)
+
+
+@pytest.mark.parametrize("highspy", [True, False])
+def test_warm_frontier_matches_cold_solves(highspy, monkeypatch):
+    if not highspy:
+        # Without highspy every budget is solved from scratch with scipy
+        monkeypatch.setitem(sys.modules, "highspy", None)
+    frontier = budget_frontier(SPEEDS, BUDGETS)
+    stacked = SPEEDS.transpose(2, 1, 0).astype(float)
+    cold = [solve_highs(build_buffer_lp(stacked, budget)).objective for budget in BUDGETS]
+    np.testing.assert_allclose(frontier["Objective"], cold, rtol=1e-7)
+    assert np.all(np.diff(frontier["Objective"]) >= -1e-6)
+    # The budget is only worth something while it binds
+    used = frontier[[f"Buffer {j}" for j in range(1, 7)]].sum(axis=1)
+    assert np.all(used <= frontier["Budget"] * (1 + 1e-9))
+    assert np.all(frontier["Dual budget"][used < frontier["Budget"] * (1 - 1e-6)] <= 1e-9)
+
+
+def test_aggregate_speeds_keeps_totals():
+    coarse = aggregate_speeds(pspeed(), 15)
+    assert coarse.shape == (7, 3)
+    np.testing.assert_allclose(coarse.sum(axis=1), pspeed().sum(axis=1))
+
+
+@pytest.mark.parametrize("lookahead", [0, 5, None])
+def test_rolling_horizon_is_feasible(lookahead):
+    # Every window has to be feasible with the levels that the previous window left
+    result = optimize_buffers_coarse(SPEEDS, 5, BUDGET, window=10, lookahead=lookahead, exact=True)
+    capacities = result[[f"Buffer {j}" for j in range(1, 7)]].to_numpy(dtype=float)
+    assert capacities.sum() <= BUDGET * (1 + 1e-9)
+    assert 0 < result["Refined objective"] <= result["Exact objective"] * (1 + 1e-9)
+    assert result["Coarsening gap"] >= -1e-9
+    assert result["Gap"] == pytest.approx(
+        1 - (1 - result["Coarsening gap"]) * (1 - result["Rolling gap"])
+    )
+
+
+def test_single_window_is_whole_horizon():
+    stacked = SPEEDS.transpose(2, 1, 0).astype(float)
+    whole = evaluate_capacities(stacked, CAPACITIES)
+    assert evaluate_capacities(stacked, CAPACITIES, window=RUN_TIME) == pytest.approx(whole)
+    fixed = solve_highs(build_buffer_lp(stacked, BUDGET, CAPACITIES)).objective
+    assert whole == pytest.approx(fixed)
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+import simpy
+from machine import Machine
+from simulation import build_line, new_recorder, seed_configs
+from topology import DEFAULT_TOPOLOGY
+
+RUN_TIME = 240
+SEEDS = [0, 1, 2]
+
+
+def run(seed, output, resolution, skip):
+    # With a known end the machines skip the minutes of zero-speed states, without they step
+    configs = DEFAULT_TOPOLOGY.configs
+    seed_configs(configs, np.random.SeedSequence(seed))
+    env = simpy.Environment()
+    recorder = new_recorder(output, 1, RUN_TIME, DEFAULT_TOPOLOGY, resolution)
+    _, machines = build_line(env, recorder, until=RUN_TIME if skip else None)
+    env.run(until=RUN_TIME)
+    return recorder, machines
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("resolution", ["full", "changes", 60])
+def test_skipping_keeps_log(seed, resolution):
+    stepped, _ = run(seed, "log", resolution, skip=False)
+    skipped, _ = run(seed, "log", resolution, skip=True)
+    pd.testing.assert_frame_equal(skipped.to_frame(), stepped.to_frame())
+
+
+def test_skipping_keeps_station_speeds_and_levels():
+    stepped, _ = run(SEEDS[0], "stations", "full", skip=False)
+    skipped, _ = run(SEEDS[0], "stations", "full", skip=True)
+    assert np.array_equal(skipped.speeds, stepped.speeds)
+    stepped, _ = run(SEEDS[0], "levels", "full", skip=False)
+    skipped, _ = run(SEEDS[0], "levels", "full", skip=True)
+    assert np.array_equal(skipped.levels, stepped.levels)
+
+
+def test_minutes_are_skipped(monkeypatch):
+    skipped = []
+    record_idle = Machine.record_idle
+    monkeypatch.setattr(
+        Machine,
+        "record_idle",
+        lambda machine, minutes: skipped.append(minutes) or record_idle(machine, minutes),
+    )
+    run(SEEDS[0], "log", "full", skip=True)
+    assert sum(skipped) > len(skipped)
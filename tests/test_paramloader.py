@@ -0,0 +1,50 @@
+import os
+import pickle
+import numpy as np
+import paramloader
+from paramloader import build_configs, load_machine_configs, read_params
+
+PARAMS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "machineparams.toml")
+
+
+def draws(configs, seed=0):
+    # Unseeded, as the line draws by default
+    np.random.seed(seed)
+    return [
+        (state.next_state_id(), state.new_speed(), state.new_duration())
+        for config in configs.values()
+        for state in config.states
+    ]
+
+
+def built():
+    return build_configs(read_params(PARAMS))
+
+
+def test_cache_is_used(tmp_path):
+    load_machine_configs(PARAMS, str(tmp_path))
+    assert len(os.listdir(tmp_path)) == 1
+    assert draws(load_machine_configs(PARAMS, str(tmp_path))) == draws(built())
+
+
+def test_outdated_cache_is_rebuilt(tmp_path):
+    load_machine_configs(PARAMS, str(tmp_path))
+    (cache_file,) = tmp_path.iterdir()
+    # A sampler pickled with an older layout, which unpickles fine but fails on the first draw
+    with open(cache_file, "rb") as file:
+        stale = pickle.load(file)
+    for config in stale.values():
+        for state in config.states:
+            del state.transition_sampler.cursor
+            del state.transition_sampler._random_state
+    with open(cache_file, "wb") as file:
+        pickle.dump(stale, file)
+    assert draws(load_machine_configs(PARAMS, str(tmp_path))) == draws(built())
+    assert draws(load_machine_configs(PARAMS, str(tmp_path))) == draws(built())
+
+
+def test_cache_key_depends_on_code(tmp_path, monkeypatch):
+    load_machine_configs(PARAMS, str(tmp_path))
+    monkeypatch.setattr(paramloader, "code_fingerprint", lambda: "changed")
+    load_machine_configs(PARAMS, str(tmp_path))
+    assert len(os.listdir(tmp_path)) == 2
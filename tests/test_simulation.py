@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+import simulation
+from simulation import run_replications, run_until_precision
+
+REPLICATIONS = 6
+RUN_TIME = 60
+
+
+def test_replications_do_not_depend_on_workers():
+    # Every replication draws from its own seed, whichever process runs it
+    single = run_replications(REPLICATIONS, workers=1, seed=7, run_time=RUN_TIME).to_frame()
+    pooled = run_replications(REPLICATIONS, workers=3, seed=7, run_time=RUN_TIME).to_frame()
+    assert single["Simulation"].nunique() == REPLICATIONS
+    pd.testing.assert_frame_equal(pooled, single)
+
+
+def test_seeds_differ_per_replication():
+    frame = run_replications(2, workers=1, seed=7, run_time=RUN_TIME).to_frame()
+    first, second = (group.drop(columns="Simulation") for _, group in frame.groupby("Simulation"))
+    assert not first.reset_index(drop=True).equals(second.reset_index(drop=True))
+
+
+def test_precision_run_starts_one_pool(monkeypatch):
+    pools = []
+
+    class CountingPool(ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            pools.append(self)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(simulation, "ProcessPoolExecutor", CountingPool)
+    # A precision that is never met, so that every batch runs
+    kwargs = dict(
+        relative_precision=0,
+        batch=2,
+        min_replications=2,
+        max_replications=6,
+        seed=3,
+        run_time=RUN_TIME,
+    )
+    pooled = run_until_precision(workers=2, **kwargs)
+    assert len(pools) == 1
+    single = run_until_precision(workers=1, **kwargs)
+    assert pooled["Replications"] == single["Replications"] == 6
+    np.testing.assert_array_equal(pooled["Values"], single["Values"])
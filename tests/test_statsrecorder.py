@@ -0,0 +1,34 @@
+import numpy as np
+from simulation import MACHINE_CONFIGS, run_statistics
+from statsrecorder import SPEED_BINS, Histogram, speed_bins
+
+
+def top_speed(configs):
+    speeds = [
+        state.speed.value if state.speed.constant else max(state.speed.sampler.population)
+        for config in configs
+        for state in config.states
+        if state.speed.constant or state.speed.sampler is not None
+    ]
+    return max(speeds)
+
+
+def test_top_speed_below_last_bin():
+    highest = top_speed(MACHINE_CONFIGS)
+    assert highest > 1000
+    for bins in (SPEED_BINS, speed_bins(MACHINE_CONFIGS)):
+        histogram = Histogram(bins)
+        histogram.add_batch(np.array([highest]))
+        assert np.argmax(histogram.counts) < bins[2] - 1
+
+
+def test_speed_bins_grow_with_configs():
+    low, high, n_bins = speed_bins(MACHINE_CONFIGS, width=10.0)
+    assert low == 0.0 and high == n_bins * 10.0
+    assert high > top_speed(MACHINE_CONFIGS) + 10.0
+
+
+def test_statistics_do_not_clip_speeds():
+    stats = run_statistics(2, workers=1, seed=0)
+    for machine in stats.machines:
+        assert machine.speed_histogram.counts[-1] == 0
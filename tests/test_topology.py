@@ -0,0 +1,70 @@
+import copy
+from dataclasses import replace
+import numpy as np
+from machineparams import MACHINES
+from simulation import run_sim
+from topology import build_topology
+
+# Two filling machines in parallel that share the configuration of the filler
+SHARED = {
+    "name": "Shared",
+    "buffer": [
+        {"name": "Source", "initial_parts": float("inf")},
+        {"name": "Sink"},
+    ],
+    "station": [
+        {
+            "name": "Filler",
+            "in": "Source",
+            "out": "Sink",
+            "initial_state": 128,
+            "machines": [
+                {"name": "Filler_1", "config": "Filler"},
+                {"name": "Filler_2", "config": "Filler"},
+            ],
+        }
+    ],
+}
+
+
+def test_shared_config_is_copied():
+    topology = build_topology(SHARED, MACHINES)
+    first, second = topology.configs
+    assert first is not second
+    assert first.name == second.name == "Filler"
+
+
+def test_shared_config_draws_own_values():
+    topology = build_topology(SHARED, MACHINES)
+    for crn in (False, True):
+        log = run_sim(
+            0, np.random.SeedSequence(3), "log", crn=crn, topology=topology, run_time=2000
+        ).to_frame()
+        speeds = [
+            log.loc[log["Machine"] == name, "Actual speed"].to_numpy()
+            for name in ("Filler_1", "Filler_2")
+        ]
+        assert not np.array_equal(*speeds)
+
+
+def test_crn_streams_keyed_by_machine():
+    # Separate copies of one configuration still have the same name
+    topology = build_topology(SHARED, MACHINES)
+    stations = [
+        replace(
+            station,
+            machines=[
+                replace(machine, config=copy.deepcopy(MACHINES["Filler"]))
+                for machine in station.machines
+            ],
+        )
+        for station in topology.stations
+    ]
+    topology = replace(topology, stations=stations)
+    log = run_sim(
+        0, np.random.SeedSequence(3), "log", crn=True, topology=topology, run_time=2000
+    ).to_frame()
+    states = [
+        log.loc[log["Machine"] == name, "State"].to_numpy() for name in ("Filler_1", "Filler_2")
+    ]
+    assert not np.array_equal(*states)
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import jitkernel
+from machineconfig import MachineConfig, randomGenerator
+from machineparams import PARAMS_FILE
+from paramloader import load_machine_configs
+from sampler import Constant
+from simulation import run_sim
+from state import State
+from topology import DEFAULT_TOPOLOGY, LINE_FILE, load_topology
+from vectorized import VectorizedLine, run_vectorized
+
+REPLICATIONS = 20
+RUN_TIME = 60
+
+# Running speed, running minutes and down minutes of every machine of a line without
+# randomness, with small buffers so that there are tailbacks and lacks
+DETERMINISTIC = [(60, 7), (50, 9), (55, 5), (25, 11), (25, 6), (45, 8), (40, 10), (30, 4), (30, 12)]
+CAPACITIES = [50, 80, 40, 60, 50, 70]
+
+
+def fresh_topology():
+    # Built without the cache and without the shared configurations of machineparams, so
+    # that no other test has seeded them
+    return load_topology(LINE_FILE, load_machine_configs(PARAMS_FILE, ""))
+
+
+def deterministic_topology():
+    configs = []
+    for k, (speed, minutes) in enumerate(DETERMINISTIC):
+        states = [
+            State(128, {0: 1.0}, randomGenerator(Constant(speed)), randomGenerator(Constant(minutes))),
+            State(0, {128: 1.0}, randomGenerator(Constant(0)), randomGenerator(Constant(3 + k))),
+        ]
+        configs.append(MachineConfig(f"Machine_{k}", states=states))
+    return DEFAULT_TOPOLOGY.with_capacities(CAPACITIES).with_configs(configs)
+
+
+def unseeded_count(topology):
+    np.random.seed(1)
+    return run_vectorized(REPLICATIONS, RUN_TIME, topology=topology).count
+
+
+def test_seed_leaves_topology_unseeded():
+    topology = fresh_topology()
+    before = unseeded_count(topology)
+    run_vectorized(REPLICATIONS, RUN_TIME, seed=0, topology=topology)
+    assert np.array_equal(unseeded_count(topology), before)
+
+
+def test_fallback_seed_leaves_topology_unseeded(monkeypatch):
+    monkeypatch.setattr(jitkernel, "njit", None)
+    topology = fresh_topology()
+    before = unseeded_count(topology)
+    jitkernel.run_compiled(REPLICATIONS, RUN_TIME, seed=0, topology=topology)
+    assert np.array_equal(unseeded_count(topology), before)
+
+
+def test_seed_is_reproducible():
+    first = run_vectorized(REPLICATIONS, RUN_TIME, seed=0).count
+    run_vectorized(REPLICATIONS, RUN_TIME)
+    assert np.array_equal(run_vectorized(REPLICATIONS, RUN_TIME, seed=0).count, first)
+
+
+def test_resumed_frame_keeps_time():
+    line = VectorizedLine(REPLICATIONS)
+    line.run(RUN_TIME // 2)
+    frame = line.run(RUN_TIME, record=True).to_frame()
+    assert frame["Time"].min() == RUN_TIME // 2
+    assert frame["Time"].max() == RUN_TIME - 1
+    assert len(frame) == (RUN_TIME - RUN_TIME // 2) * REPLICATIONS * len(line.machine_names)
+
+
+def test_same_log_as_simpy():
+    # Without randomness both engines have to produce exactly the same log
+    topology = deterministic_topology()
+    simpy_log = run_sim(1, topology=topology, run_time=RUN_TIME).to_frame()
+    vectorized_log = run_vectorized(1, RUN_TIME, record=True, topology=topology).to_frame()
+    assert simpy_log["Tailback"].any() and simpy_log["Lack"].any()
+    columns = ["Time", "Machine", "State", "Set speed", "Actual speed", "Count", "Tailback", "Lack"]
+    pd.testing.assert_frame_equal(
+        vectorized_log[columns].reset_index(drop=True).astype({"Machine": str}),
+        simpy_log[columns].reset_index(drop=True).astype({"Machine": str}),
+        check_dtype=False,
+    )
@@ -0,0 +1,343 @@
+import copy
+import hashlib
+import os
+import numpy as np
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from machineconfig import MachineConfig
+
+
+class TopologyError(Exception):
+    """
+    Custom exception for errors in the description of a line.
+    """
+
+    pass
+
+
+@dataclass
+class MachineSpec:
+    """
+    A machine of a station: its name, its configuration and the state it starts in.
+    """
+
+    name: str
+    config: MachineConfig
+    initial_state: int
+
+
+@dataclass
+class BufferSpec:
+    """
+    A buffer of a line: its name, its maximum capacity and the parts it starts with.
+    A source has infinitely many parts, a sink an infinite capacity.
+    """
+
+    name: str
+    max_capacity: float = np.inf
+    initial_parts: float = 0
+
+
+@dataclass
+class StationSpec:
+    """
+    A station of a line: machines that work in parallel, taking parts from the same buffer
+    and putting them into the same buffer. Several stations that put into the same buffer
+    merge there.
+    """
+
+    name: str
+    machines: List[MachineSpec]
+    in_buffer: str
+    out_buffer: str
+
+
+@dataclass
+class Topology:
+    """
+    This class describes the layout of a line: its buffers and its stations, in the order in
+    which the machines act every minute.
+
+    It is compiled once into index arrays (see CompiledTopology) that the simpy engine, the
+    vectorized engine and the compiled kernel use, so several lines can be simulated one after
+    the other in the same process.
+    """
+
+    name: str
+    buffers: List[BufferSpec]
+    stations: List[StationSpec]
+
+    def __post_init__(self) -> None:
+        # Machines that share a configuration get a copy of it, so that every machine draws
+        # its own random values from generators of its own
+        seen = set()
+        stations = []
+        for station in self.stations:
+            machines = []
+            for machine in station.machines:
+                if id(machine.config) in seen:
+                    machine = replace(machine, config=copy.deepcopy(machine.config))
+                seen.add(id(machine.config))
+                machines.append(machine)
+            stations.append(replace(station, machines=machines))
+        self.stations = stations
+        self.compiled = self.compile()
+
+    def compile(self) -> "CompiledTopology":
+        """
+        Returns the indexed form of the line, in which the machines are numbered station by
+        station and the buffers in the order of the list of buffers.
+
+        Raises:
+            TopologyError: If the line has no stations, a name occurs more than once, a station
+                has no machines, or a station refers to a buffer that is not in the list.
+        """
+        if not self.stations:
+            raise TopologyError(f"Topology error in line {self.name}, since it has no stations")
+        buffer_index = {buffer.name: b for b, buffer in enumerate(self.buffers)}
+        if len(buffer_index) != len(self.buffers):
+            raise TopologyError(f"Topology error in line {self.name}, since buffer names repeat")
+        machines = [
+            (s, machine) for s, station in enumerate(self.stations) for machine in station.machines
+        ]
+        names = [machine.name for _, machine in machines]
+        if len(set(names)) != len(names):
+            raise TopologyError(f"Topology error in line {self.name}, since machine names repeat")
+        if len({station.name for station in self.stations}) != len(self.stations):
+            raise TopologyError(f"Topology error in line {self.name}, since station names repeat")
+        for station in self.stations:
+            if not station.machines:
+                raise TopologyError(
+                    f"Topology error in line {self.name}, since station {station.name} has no machines"
+                )
+            for buffer in (station.in_buffer, station.out_buffer):
+                if buffer not in buffer_index:
+                    raise TopologyError(
+                        f"Topology error in line {self.name}, since buffer {buffer} of station {station.name} is not found"
+                    )
+        in_buffer = np.array([buffer_index[self.stations[s].in_buffer] for s, _ in machines])
+        out_buffer = np.array([buffer_index[self.stations[s].out_buffer] for s, _ in machines])
+        # The buffers between two stations, whose capacities are the decisions of buffer studies
+        inner = [b for b in range(len(self.buffers)) if b in in_buffer and b in out_buffer]
+        return CompiledTopology(
+            machine_names=names,
+            configs=[machine.config for _, machine in machines],
+            initial_states=np.array([machine.initial_state for _, machine in machines]),
+            station=np.array([s for s, _ in machines]),
+            station_names=[station.name for station in self.stations],
+            in_buffer=in_buffer,
+            out_buffer=out_buffer,
+            buffer_names=list(buffer_index),
+            max_capacity=np.array([buffer.max_capacity for buffer in self.buffers], dtype=float),
+            initial_levels=np.array(
+                [buffer.initial_parts for buffer in self.buffers], dtype=float
+            ),
+            inner=np.array(inner, dtype=np.intp),
+        )
+
+    @property
+    def configs(self) -> List[MachineConfig]:
+        """
+        The configurations of the machines, in the order in which they act.
+        """
+        return self.compiled.configs
+
+    @property
+    def capacities(self) -> List[float]:
+        """
+        The maximum capacities of the buffers between two stations, in the order of the buffers.
+        """
+        return [self.buffers[b].max_capacity for b in self.compiled.inner]
+
+    def digest(self) -> str:
+        """
+        Returns a hash of the layout: the buffers with their capacities and initial parts, and
+        the stations with their machines, the names of their configurations and their initial
+        states. The parameters of the configurations are not part of it.
+        """
+        description = repr(
+            (
+                [
+                    (buffer.name, float(buffer.max_capacity), float(buffer.initial_parts))
+                    for buffer in self.buffers
+                ],
+                [
+                    (
+                        station.name,
+                        [
+                            (machine.name, machine.config.name, int(machine.initial_state))
+                            for machine in station.machines
+                        ],
+                        station.in_buffer,
+                        station.out_buffer,
+                    )
+                    for station in self.stations
+                ],
+            )
+        )
+        return hashlib.sha256(description.encode()).hexdigest()
+
+    def with_capacities(self, capacities: Sequence[float]) -> "Topology":
+        """
+        Returns a copy of the line with other maximum capacities of the buffers between two
+        stations, in the order of the buffers.
+
+        Raises:
+            TopologyError: If the number of capacities does not match.
+        """
+        if len(capacities) != len(self.compiled.inner):
+            raise TopologyError(
+                f"Topology error in line {self.name}, since it has {len(self.compiled.inner)} buffers between stations, not {len(capacities)}"
+            )
+        buffers = list(self.buffers)
+        for b, capacity in zip(self.compiled.inner, capacities):
+            buffers[b] = replace(buffers[b], max_capacity=capacity)
+        return replace(self, buffers=buffers)
+
+    def with_configs(self, configs: Sequence[MachineConfig]) -> "Topology":
+        """
+        Returns a copy of the line with other machine configurations, e.g. copies with their
+        own random number generators, in the order in which the machines act.
+        """
+        configs = iter(configs)
+        stations = [
+            replace(
+                station,
+                machines=[replace(machine, config=next(configs)) for machine in station.machines],
+            )
+            for station in self.stations
+        ]
+        return replace(self, stations=stations)
+
+
+@dataclass
+class CompiledTopology:
+    """
+    The indexed form of a Topology. Machine i is the i-th machine of the stations in order,
+    buffer b is the b-th buffer of the list of buffers.
+    """
+
+    machine_names: List[str]
+    configs: List[MachineConfig]
+    initial_states: np.ndarray
+    # The station index, the buffer before and the buffer after of every machine
+    station: np.ndarray
+    station_names: List[str]
+    in_buffer: np.ndarray
+    out_buffer: np.ndarray
+    buffer_names: List[str]
+    max_capacity: np.ndarray
+    initial_levels: np.ndarray
+    # The indices of the buffers between two stations
+    inner: np.ndarray
+
+    def stations(self) -> Dict[str, List[str]]:
+        """
+        Returns the names of the machines of every station, as stations.STATIONS.
+        """
+        return {
+            name: [
+                machine
+                for machine, station in zip(self.machine_names, self.station)
+                if station == s
+            ]
+            for s, name in enumerate(self.station_names)
+        }
+
+    def machines(self) -> List[Tuple[str, MachineConfig, int, int, int]]:
+        """
+        Returns the machines in the form of vectorized.VectorizedLine: (name, configuration,
+        initial state, buffer before, buffer after).
+        """
+        return [
+            (name, config, int(state), int(in_q), int(out_q))
+            for name, config, state, in_q, out_q in zip(
+                self.machine_names,
+                self.configs,
+                self.initial_states,
+                self.in_buffer,
+                self.out_buffer,
+            )
+        ]
+
+    def buffers(self) -> List[Tuple[str, float, float]]:
+        """
+        Returns the buffers in the form of vectorized.VectorizedLine: (name, maximum capacity,
+        current parts).
+        """
+        return list(zip(self.buffer_names, self.max_capacity, self.initial_levels))
+
+
+def build_topology(
+    params: Dict[str, Any], configs: Dict[str, MachineConfig], name: str = "line"
+) -> Topology:
+    """
+    Builds a line from the description that was read from a file, see line.toml.
+
+    Args:
+        params (dict): The description with a list ``buffer`` and a list ``station``.
+        configs (dict): The machine configurations by name, that the machines refer to.
+        name (str): The name of the line if the description has none.
+
+    Raises:
+        TopologyError: If a machine refers to an unknown configuration or a key is missing.
+    """
+    name = params.get("name", name)
+    try:
+        buffers = [
+            BufferSpec(
+                buffer["name"],
+                buffer.get("max_capacity", np.inf),
+                buffer.get("initial_parts", 0),
+            )
+            for buffer in params.get("buffer", [])
+        ]
+        stations = []
+        for station in params.get("station", []):
+            machines = []
+            for machine in station["machines"]:
+                config = machine.get("config", machine["name"])
+                if config not in configs:
+                    raise TopologyError(
+                        f"Topology error in line {name}, since configuration {config} of machine {machine['name']} is not found"
+                    )
+                initial_state = machine.get("initial_state", station.get("initial_state"))
+                if initial_state is None:
+                    raise KeyError("initial_state")
+                machines.append(MachineSpec(machine["name"], configs[config], int(initial_state)))
+            stations.append(StationSpec(station["name"], machines, station["in"], station["out"]))
+    except KeyError as error:
+        raise TopologyError(f"Topology error in line {name}: missing {error}") from None
+    return Topology(name, buffers, stations)
+
+
+def load_topology(
+    path: str, configs: Optional[Dict[str, MachineConfig]] = None
+) -> Topology:
+    """
+    Loads a line from a TOML or JSON file, see line.toml.
+
+    Args:
+        path (str): The file of the line.
+        configs (dict): The machine configurations by name. By default they are loaded from
+            the parameter file ``params`` of the line, relative to the file of the line, or
+            are those of machineparams.
+    """
+    from paramloader import load_machine_configs, read_params
+
+    params = read_params(path)
+    if configs is None:
+        if "params" in params:
+            configs = load_machine_configs(
+                os.path.join(os.path.dirname(os.path.abspath(path)), params["params"])
+            )
+        else:
+            from machineparams import MACHINES
+
+            configs = MACHINES
+    return build_topology(params, configs, os.path.splitext(os.path.basename(path))[0])
+
+
+# The line of the packaging plant, as described in line.toml
+LINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "line.toml")
+DEFAULT_TOPOLOGY = load_topology(LINE_FILE)
@@ -0,0 +1,232 @@
+import copy
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from machineconfig import MachineConfig
+from topology import DEFAULT_TOPOLOGY, Topology
+
+
+# Time for the simulation to run, the same as in simulation.py
+RUN_TIME = 481
+
+# The buffers of the default line as in run_sim: name, maximum capacity and current parts
+DEFAULT_BUFFERS: List[Tuple[str, float, float]] = DEFAULT_TOPOLOGY.compiled.buffers()
+
+# The machines of the default line as in run_sim, in the order in which they act every minute:
+# name, configuration, initial state, index of the buffer before and the buffer after
+DEFAULT_MACHINES: List[Tuple[str, MachineConfig, int, int, int]] = (
+    DEFAULT_TOPOLOGY.compiled.machines()
+)
+
+
+@dataclass
+class VectorizedResult:
+    """
+    The outcome of a vectorized run. All arrays have the replications on the first axis
+    (after the time axis for the per-minute history), whose first row is the minute ``start``.
+    """
+
+    machine_names: List[str]
+    buffer_names: List[str]
+    count: np.ndarray
+    idle_parts: np.ndarray
+    buffer_levels: np.ndarray
+    history: Dict[str, np.ndarray] = field(default_factory=dict)
+    start: int = 0
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Returns the recorded history as a log with the same columns as the event log of simulation.py.
+        The run has to be made with ``record=True``.
+        """
+        if not self.history:
+            raise ValueError("The run was made without recording the history")
+        run_time, replications, machines = self.history["state"].shape
+        # Order the rows like the simpy log: per simulation, per minute, per machine
+        order = (1, 0, 2)
+        actual_speed = self.history["actual_speed"]
+        return pd.DataFrame(
+            {
+                "Time": np.broadcast_to(
+                    np.arange(self.start, self.start + run_time)[:, None, None],
+                    actual_speed.shape,
+                ).transpose(order).ravel(),
+                "Machine": np.tile(self.machine_names, run_time * replications),
+                "State": self.history["state"].transpose(order).ravel(),
+                "Set speed": self.history["set_speed"].transpose(order).ravel(),
+                "Actual speed": actual_speed.transpose(order).ravel(),
+                "Count": actual_speed.cumsum(axis=0).transpose(order).ravel(),
+                "Tailback": self.history["tailback"].transpose(order).ravel().astype(int),
+                "Lack": self.history["lack"].transpose(order).ravel().astype(int),
+                "Simulation": np.repeat(
+                    np.arange(1, replications + 1), run_time * machines
+                ),
+            }
+        )
+
+
+class VectorizedLine:
+    """
+    This class simulates many replications of the packaging line in lockstep with NumPy.
+
+    The line is kept as arrays of shape (replications, machines) for the machine states,
+    the minute of the next state switch, the tailback and lack flags and the counts, and of shape
+    (replications, buffers) for the buffer levels. Every minute the machines act one after
+    the other, in the same order as the simpy processes, with the same rules as
+    Machine.produce, Buffer.get_parts and Buffer.put_parts.
+    """
+
+    def __init__(
+        self,
+        replications: int,
+        machines: List[Tuple[str, MachineConfig, int, int, int]] = DEFAULT_MACHINES,
+        buffers: List[Tuple[str, float, float]] = DEFAULT_BUFFERS,
+    ):
+        """
+        Args:
+            replications (int): The number of replications that run in lockstep.
+            machines (list): The machines as (name, configuration, initial state, buffer before, buffer after).
+            buffers (list): The buffers as (name, maximum capacity, current parts).
+        """
+        self.replications = replications
+        self.machine_names = [machine[0] for machine in machines]
+        self.configs = [machine[1] for machine in machines]
+        self.compiled = [config.compiled for config in self.configs]
+        self.in_buffer = [machine[3] for machine in machines]
+        self.out_buffer = [machine[4] for machine in machines]
+        self.buffer_names = [buffer[0] for buffer in buffers]
+        self.max_capacity = np.array([buffer[1] for buffer in buffers], dtype=float)
+
+        shape = (replications, len(machines))
+        self.now = 0
+        self.state = np.empty(shape, dtype=np.intp)
+        self.switch_time = np.empty(shape, dtype=np.int64)
+        self.tailback = np.zeros(shape, dtype=bool)
+        self.lack = np.zeros(shape, dtype=bool)
+        self.count = np.zeros(shape)
+        self.idle_parts = np.zeros(shape)
+        self.levels = np.tile(
+            np.array([buffer[2] for buffer in buffers], dtype=float), (replications, 1)
+        )
+        for m, machine in enumerate(machines):
+            compiled = self.compiled[m]
+            self.state[:, m] = compiled.index_of(np.full(replications, machine[2]))
+            self.switch_time[:, m] = compiled.new_durations(self.state[:, m])
+
+    def step(self, record: Optional[Dict[str, np.ndarray]] = None, row: int = 0) -> None:
+        """
+        Advances every replication by one minute.
+
+        Args:
+            record (dict): The per-minute history arrays to write this minute into, if any.
+            row (int): The row of the history arrays that belongs to this minute.
+        """
+        t = self.now
+        for m, compiled in enumerate(self.compiled):
+            state = self.state[:, m]
+            # Machine.get_speed: no new speed is drawn after a tailback or lack
+            speed = np.zeros(self.replications)
+            running = ~(self.tailback[:, m] | self.lack[:, m])
+            for s, state_speed in enumerate(compiled.speeds):
+                mask = running & (state == s)
+                n = np.count_nonzero(mask)
+                if n:
+                    speed[mask] = state_speed.draw(n)
+            # Buffer.get_parts on the buffer before
+            in_q = self.in_buffer[m]
+            start_producing = np.minimum(speed, self.levels[:, in_q])
+            self.levels[:, in_q] -= start_producing
+            lack = (start_producing < speed) & (speed != 0)
+            # Buffer.put_parts on the buffer after
+            out_q = self.out_buffer[m]
+            buffer_space = self.max_capacity[out_q] - self.levels[:, out_q]
+            success_produced = np.minimum(start_producing, buffer_space)
+            self.levels[:, out_q] += success_produced
+            tailback = (success_produced < speed) & ~lack
+            speed[tailback] = 0
+            self.idle_parts[:, m] += np.where(
+                tailback, start_producing - success_produced, 0
+            )
+            self.tailback[:, m] = tailback
+            self.lack[:, m] = lack
+            self.count[:, m] += success_produced
+            # Switch the replications that have been in their state for the given time
+            due = self.switch_time[:, m] == t
+            if due.any():
+                next_state = compiled.next_index(state[due])
+                self.state[due, m] = next_state
+                self.switch_time[due, m] = t + compiled.new_durations(next_state)
+            if record is not None:
+                record["state"][row, :, m] = compiled.ids[self.state[:, m]]
+                record["set_speed"][row, :, m] = speed
+                record["actual_speed"][row, :, m] = success_produced
+                record["tailback"][row, :, m] = tailback
+                record["lack"][row, :, m] = lack
+        self.now += 1
+
+    def run(self, run_time: int = RUN_TIME, record: bool = False) -> VectorizedResult:
+        """
+        Runs every replication until the given time.
+
+        Args:
+            run_time (int): The time until which the simulation runs.
+            record (bool): Whether to keep the per-minute history of every machine.
+
+        Returns:
+            VectorizedResult: The counts, idle parts and buffer levels, and the history if recorded.
+        """
+        history = None
+        if record:
+            shape = (run_time - self.now, self.replications, len(self.configs))
+            history = {
+                "state": np.zeros(shape, dtype=np.int32),
+                "set_speed": np.zeros(shape, dtype=np.float32),
+                "actual_speed": np.zeros(shape, dtype=np.float32),
+                "tailback": np.zeros(shape, dtype=bool),
+                "lack": np.zeros(shape, dtype=bool),
+            }
+        start = self.now
+        while self.now < run_time:
+            self.step(history, self.now - start)
+        return VectorizedResult(
+            self.machine_names,
+            self.buffer_names,
+            self.count.copy(),
+            self.idle_parts.copy(),
+            self.levels.copy(),
+            history or {},
+            start,
+        )
+
+
+def run_vectorized(
+    replications: int,
+    run_time: int = RUN_TIME,
+    record: bool = False,
+    seed: Optional[int] = None,
+    topology: Topology = DEFAULT_TOPOLOGY,
+) -> VectorizedResult:
+    """
+    Runs the given number of replications of a line in lockstep.
+
+    Args:
+        replications (int): The number of replications.
+        run_time (int): The time until which the simulation runs.
+        record (bool): Whether to keep the per-minute history of every machine.
+        seed (int): The seed of the run, numpy's global state is used if none is given.
+        topology (Topology): The layout of the line, see topology.py.
+
+    Returns:
+        VectorizedResult: The outcome of the run.
+    """
+    if seed is not None:
+        # Seed copies, so that the configurations of the topology keep drawing from numpy's
+        # global state in later runs without a seed
+        topology = topology.with_configs(copy.deepcopy(topology.configs))
+        random_state = np.random.default_rng(seed)
+        for machine_config in topology.configs:
+            machine_config.seed(random_state)
+    return VectorizedLine(
+        replications, topology.compiled.machines(), topology.compiled.buffers()
+    ).run(run_time, record)